@@ -12,6 +12,10 @@ from src.models.report_model import Report
 from src.models.transaction_model import Transaction
 from src.models.customer_model import Customer
 from src.models.history_model import History
+from src.models.storage_deletion_model import StorageDeletion
+from src.models.user_session_model import UserSession
+from src.models.revoked_token_model import RevokedToken
+from src.models.spooled_upload_model import SpooledUpload
 from src.config.settings import DATABASE_URL
 
 
@@ -0,0 +1,51 @@
+"""add trigram search indexes
+
+Revision ID: 3f1c9a7b2d10
+Revises:
+Create Date: 2026-10-19 09:12:04.118702
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_INDEXES = [
+    ("ix_reports_description_trgm", "reports", "description"),
+    ("ix_transactions_complaint_trgm", "transactions", "complaint"),
+    ("ix_customers_name_trgm", "customers", "name"),
+    ("ix_customers_plate_number_trgm", "customers", "plate_number"),
+    ("ix_customers_vehicle_type_trgm", "customers", "vehicle_type"),
+    ("ix_employees_name_trgm", "employees", "name"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm only exists on PostgreSQL, SQLite keeps the plain LIKE scan
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, table_name, column_name in TRGM_INDEXES:
+        op.create_index(
+            index_name, table_name, [column_name],
+            postgresql_using="gin",
+            postgresql_ops={column_name: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for index_name, table_name, _ in reversed(TRGM_INDEXES):
+        op.drop_index(index_name, table_name=table_name)
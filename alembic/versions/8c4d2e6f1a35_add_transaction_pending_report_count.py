@@ -0,0 +1,40 @@
+"""add transaction pending report count
+
+Revision ID: 8c4d2e6f1a35
+Revises: 3f1c9a7b2d10
+Create Date: 2026-10-19 11:48:37.524190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2e6f1a35'
+down_revision: Union[str, None] = '3f1c9a7b2d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'transactions',
+        sa.Column('pending_report_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.create_index('ix_reports_transaction_id_status', 'reports', ['transaction_id', 'status'])
+
+    # Backfill the counter from the existing reports
+    op.execute(
+        "UPDATE transactions SET pending_report_count = ("
+        "SELECT COUNT(*) FROM reports "
+        "WHERE reports.transaction_id = transactions.id AND reports.status = 'PENDING')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reports_transaction_id_status', table_name='reports')
+    op.drop_column('transactions', 'pending_report_count')
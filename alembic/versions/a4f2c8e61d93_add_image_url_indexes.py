@@ -0,0 +1,35 @@
+"""add image url indexes
+
+Revision ID: a4f2c8e61d93
+Revises: e27a4c9f3b61
+Create Date: 2026-10-19 21:14:08.352907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f2c8e61d93'
+down_revision: Union[str, None] = 'e27a4c9f3b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The storage cleanup worker checks whether a url is still referenced by exact value
+    op.create_index(op.f('ix_employees_image_url'), 'employees', ['image_url'], unique=False)
+    op.create_index(op.f('ix_reports_image_url'), 'reports', ['image_url'], unique=False)
+    op.create_index(op.f('ix_attendances_checkin_image_url'), 'attendances', ['checkin_image_url'], unique=False)
+    op.create_index(op.f('ix_attendances_checkout_image_url'), 'attendances', ['checkout_image_url'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attendances_checkout_image_url'), table_name='attendances')
+    op.drop_index(op.f('ix_attendances_checkin_image_url'), table_name='attendances')
+    op.drop_index(op.f('ix_reports_image_url'), table_name='reports')
+    op.drop_index(op.f('ix_employees_image_url'), table_name='employees')
@@ -0,0 +1,29 @@
+"""add storage deletion path index
+
+Revision ID: c9e3b7a15f42
+Revises: a4f2c8e61d93
+Create Date: 2026-10-19 22:03:47.619254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e3b7a15f42'
+down_revision: Union[str, None] = 'a4f2c8e61d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every image upload checks for a queued deletion of its object
+    op.create_index(op.f('ix_storage_deletions_path'), 'storage_deletions', ['path'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_storage_deletions_path'), table_name='storage_deletions')
@@ -0,0 +1,41 @@
+"""add storage deletions
+
+Revision ID: d51f0b3c7e82
+Revises: 8c4d2e6f1a35
+Create Date: 2026-10-19 13:05:12.870344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd51f0b3c7e82'
+down_revision: Union[str, None] = '8c4d2e6f1a35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'storage_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_storage_deletions_id'), 'storage_deletions', ['id'], unique=False)
+    op.create_index(op.f('ix_storage_deletions_next_attempt_at'), 'storage_deletions', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_storage_deletions_next_attempt_at'), table_name='storage_deletions')
+    op.drop_index(op.f('ix_storage_deletions_id'), table_name='storage_deletions')
+    op.drop_table('storage_deletions')
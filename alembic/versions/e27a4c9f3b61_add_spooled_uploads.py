@@ -0,0 +1,38 @@
+"""add spooled uploads
+
+Revision ID: e27a4c9f3b61
+Revises: b83f5a1d6e29
+Create Date: 2026-10-19 19:42:31.506118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e27a4c9f3b61'
+down_revision: Union[str, None] = 'b83f5a1d6e29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'spooled_uploads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=500), nullable=False),
+        sa.Column('lost_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('path'),
+    )
+    op.create_index(op.f('ix_spooled_uploads_id'), 'spooled_uploads', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_spooled_uploads_id'), table_name='spooled_uploads')
+    op.drop_table('spooled_uploads')
@@ -0,0 +1,98 @@
+"""
+Overhead of the JWT auth middleware on a trivial route, and of token
+verification with and without the verified-claims cache.
+
+Compares the pure ASGI JWTAuthMiddleware with the same check done in a
+BaseHTTPMiddleware (the previous implementation). Requests are driven
+straight through the ASGI interface, so only app and middleware cost is
+measured, no server or socket.
+
+    python -m benchmarks.jwt_middleware_bench [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from jose import jwt
+from src.config.settings import ALGORITHM, SECRET_KEY
+from src.libs.jwt import create_access_token
+from src.middlewares.jwt_auth_middleware import JWTAuthMiddleware, authenticate_token, is_excluded_path
+
+class BaseHTTPJWTAuthMiddleware(BaseHTTPMiddleware):
+    """The old shape: same checks, wrapped by BaseHTTPMiddleware"""
+    async def dispatch(self, request, call_next):
+        if request.method == "OPTIONS" or is_excluded_path(request.url.path):
+            return await call_next(request)
+        authorization = request.headers.get("Authorization")
+        if not authorization or not authorization.startswith("Bearer "):
+            return PlainTextResponse("Unauthorized", status_code=401)
+        user = authenticate_token(authorization.split("Bearer ")[1].strip())
+        if isinstance(user, tuple):
+            return PlainTextResponse("Unauthorized", status_code=401)
+        request.state.user = user
+        return await call_next(request)
+
+async def ping(request):
+    return PlainTextResponse(str(request.state.user["user_id"]))
+
+def build_app(middleware_class) -> Starlette:
+    return Starlette(routes=[Route("/api/ping", ping)], middleware=[Middleware(middleware_class)])
+
+async def run(app, token: str, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/ping", "raw_path": b"/api/ping", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"Unexpected status {message['status']}")
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+async def main(requests: int):
+    token = create_access_token({"sub": {"id": 1, "username": "bench", "is_admin": False, "karyawan_id": 1}})
+    apps = {
+        "BaseHTTPMiddleware": build_app(BaseHTTPJWTAuthMiddleware),
+        "pure ASGI": build_app(JWTAuthMiddleware),
+    }
+    for app in apps.values():
+        await run(app, token, 200)  # warm up
+
+    results = {name: await run(app, token, requests) for name, app in apps.items()}
+    for name, elapsed in results.items():
+        print(f"{name:>20}: {elapsed / requests * 1e6:8.1f} us/request  {requests / elapsed:10.0f} req/s")
+    baseline, current = results["BaseHTTPMiddleware"], results["pure ASGI"]
+    print(f"{'overhead reduction':>20}: {(1 - current / baseline) * 100:7.1f} %")
+
+    # Token verification alone: full decode every time vs the verified-claims cache
+    start = time.perf_counter()
+    for _ in range(requests):
+        jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_sub": False})
+    decode = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(requests):
+        authenticate_token(token)
+    cached = time.perf_counter() - start
+    print(f"{'jwt.decode':>20}: {decode / requests * 1e6:8.1f} us/token")
+    print(f"{'cached verify':>20}: {cached / requests * 1e6:8.1f} us/token")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,85 @@
+"""
+Throughput of concurrent requests whose handler does blocking database
+work, called inline on the event loop vs dispatched with run_sync.
+
+The blocking call sleeps for the given time, standing in for a
+psycopg2 round trip (the driver releases the GIL while it waits on the
+socket, as sleep does). Requests are driven straight through the ASGI
+interface, all of them in flight at once, and a cheap /ping issued in
+the middle of the load shows how long the event loop was unavailable.
+
+    python -m benchmarks.run_sync_bench [requests] [query_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from src.config.settings import SYNC_WORKERS
+from src.libs.concurrency import run_sync
+
+QUERY_SECONDS = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+
+def blocking_query() -> str:
+    time.sleep(QUERY_SECONDS)
+    return "ok"
+
+async def inline(request):
+    # What the controllers did: sync service code straight on the loop
+    return PlainTextResponse(blocking_query())
+
+async def offloaded(request):
+    return PlainTextResponse(await run_sync(blocking_query))
+
+async def ping(request):
+    return PlainTextResponse("pong")
+
+app = Starlette(routes=[Route("/inline", inline), Route("/offloaded", offloaded), Route("/ping", ping)])
+
+async def request(path: str) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"Unexpected status {message['status']}")
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - start
+
+async def run(path: str, requests: int):
+    async def ping_during_load():
+        # Latency from when the ping was due, an event loop stall counts in full
+        due = time.perf_counter() + QUERY_SECONDS
+        await asyncio.sleep(QUERY_SECONDS)
+        await request("/ping")
+        return time.perf_counter() - due
+
+    start = time.perf_counter()
+    results = await asyncio.gather(ping_during_load(), *(request(path) for _ in range(requests)))
+    return time.perf_counter() - start, results[0]
+
+async def main(requests: int):
+    await run("/offloaded", SYNC_WORKERS)  # start the worker threads
+    print(f"{requests} concurrent requests, {QUERY_SECONDS * 1000:.0f} ms blocking query, {SYNC_WORKERS} sync workers")
+    results = {}
+    for name, path in (("inline", "/inline"), ("run_sync", "/offloaded")):
+        elapsed, ping_latency = await run(path, requests)
+        results[name] = elapsed
+        print(f"{name:>10}: {requests / elapsed:8.1f} req/s  total {elapsed * 1000:8.1f} ms  /ping waited {ping_latency * 1000:8.1f} ms")
+    print(f"{'speedup':>10}: {results['inline'] / results['run_sync']:8.1f} x")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
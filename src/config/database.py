@@ -1,15 +1,185 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from src.config.settings import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from src.config.settings import (
+    ASYNC_DATABASE_URL, ASYNC_DB_MAX_OVERFLOW, ASYNC_DB_POOL_SIZE, DATABASE_REPLICA_URLS, DATABASE_URL, DB_MAX_OVERFLOW,
+    DB_POOL_MODE, DB_POOL_PRE_PING, DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_STATEMENT_CACHE_SIZE
+)
 
-engine = create_engine(DATABASE_URL)
+class CheckoutStatsMixin:
+    """Records how long pool checkouts wait for a connection"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.stats = {"checkouts": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0, "timeouts": 0}
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self.stats_lock:
+                self.stats["timeouts"] += 1
+            raise
+        finally:
+            wait_ms = (time.perf_counter() - started) * 1000
+            with self.stats_lock:
+                self.stats["checkouts"] += 1
+                self.stats["wait_ms_total"] += wait_ms
+                self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+
+    def recreate(self):
+        # Statistics survive SQLAlchemy rebuilding the pool
+        pool = super().recreate()
+        pool.stats, pool.stats_lock = self.stats, self.stats_lock
+        return pool
+
+class InstrumentedQueuePool(CheckoutStatsMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(CheckoutStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _pool_options(poolclass, pool_size: int, max_overflow: int) -> dict:
+    if DB_POOL_MODE == "null":
+        # Every checkout opens a fresh connection, nothing can go stale
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": poolclass,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def _count_connects(engine: Engine) -> Engine:
+    engine.pool_connects = 0
+
+    @event.listens_for(engine, "connect")
+    def count_connect(dbapi_connection, connection_record):
+        engine.pool_connects += 1
+
+    return engine
+
+def build_engine(url: str) -> Engine:
+    """Engine with the configured pool, see DB_POOL_* in settings"""
+    return _count_connects(create_engine(url, **_pool_options(InstrumentedQueuePool, DB_POOL_SIZE, DB_MAX_OVERFLOW)))
+
+def async_database_url(url: str) -> URL:
+    """DATABASE_URL with its async driver, asyncpg for PostgreSQL and aiosqlite for SQLite"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ("postgresql", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg calls libpq's sslmode "ssl"
+        sslmode = parsed.query.get("sslmode")
+        if sslmode:
+            parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    else:
+        raise ValueError(f"No async driver configured for {backend}, set ASYNC_DATABASE_URL")
+    return parsed
+
+def build_async_engine(url: URL) -> AsyncEngine:
+    """Async twin of build_engine, its pool is sized by ASYNC_DB_POOL_SIZE and ASYNC_DB_MAX_OVERFLOW"""
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        # Both caches have to be off behind PgBouncer in transaction mode
+        url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+        connect_args["statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+    async_engine = create_async_engine(
+        url, connect_args=connect_args,
+        **_pool_options(InstrumentedAsyncQueuePool, ASYNC_DB_POOL_SIZE, ASYNC_DB_MAX_OVERFLOW)
+    )
+    _count_connects(async_engine.sync_engine)
+    return async_engine
+
+def pool_metrics(engine: Engine) -> dict:
+    """Checked out connections, overflow and checkout wait statistics of an engine's pool"""
+    pool = engine.pool
+    metrics = {"mode": DB_POOL_MODE, "connects": engine.pool_connects}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": DB_POOL_TIMEOUT,
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        with pool.stats_lock:
+            checkouts = stats["checkouts"]
+            metrics.update({
+                "checkouts": checkouts,
+                "timeouts": stats["timeouts"],
+                "avg_wait_ms": round(stats["wait_ms_total"] / checkouts, 3) if checkouts else 0.0,
+                "max_wait_ms": round(stats["wait_ms_max"], 3),
+            })
+    return metrics
+
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = build_async_engine(make_url(ASYNC_DATABASE_URL) if ASYNC_DATABASE_URL else async_database_url(DATABASE_URL))
+# Loaded attributes stay usable after commit, an async session cannot lazy load them back
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Same order in both lists, index i is one replica server
+replica_engines = [build_engine(url) for url in DATABASE_REPLICA_URLS]
+async_replica_engines = [build_async_engine(async_database_url(url)) for url in DATABASE_REPLICA_URLS]
+
 def get_db():
+    """
+    Request scoped unit of work.
+
+    Repositories only flush, the request commits once after the endpoint
+    returns and rolls back everything if it raised.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def get_async_db():
+    """
+    get_db on the async engine.
+
+    Queries are awaited instead of blocking the event loop, so a slow
+    query no longer holds up every other request on the worker.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+@contextmanager
+def session_scope():
+    """Same unit of work as get_db, for code running outside a request"""
     db = SessionLocal()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,3 +17,112 @@ ADMIN_KEY=os.getenv("ADMIN_KEY")
 OFFICE_LATITUDE = float(os.getenv("OFFICE_LATITUDE"))
 OFFICE_LONGITUDE = float(os.getenv("OFFICE_LONGITUDE"))
 ALLOWED_RADIUS_KM = float(os.getenv("ALLOWED_RADIUS_KM"))
+# Export jobs
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "exports"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+EXPORT_JOB_TTL_SECONDS = int(os.getenv("EXPORT_JOB_TTL_SECONDS", 3600))
+# Pagination counts
+PAGINATION_COUNT_CACHE_TTL = float(os.getenv("PAGINATION_COUNT_CACHE_TTL", 30))
+PAGINATION_COUNT_CACHE_SIZE = int(os.getenv("PAGINATION_COUNT_CACHE_SIZE", 1024))
+PAGINATION_ESTIMATE_MIN_ROWS = int(os.getenv("PAGINATION_ESTIMATE_MIN_ROWS", 10000))
+# Image variants
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+IMAGE_VARIANT_SM_SIZE = int(os.getenv("IMAGE_VARIANT_SM_SIZE", 160))
+IMAGE_VARIANT_MD_SIZE = int(os.getenv("IMAGE_VARIANT_MD_SIZE", 640))
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", 75))
+# Upload normalisation
+IMAGE_NORMALIZE = os.getenv("IMAGE_NORMALIZE", "true").lower() == "true"
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "webp").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 80))
+IMAGE_MAX_DIMENSION_ATTENDANCE = int(os.getenv("IMAGE_MAX_DIMENSION_ATTENDANCE", 1024))
+IMAGE_MAX_DIMENSION_REPORT = int(os.getenv("IMAGE_MAX_DIMENSION_REPORT", 1600))
+IMAGE_MAX_DIMENSION_EMPLOYEE = int(os.getenv("IMAGE_MAX_DIMENSION_EMPLOYEE", 1024))
+# Storage client
+STORAGE_TIMEOUT_SECONDS = float(os.getenv("STORAGE_TIMEOUT_SECONDS", 30))
+STORAGE_CONNECT_TIMEOUT_SECONDS = float(os.getenv("STORAGE_CONNECT_TIMEOUT_SECONDS", 5))
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", 20))
+STORAGE_MAX_CONCURRENCY = int(os.getenv("STORAGE_MAX_CONCURRENCY", 10))
+# Storage backend (supabase or local)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+STORAGE_LOCAL_DIR = os.getenv("STORAGE_LOCAL_DIR", os.path.join(tempfile.gettempdir(), "storage"))
+STORAGE_LOCAL_BASE_URL = os.getenv("STORAGE_LOCAL_BASE_URL", f"http://localhost:{PORT}")
+# Known upload hashes kept per process to skip duplicate uploads
+IMAGE_KNOWN_HASH_CACHE_SIZE = int(os.getenv("IMAGE_KNOWN_HASH_CACHE_SIZE", 2048))
+# Storage cleanup worker
+STORAGE_CLEANUP_ENABLED = os.getenv("STORAGE_CLEANUP_ENABLED", "true").lower() == "true"
+STORAGE_CLEANUP_INTERVAL_SECONDS = float(os.getenv("STORAGE_CLEANUP_INTERVAL_SECONDS", 30))
+STORAGE_CLEANUP_BATCH_SIZE = int(os.getenv("STORAGE_CLEANUP_BATCH_SIZE", 100))
+STORAGE_CLEANUP_MAX_ATTEMPTS = int(os.getenv("STORAGE_CLEANUP_MAX_ATTEMPTS", 8))
+STORAGE_CLEANUP_RETRY_SECONDS = int(os.getenv("STORAGE_CLEANUP_RETRY_SECONDS", 60))
+STORAGE_CLEANUP_RETRY_MAX_SECONDS = int(os.getenv("STORAGE_CLEANUP_RETRY_MAX_SECONDS", 3600))
+STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS = int(os.getenv("STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS", 86400))
+STORAGE_ORPHAN_GRACE_SECONDS = int(os.getenv("STORAGE_ORPHAN_GRACE_SECONDS", 86400))
+# A queued deletion waits this long, and an upload reusing the object pushes it back as much again
+STORAGE_DELETION_GRACE_SECONDS = int(os.getenv("STORAGE_DELETION_GRACE_SECONDS", 300))
+# Storage retries, circuit breaker and upload spool
+STORAGE_RETRY_ATTEMPTS = int(os.getenv("STORAGE_RETRY_ATTEMPTS", 3))
+STORAGE_RETRY_BASE_SECONDS = float(os.getenv("STORAGE_RETRY_BASE_SECONDS", 0.2))
+STORAGE_RETRY_MAX_SECONDS = float(os.getenv("STORAGE_RETRY_MAX_SECONDS", 2))
+STORAGE_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("STORAGE_ATTEMPT_TIMEOUT_SECONDS", 10))
+STORAGE_BREAKER_FAILURE_THRESHOLD = int(os.getenv("STORAGE_BREAKER_FAILURE_THRESHOLD", 5))
+STORAGE_BREAKER_RESET_SECONDS = float(os.getenv("STORAGE_BREAKER_RESET_SECONDS", 30))
+# The spool hands out urls for photos that are only on local disk, so it must be a
+# durable volume shared by every worker. Serverless /tmp is gone after the request.
+STORAGE_SPOOL_DIR = os.getenv("STORAGE_SPOOL_DIR", "")
+STORAGE_SPOOL_ENABLED = os.getenv("STORAGE_SPOOL_ENABLED", "false").lower() == "true"
+if STORAGE_SPOOL_ENABLED and (os.getenv("VERCEL") or not STORAGE_SPOOL_DIR):
+    print("Warning: Storage spool needs a durable STORAGE_SPOOL_DIR and is not available on Vercel, uploads fail with 503 while storage is down")
+    STORAGE_SPOOL_ENABLED = False
+STORAGE_SPOOL_FLUSH_SECONDS = float(os.getenv("STORAGE_SPOOL_FLUSH_SECONDS", 15))
+# Direct uploads: lifetime of an upload ticket and the size cap of the local signed upload endpoint
+UPLOAD_TICKET_TTL_SECONDS = int(os.getenv("UPLOAD_TICKET_TTL_SECONDS", 900))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+# Verified JWT claims cached per token until exp
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", 4096))
+# Password hashing (bcrypt cost, changing it rehashes passwords on next login)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# Refresh token sessions
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 4096))
+SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", 300))
+# Access token revocation, reloaded from the database by every process
+TOKEN_REVOCATION_REFRESH_SECONDS = float(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", 30))
+TOKEN_REVOCATION_BLOOM_CAPACITY = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", 100000))
+TOKEN_REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("TOKEN_REVOCATION_BLOOM_ERROR_RATE", 0.001))
+# Rate limiting (token bucket per client ip and route) and admission control for CPU heavy routes
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# Proxies in front of the app that append to X-Forwarded-For, the client ip is counted from the right
+RATE_LIMIT_TRUSTED_PROXY_HOPS = max(int(os.getenv("RATE_LIMIT_TRUSTED_PROXY_HOPS", 1)), 1)
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", 10000))
+RATE_LIMIT_LOGIN_PER_MINUTE = float(os.getenv("RATE_LIMIT_LOGIN_PER_MINUTE", 10))
+RATE_LIMIT_LOGIN_BURST = int(os.getenv("RATE_LIMIT_LOGIN_BURST", 5))
+RATE_LIMIT_FACE_PER_MINUTE = float(os.getenv("RATE_LIMIT_FACE_PER_MINUTE", 30))
+RATE_LIMIT_FACE_BURST = int(os.getenv("RATE_LIMIT_FACE_BURST", 10))
+HEAVY_MAX_CONCURRENCY = int(os.getenv("HEAVY_MAX_CONCURRENCY", 4))
+HEAVY_MAX_QUEUE = int(os.getenv("HEAVY_MAX_QUEUE", 16))
+HEAVY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("HEAVY_QUEUE_TIMEOUT_SECONDS", 10))
+# Database connection pool ("queue" or "null", null opens a connection per checkout for serverless)
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "null" if os.getenv("VERCEL") else "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Async engine for request handlers, derived from DATABASE_URL (asyncpg / aiosqlite) unless set
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+# The async engine's own pool, on top of DB_POOL_SIZE + DB_MAX_OVERFLOW in the same connection budget
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 3))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 2))
+# asyncpg prepared statement cache, 0 behind PgBouncer in transaction mode (Supabase pooler on 6543)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+# Threads running sync service and repository code for async handlers, defaults to the sync pool's connection limit
+SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+# Read replicas for read_only repository methods, comma separated, empty reads from DATABASE_URL
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", 30))
+# SQL instrumentation: per-request X-DB-* headers (off, they are visible to every client), slow query log with the query plan
+DB_QUERY_STATS_HEADERS = os.getenv("DB_QUERY_STATS_HEADERS", "false").lower() == "true"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 500))
+DB_EXPLAIN_SLOW_QUERIES = os.getenv("DB_EXPLAIN_SLOW_QUERIES", "true").lower() == "true"
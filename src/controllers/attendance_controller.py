@@ -1,12 +1,14 @@
 # src/controllers/attendance_controller.py
 from fastapi import Depends, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import List, Optional
 from src.services.attendance_service import AttendanceService
+from src.libs.concurrency import run_sync
 from src.utils.response import handle_response
 from src.utils.message_code import MESSAGE_CODE
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
 
 class AttendanceController:
     @staticmethod
@@ -15,7 +17,7 @@ class AttendanceController:
         latitude: float = Form(...),
         longitude: float = Form(...),
         employee_id: Optional[int] = Form(None),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ):
         image_data = await image.read()
         result = await AttendanceService.checkin(db, image_data, latitude, longitude, employee_id)
@@ -27,7 +29,7 @@ class AttendanceController:
         latitude: float = Form(...),
         longitude: float = Form(...),
         employee_id: Optional[int] = Form(None),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ):
         image_data = await image.read()
         result = await AttendanceService.checkout(db, image_data, latitude, longitude, employee_id)
@@ -38,15 +40,16 @@ class AttendanceController:
         page: int = 1,
         perPage: int = 10,
         search: Optional[str] = None,
-        db: Session = Depends(get_db),
-        current_user: dict = None  # Add this parameter
+        db: AsyncSession = Depends(get_async_db),
+        current_user: dict = None,  # Add this parameter
+        count: Optional[str] = None
     ):
         # Filter by employee_id if not admin
         employee_id = None
         if not current_user.get("is_admin", False):
             employee_id = current_user.get("employee_id")  # atau sesuai nama field di JWT
         
-        result = AttendanceService.get_all_attendance(db, page, perPage, search, employee_id)
+        result = await AttendanceService.get_all_attendance(db, page, perPage, search, employee_id, count)
         return handle_response(
             200,
             MESSAGE_CODE.SUCCESS,
@@ -66,7 +69,7 @@ class AttendanceController:
         if not current_user.get("is_admin", False):
             employee_id = current_user.get("employee_id")
             
-        attendance = AttendanceService.get_attendance_by_id(db, attendance_id, employee_id)
+        attendance = await run_sync(AttendanceService.get_attendance_by_id, db, attendance_id, employee_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Attendance record retrieved successfully", attendance)
 
     @staticmethod
@@ -74,7 +77,7 @@ class AttendanceController:
         attendance_ids: List[int],
         db: Session = Depends(get_db)
     ):
-        result = await AttendanceService.delete_multiple_attendances(db, attendance_ids)
+        result = await run_sync(AttendanceService.delete_multiple_attendances, db, attendance_ids)
         return handle_response(200, MESSAGE_CODE.SUCCESS, f"Successfully deleted {result['deleted_count']} attendance records", result)
 
     # @staticmethod
@@ -3,6 +3,7 @@ from fastapi import Depends
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.services.customer_service import CustomerService
+from src.libs.concurrency import run_sync
 from src.utils.response import handle_response
 from src.utils.message_code import MESSAGE_CODE
 from src.schemas.customer_schema import CustomerCreateSchema, CustomerUpdateSchema
@@ -14,7 +15,7 @@ class CustomerController:
         customer_data: CustomerCreateSchema,
         db: Session = Depends(get_db)
     ):
-        result = await CustomerService.create_customer(db, customer_data)
+        result = await run_sync(CustomerService.create_customer, db, customer_data)
         return handle_response(201, MESSAGE_CODE.CREATED, "Customer created successfully", result)
 
     @staticmethod
@@ -23,7 +24,7 @@ class CustomerController:
         db: Session = Depends(get_db)
     ):
         """Search customer by plate number - untuk scan plat nomor"""
-        result = CustomerService.get_customer_by_plate(db, plate_number)
+        result = await run_sync(CustomerService.get_customer_by_plate, db, plate_number)
         if result:
             return handle_response(200, MESSAGE_CODE.SUCCESS, "Customer found", result)
         else:
@@ -34,9 +35,10 @@ class CustomerController:
         page: int = 1,
         perPage: int = 10,
         search: Optional[str] = None,
+        count: Optional[str] = None,
         db: Session = Depends(get_db)
     ):
-        result = CustomerService.get_all_customers(db, page, perPage, search)
+        result = await run_sync(CustomerService.get_all_customers, db, page, perPage, search, count)
         return handle_response(
             200,
             MESSAGE_CODE.SUCCESS,
@@ -47,7 +49,7 @@ class CustomerController:
 
     @staticmethod
     async def get_customer(customer_id: int, db: Session = Depends(get_db)):
-        result = CustomerService.get_customer_by_id(db, customer_id)
+        result = await run_sync(CustomerService.get_customer_by_id, db, customer_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Customer retrieved successfully", result)
 
     @staticmethod
@@ -56,12 +58,12 @@ class CustomerController:
         customer_data: CustomerUpdateSchema,
         db: Session = Depends(get_db)
     ):
-        result = await CustomerService.update_customer(db, customer_id, customer_data)
+        result = await run_sync(CustomerService.update_customer, db, customer_id, customer_data)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Customer updated successfully", result)
 
     @staticmethod
     async def delete_customer(customer_id: int, db: Session = Depends(get_db)):
-        result = CustomerService.delete_customer(db, customer_id)
+        result = await run_sync(CustomerService.delete_customer, db, customer_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Customer deleted successfully", result)
 
     @staticmethod
@@ -71,7 +73,7 @@ class CustomerController:
         perPage: int = 10,
         db: Session = Depends(get_db)
     ):
-        result = CustomerService.get_customer_transactions(db, customer_id, page, perPage)
+        result = await run_sync(CustomerService.get_customer_transactions, db, customer_id, page, perPage)
         return handle_response(
             200,
             MESSAGE_CODE.SUCCESS,
@@ -1,9 +1,11 @@
 from fastapi import Depends, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from src.services.employee_service import EmployeeService
+from src.libs.concurrency import run_sync
 from src.utils.response import handle_response
 from src.utils.message_code import MESSAGE_CODE
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
 from datetime import date
 from typing import Optional
 
@@ -18,9 +20,10 @@ class EmployeeController:
         page: int = 1, 
         perPage: int = 10, 
         search: str = None, 
+        count: Optional[str] = None,
         db: Session = Depends(get_db)
     ):
-        result = EmployeeService.get_all_employees(db, page, perPage, search)
+        result = await run_sync(EmployeeService.get_all_employees, db, page, perPage, search, count)
         return handle_response(
             200, 
             MESSAGE_CODE.SUCCESS, 
@@ -31,7 +34,7 @@ class EmployeeController:
 
     @staticmethod
     async def get_employee(employee_id: int, db: Session = Depends(get_db)):
-        employee = EmployeeService.get_employee_by_id(db, employee_id)
+        employee = await run_sync(EmployeeService.get_employee_by_id, db, employee_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Employee retrieved successfully", employee)
 
     @staticmethod
@@ -73,11 +76,11 @@ class EmployeeController:
 
     @staticmethod
     async def delete_employee(employee_id: int, db: Session = Depends(get_db)):
-        result = EmployeeService.delete_employee(db, employee_id)
+        result = await run_sync(EmployeeService.delete_employee, db, employee_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Employee deleted successfully", result)
     
     @staticmethod
-    async def verify_face(image: UploadFile = File(...), db: Session = Depends(get_db)):
+    async def verify_face(image: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
         image_data = await image.read()
-        result = EmployeeService.verify_face(db, image_data)
+        result = await EmployeeService.verify_face(db, image_data)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Face verification completed", result)
\ No newline at end of file
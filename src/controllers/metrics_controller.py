@@ -0,0 +1,41 @@
+# src/controllers/metrics_controller.py
+from src.services.metrics_service import MetricsService
+from src.utils.response import handle_response
+from src.utils.message_code import MESSAGE_CODE
+
+class MetricsController:
+    @staticmethod
+    async def get_storage_metrics():
+        """Get storage resilience metrics"""
+        result = await MetricsService.get_storage_metrics()
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Storage metrics retrieved successfully", result)
+
+    @staticmethod
+    async def get_password_hash_metrics():
+        """Get password hashing metrics"""
+        result = MetricsService.get_password_hash_metrics()
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Password hashing metrics retrieved successfully", result)
+
+    @staticmethod
+    async def get_sync_pool_metrics():
+        """Get sync worker pool metrics"""
+        result = MetricsService.get_sync_pool_metrics()
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Sync pool metrics retrieved successfully", result)
+
+    @staticmethod
+    async def get_admission_metrics():
+        """Get rate limiting and admission metrics"""
+        result = MetricsService.get_admission_metrics()
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Admission metrics retrieved successfully", result)
+
+    @staticmethod
+    async def get_database_pool_metrics():
+        """Get database connection pool metrics"""
+        result = MetricsService.get_database_pool_metrics()
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Database pool metrics retrieved successfully", result)
+
+    @staticmethod
+    async def get_query_metrics():
+        """Get per-route SQL query metrics"""
+        result = MetricsService.get_query_metrics()
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Query metrics retrieved successfully", result)
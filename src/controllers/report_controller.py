@@ -1,15 +1,17 @@
 # src/controllers/report_controller.py
 from io import BytesIO
-import pandas as pd
 from fastapi import Depends, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from src.services.report_service import ReportService
+from src.services.export_service import EXCEL_MEDIA_TYPE, ExportService
+from src.libs.concurrency import run_sync
 from src.utils.response import handle_response
 from src.utils.message_code import MESSAGE_CODE
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
 
 class ReportController:
     @staticmethod
@@ -20,7 +22,8 @@ class ReportController:
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         image: Optional[UploadFile] = None,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        image_key: Optional[str] = None
     ):
         """Karyawan buat pending laporan"""
         image_data = None
@@ -28,10 +31,16 @@ class ReportController:
             image_data = await image.read()
         
         result = await ReportService.create_pending_report(
-            db, transaction_id, current_user, description, start_time, end_time, image_data
+            db, transaction_id, current_user, description, start_time, end_time, image_data, image_key
         )
         return handle_response(201, MESSAGE_CODE.CREATED, "Draft report created successfully", result)
 
+    @staticmethod
+    async def create_upload_ticket(current_user: dict, content_type: str):
+        """Upload ticket untuk foto laporan"""
+        result = await ReportService.create_upload_ticket(current_user, content_type)
+        return handle_response(201, MESSAGE_CODE.CREATED, "Upload ticket created successfully", result)
+
     @staticmethod
     async def get_all_reports(
         page: int = 1,
@@ -40,9 +49,11 @@ class ReportController:
         status: Optional[str] = None,
         transaction_id: Optional[int] = None,
         karyawan_id: Optional[int] = None,
-        db: Session = Depends(get_db)
+        sort: Optional[str] = None,
+        count: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
     ):
-        result = ReportService.get_all_reports(db, page, perPage, search, status, transaction_id, karyawan_id)
+        result = await ReportService.get_all_reports(db, page, perPage, search, status, transaction_id, karyawan_id, sort, count)
         return handle_response(
             200,
             MESSAGE_CODE.SUCCESS,
@@ -58,7 +69,7 @@ class ReportController:
         db: Session = Depends(get_db)
     ):
         """Get reports yang butuh approval"""
-        result = ReportService.get_pending_reports(db, page, perPage)
+        result = await run_sync(ReportService.get_pending_reports, db, page, perPage)
         return handle_response(
             200,
             MESSAGE_CODE.SUCCESS,
@@ -69,7 +80,7 @@ class ReportController:
 
     @staticmethod
     async def get_report(report_id: int, db: Session = Depends(get_db)):
-        result = ReportService.get_report_by_id(db, report_id)
+        result = await run_sync(ReportService.get_report_by_id, db, report_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Report retrieved successfully", result)
 
     @staticmethod
@@ -80,7 +91,8 @@ class ReportController:
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         image: Optional[UploadFile] = None,
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        image_key: Optional[str] = None
     ):
         """Update pending report (hanya bisa edit pending/rejected)"""
         image_data = None
@@ -88,7 +100,7 @@ class ReportController:
             image_data = await image.read()
         
         result = await ReportService.update_report(
-            db, report_id, employee_id, description, start_time, end_time, image_data
+            db, report_id, employee_id, description, start_time, end_time, image_data, image_key
         )
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Report updated successfully", result)
 
@@ -109,7 +121,7 @@ class ReportController:
         db: Session = Depends(get_db)
     ):
         """Admin approve report"""
-        result = await ReportService.approve_report(db, report_id, current_user)
+        result = await run_sync(ReportService.approve_report, db, report_id, current_user)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Report approved successfully", result)
 
     @staticmethod
@@ -120,9 +132,30 @@ class ReportController:
         db: Session = Depends(get_db)
     ):
         """Admin reject report dengan alasan"""
-        result = await ReportService.reject_report(db, report_id, current_user, reason)
+        result = await run_sync(ReportService.reject_report, db, report_id, current_user, reason)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Report rejected successfully", result)
 
+    @staticmethod
+    async def approve_reports_batch(
+        report_ids: List[int],
+        current_user: dict,
+        db: Session = Depends(get_db)
+    ):
+        """Admin approve banyak report sekaligus"""
+        result = await run_sync(ReportService.review_reports_batch, db, report_ids, current_user, approve=True)
+        return handle_response(200, MESSAGE_CODE.SUCCESS, f"{result['processed']} reports approved", result)
+
+    @staticmethod
+    async def reject_reports_batch(
+        report_ids: List[int],
+        current_user: dict,
+        reason: str,
+        db: Session = Depends(get_db)
+    ):
+        """Admin reject banyak report sekaligus dengan alasan yang sama"""
+        result = await run_sync(ReportService.review_reports_batch, db, report_ids, current_user, approve=False, reason=reason)
+        return handle_response(200, MESSAGE_CODE.SUCCESS, f"{result['processed']} reports rejected", result)
+
     @staticmethod
     async def delete_report(
         report_id: int,
@@ -130,13 +163,13 @@ class ReportController:
         db: Session = Depends(get_db)
     ):
         """Delete pending report"""
-        result = ReportService.delete_report(db, report_id, employee_id)
+        result = await run_sync(ReportService.delete_report, db, report_id, employee_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Report deleted successfully", result)
 
     @staticmethod
     async def get_transaction_reports(transaction_id: int, db: Session = Depends(get_db)):
         """Get all reports untuk suatu transaksi"""
-        result = ReportService.get_transaction_reports(db, transaction_id)
+        result = await run_sync(ReportService.get_transaction_reports, db, transaction_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Transaction reports retrieved successfully", result)
 
     @staticmethod
@@ -146,46 +179,31 @@ class ReportController:
         status: Optional[str] = None,
         db: Session = Depends(get_db)
     ):
-        reports = ReportService.export_reports_excel(db, start_date, end_date, status)
-        
-        data = []
-        for report in reports:
-            data.append({
-                'ID': report.id,
-                'Transaction ID': report.transaction_id,
-                'Employee ID': report.employee_id,
-                'Employee Name': report.employee.name if report.employee else '',
-                'Description': report.description,
-                'Start Time': report.start_time.strftime('%Y-%m-%d %H:%M:%S') if report.start_time else '',
-                'End Time': report.end_time.strftime('%Y-%m-%d %H:%M:%S') if report.end_time else '',
-                'Status': report.status.value,
-                'Approved By': report.approver.name if report.approver else '',
-                'Approved At': report.approved_at.strftime('%Y-%m-%d %H:%M:%S') if report.approved_at else '',
-                'Rejection Reason': report.rejection_reason or '',
-                'Image URL': report.image_url or '',
-                'Created At': report.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'Updated At': report.updated_at.strftime('%Y-%m-%d %H:%M:%S') if report.updated_at else ''
-            })
-        
-        df = pd.DataFrame(data)
-        
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Reports', index=False)
-        
-        excel_buffer.seek(0)
-        
-        filename = "reports_export"
-        if start_date:
-            filename += f"_from_{start_date}"
-        if end_date:
-            filename += f"_to_{end_date}"
-        if status:
-            filename += f"_status_{status}"
-        filename += ".xlsx"
+        content, filename = await run_sync(ExportService.export_reports_excel, db, start_date, end_date, status)
         
         return StreamingResponse(
-            BytesIO(excel_buffer.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            BytesIO(content),
+            media_type=EXCEL_MEDIA_TYPE,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    async def submit_export_job(
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        status: Optional[str] = None,
+        db: Session = Depends(get_db)
+    ):
+        """Queue export di background"""
+        result = await run_sync(ExportService.submit_report_export, db, start_date, end_date, status)
+        return handle_response(202, MESSAGE_CODE.ACCEPTED, "Export job submitted", result)
+
+    @staticmethod
+    async def get_export_job(job_id: str):
+        result = ExportService.get_job(job_id)
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Export job retrieved successfully", result)
+
+    @staticmethod
+    async def download_export_job(job_id: str):
+        path, filename = ExportService.get_job_artifact(job_id)
+        return FileResponse(path, media_type=EXCEL_MEDIA_TYPE, filename=filename)
@@ -1,12 +1,14 @@
 # src/controllers/transaction_controller.py
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.services.transaction_service import TransactionService
+from src.libs.concurrency import run_sync
 from src.utils.response import handle_response
 from src.utils.message_code import MESSAGE_CODE
 from src.schemas.transaction_schema import TransactionCalculateCostSchema, TransactionCreateSchema, TransactionUpdateSchema, TransactionStatusUpdateSchema
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
 
 class TransactionController:
     @staticmethod
@@ -16,7 +18,7 @@ class TransactionController:
         db: Session = Depends(get_db)
     ):
         """Admin buat transaksi perbaikan baru"""
-        result = await TransactionService.create_transaction(db, transaction_data, current_user.get("user_id"))
+        result = await run_sync(TransactionService.create_transaction, db, transaction_data, current_user.get("user_id"))
         return handle_response(201, MESSAGE_CODE.CREATED, "Transaction created successfully", result)
 
     @staticmethod
@@ -26,12 +28,14 @@ class TransactionController:
         search: Optional[str] = None,
         status: Optional[str] = None,
         current_user: dict = None,
-        db: Session = Depends(get_db)
+        sort: Optional[str] = None,
+        count: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
     ):
         karyawan_id = None
         if not current_user.get("is_admin", False) and search != "selected":
             karyawan_id = current_user.get("karyawan_id")
-        result = TransactionService.get_all_transactions(db, page, perPage, search, status, karyawan_id)
+        result = await TransactionService.get_all_transactions(db, page, perPage, search, status, karyawan_id, sort, count)
         return handle_response(
             200,
             MESSAGE_CODE.SUCCESS,
@@ -42,7 +46,7 @@ class TransactionController:
 
     @staticmethod
     async def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
-        result = TransactionService.get_transaction_by_id(db, transaction_id)
+        result = await run_sync(TransactionService.get_transaction_by_id, db, transaction_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Transaction retrieved successfully", result)
 
     @staticmethod
@@ -52,7 +56,7 @@ class TransactionController:
         current_user: dict,
         db: Session = Depends(get_db)
     ):
-        result = await TransactionService.update_transaction(db, transaction_id, transaction_data, current_user.get("user_id"))
+        result = await run_sync(TransactionService.update_transaction, db, transaction_id, transaction_data, current_user.get("user_id"))
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Transaction updated successfully", result)
 
     @staticmethod
@@ -62,9 +66,7 @@ class TransactionController:
         current_user: dict,
         db: Session = Depends(get_db)
     ):
-        result = await TransactionService.update_transaction_status(
-            db, transaction_id, status_data, current_user.get("user_id")
-        )
+        result = await run_sync(TransactionService.update_transaction_status, db, transaction_id, status_data, current_user.get("user_id"))
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Transaction status updated successfully", result)
 
     @staticmethod
@@ -74,7 +76,7 @@ class TransactionController:
         db: Session = Depends(get_db)
     ):
         """Karyawan mulai pengerjaan"""
-        result = await TransactionService.start_work(db, transaction_id, current_user.get("user_id"))
+        result = await run_sync(TransactionService.start_work, db, transaction_id, current_user.get("user_id"))
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Work started successfully", result)
 
     @staticmethod
@@ -85,14 +87,14 @@ class TransactionController:
         db: Session = Depends(get_db)
     ):
         """Admin input total cost untuk transaksi"""
-        result = await TransactionService.calculate_total_cost(db, transaction_id, cost_data.total_cost, current_user)
+        result = await run_sync(TransactionService.calculate_total_cost, db, transaction_id, cost_data.total_cost, current_user)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Total cost calculated successfully", result)
 
 
     @staticmethod
     async def finalize_transaction(transaction_id: int, current_user: dict, db: Session = Depends(get_db)):
         """Admin finalize transaction ke status selesai"""
-        result = await TransactionService.finalize_transaction(db, transaction_id, current_user)
+        result = await run_sync(TransactionService.finalize_transaction, db, transaction_id, current_user)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Transaction finalized successfully", result)
 
     @staticmethod
@@ -101,10 +103,10 @@ class TransactionController:
         current_user: dict,
         db: Session = Depends(get_db)
     ):
-        result = await TransactionService.mark_as_paid(db, transaction_id, current_user.get("user_id"))
+        result = await run_sync(TransactionService.mark_as_paid, db, transaction_id, current_user.get("user_id"))
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Transaction marked as paid successfully", result)
 
     @staticmethod
     async def get_transaction_history(transaction_id: int, db: Session = Depends(get_db)):
-        result = TransactionService.get_transaction_history(db, transaction_id)
+        result = await run_sync(TransactionService.get_transaction_history, db, transaction_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Transaction history retrieved successfully", result)
\ No newline at end of file
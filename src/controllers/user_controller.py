@@ -1,15 +1,17 @@
 from fastapi import Depends
+from typing import Optional
 from sqlalchemy.orm import Session
-from src.schemas.user_schema import UserRegisterSchema, UserLoginSchema, UserResetPasswordSchema, UserUpdateSchema
+from src.schemas.user_schema import UserRegisterSchema, UserLoginSchema, UserRefreshTokenSchema, UserResetPasswordSchema, UserUpdateSchema
 from src.services.user_service import UserService
+from src.libs.concurrency import run_sync
 from src.utils.response import handle_response
 from src.utils.message_code import MESSAGE_CODE
 from src.config.database import get_db
 
 class UserController:
     @staticmethod
-    def register(user_data: UserRegisterSchema, is_admin: bool, db: Session = Depends(get_db)):
-        user = UserService.register_user(db, user_data.username, user_data.email, user_data.password, user_data.is_admin, user_data.key_admin, is_admin)
+    async def register(user_data: UserRegisterSchema, is_admin: bool, db: Session = Depends(get_db)):
+        user = await UserService.register_user(db, user_data.username, user_data.email, user_data.password, user_data.is_admin, user_data.key_admin, is_admin)
         return handle_response(201, MESSAGE_CODE.CREATED, "User registered successfully", {
             "id": user.id,
             "username": user.username,
@@ -18,10 +20,12 @@ class UserController:
         })
 
     @staticmethod
-    def login(user_data: UserLoginSchema, db: Session = Depends(get_db)):
-        result = UserService.authenticate_user(db, user_data.login, user_data.password)
+    async def login(user_data: UserLoginSchema, db: Session = Depends(get_db)):
+        result = await UserService.authenticate_user(db, user_data.login, user_data.password)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Login successful", {
             "access_token": result["access_token"],
+            "refresh_token": result["refresh_token"],
+            "refresh_expires_at": result["refresh_expires_at"],
             # "user": {
             #     "id": result["user"].id,
             #     "username": result["user"].username,
@@ -31,6 +35,16 @@ class UserController:
             # }
         })
         
+    @staticmethod
+    async def refresh(refresh_data: UserRefreshTokenSchema, db: Session = Depends(get_db)):
+        result = await run_sync(UserService.refresh_session, db, refresh_data.refresh_token)
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Token refreshed successfully", result)
+
+    @staticmethod
+    async def logout(refresh_data: UserRefreshTokenSchema, current_user: Optional[dict] = None, db: Session = Depends(get_db)):
+        result = await run_sync(UserService.logout, db, refresh_data.refresh_token, current_user)
+        return handle_response(200, MESSAGE_CODE.SUCCESS, "Logged out successfully", result)
+
     @staticmethod
     async def get_all_users(
         page: int = 1,
@@ -38,7 +52,7 @@ class UserController:
         search: str = None,
         db: Session = Depends(get_db)
     ):
-        result = UserService.get_all_users(db, page, perPage, search)
+        result = await run_sync(UserService.get_all_users, db, page, perPage, search)
         return handle_response(
             200,
             MESSAGE_CODE.SUCCESS,
@@ -49,12 +63,12 @@ class UserController:
     
     @staticmethod
     async def get_user(user_id: int, db: Session = Depends(get_db)):
-        user = UserService.get_user_by_id(db, user_id)
+        user = await run_sync(UserService.get_user_by_id, db, user_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "User retrieved successfully", user)
     
     @staticmethod
     async def update_user(user_id: int, user_data: UserUpdateSchema, db: Session = Depends(get_db)):
-        user = UserService.update_user(
+        user = await run_sync(UserService.update_user,
             db, user_id, user_data.username, user_data.email, user_data.is_admin
         )
         return handle_response(200, MESSAGE_CODE.SUCCESS, "User updated successfully", user)
@@ -64,10 +78,10 @@ class UserController:
         # Validate passwords match
         password_data.validate_passwords_match()
         
-        result = UserService.reset_password(db, user_id, password_data.password)
+        result = await UserService.reset_password(db, user_id, password_data.password)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "Password reset successfully", result)
     
     @staticmethod
     async def delete_user(user_id: int, db: Session = Depends(get_db)):
-        result = UserService.delete_user(db, user_id)
+        result = await run_sync(UserService.delete_user, db, user_id)
         return handle_response(200, MESSAGE_CODE.SUCCESS, "User deleted successfully", result)
\ No newline at end of file
@@ -0,0 +1,78 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+from src.config.settings import SYNC_WORKERS
+
+T = TypeVar("T")
+
+class InstrumentedExecutor:
+    """Thread pool that records how long jobs queue and run"""
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._stats = {"jobs": 0, "in_flight": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0, "run_ms_total": 0.0}
+
+    def _timed(self, submitted_at: float, func: Callable[[], T]) -> T:
+        started_at = time.perf_counter()
+        try:
+            return func()
+        finally:
+            wait_ms = (started_at - submitted_at) * 1000
+            with self._lock:
+                self._stats["jobs"] += 1
+                self._stats["in_flight"] -= 1
+                self._stats["wait_ms_total"] += wait_ms
+                self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], wait_ms)
+                self._stats["run_ms_total"] += (time.perf_counter() - started_at) * 1000
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Await func(*args, **kwargs) on the pool, in a copy of the caller's context"""
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        with self._lock:
+            self._stats["in_flight"] += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, self._timed, time.perf_counter(), call
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # A started thread cannot be stopped and may still be using the
+            # request's session, the caller closes it only once the thread is done
+            while not future.done():
+                try:
+                    await asyncio.wait({future})
+                except asyncio.CancelledError:
+                    continue
+            if not future.cancelled():
+                future.exception()
+            raise
+
+    def metrics(self) -> dict:
+        with self._lock:
+            jobs = self._stats["jobs"]
+            return {
+                "workers": self.max_workers,
+                "jobs": jobs,
+                "in_flight": self._stats["in_flight"],
+                "avg_wait_ms": round(self._stats["wait_ms_total"] / jobs, 2) if jobs else 0.0,
+                "max_wait_ms": round(self._stats["wait_ms_max"], 2),
+                "avg_run_ms": round(self._stats["run_ms_total"] / jobs, 2) if jobs else 0.0,
+            }
+
+# Sized to the sync engine's pool, more threads would only queue for a connection
+sync_executor = InstrumentedExecutor(SYNC_WORKERS, "sync")
+
+async def run_sync(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run blocking service or repository code off the event loop.
+
+    The call sees the request's context variables, and a request's
+    session is still only used by one thread at a time because the
+    handler waits for the result.
+    """
+    return await sync_executor.run(func, *args, **kwargs)
@@ -0,0 +1,102 @@
+import io
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+from PIL import Image, ImageOps
+from src.config.settings import (
+    IMAGE_MAX_DIMENSION_ATTENDANCE, IMAGE_MAX_DIMENSION_EMPLOYEE, IMAGE_MAX_DIMENSION_REPORT,
+    IMAGE_OUTPUT_FORMAT, IMAGE_QUALITY, IMAGE_VARIANT_MD_SIZE, IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_SM_SIZE, IMAGE_WORKERS
+)
+
+# Extensions an uploaded original can be stored with
+IMAGE_EXTENSIONS = ("jpeg", "jpg", "png", "webp")
+
+VARIANT_SM = "sm"
+VARIANT_MD = "md"
+VARIANT_SIZES = {VARIANT_SM: IMAGE_VARIANT_SM_SIZE, VARIANT_MD: IMAGE_VARIANT_MD_SIZE}
+
+# Upload profiles, each capping the stored resolution of one kind of photo
+PROFILE_ATTENDANCE = "attendance"
+PROFILE_REPORT = "report"
+PROFILE_EMPLOYEE = "employee"
+PROFILE_MAX_DIMENSIONS = {
+    PROFILE_ATTENDANCE: IMAGE_MAX_DIMENSION_ATTENDANCE,
+    PROFILE_REPORT: IMAGE_MAX_DIMENSION_REPORT,
+    PROFILE_EMPLOYEE: IMAGE_MAX_DIMENSION_EMPLOYEE,
+}
+
+# Variants are only built for uploads named after their content hash
+# (StorageBackend.object_name), older uuid names and upload tickets have none
+CONTENT_HASH_NAME = re.compile(r"[0-9a-f]{64}")
+
+# Image work is CPU bound, keep it off the event loop and bounded
+image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+
+def variant_name(image_name: str, variant: str) -> str:
+    """abc.jpeg -> abc_sm.webp, stored next to the original"""
+    return f"{os.path.splitext(image_name)[0]}_{variant}.webp"
+
+def has_variants(image_url: Optional[str]) -> bool:
+    if not image_url:
+        return False
+    stem = os.path.splitext(image_url.rsplit("/", 1)[-1])[0]
+    return CONTENT_HASH_NAME.fullmatch(stem) is not None
+
+def variant_url(image_url: Optional[str], variant: str) -> Optional[str]:
+    """Url of a variant, None when the image never got variants"""
+    if not has_variants(image_url):
+        return None
+    base, _ = os.path.splitext(image_url)
+    return f"{base}_{variant}.webp"
+
+def normalize_image(image_data: bytes, profile: str) -> Tuple[bytes, str]:
+    """
+    Cap the resolution of an uploaded photo and re-encode it.
+
+    EXIF (including GPS) is dropped because it is never written back.
+    Returns (content, extension).
+    """
+    max_dimension = PROFILE_MAX_DIMENSIONS[profile]
+    output_format = "JPEG" if IMAGE_OUTPUT_FORMAT in ("jpeg", "jpg") else "WEBP"
+
+    with Image.open(io.BytesIO(image_data)) as original:
+        # Let the JPEG decoder downscale while decoding instead of after
+        original.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(original)
+        if output_format == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if output_format == "JPEG":
+            image.save(buffer, format="JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+        else:
+            image.save(buffer, format="WEBP", quality=IMAGE_QUALITY, method=4)
+        return buffer.getvalue(), output_format.lower()
+
+def build_variants(image_data: bytes) -> Dict[str, bytes]:
+    """Downscaled WebP copies of an image, keyed by variant"""
+    with Image.open(io.BytesIO(image_data)) as original:
+        # Phone photos are often stored sideways with an EXIF rotation
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+
+        variants = {}
+        for variant, size in VARIANT_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format="WEBP", quality=IMAGE_VARIANT_QUALITY, method=4)
+            variants[variant] = buffer.getvalue()
+        return variants
+
+def attach_variant_urls(items: Iterable, field: str = "image_url", prefix: str = ""):
+    """Set <prefix>thumbnail_url (sm) and <prefix>preview_url (md) next to an image url field, None without variants"""
+    for item in items:
+        image_url = getattr(item, field, None)
+        setattr(item, f"{prefix}thumbnail_url", variant_url(image_url, VARIANT_SM))
+        setattr(item, f"{prefix}preview_url", variant_url(image_url, VARIANT_MD))
+    return items
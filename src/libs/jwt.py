@@ -1,9 +1,23 @@
+import hashlib
+import secrets
+import uuid
 from datetime import datetime, timedelta, timezone
+from typing import Tuple
 from jose import jwt
 from src.config.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    # jti lets a single token be revoked before it expires
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def hash_refresh_token(token: str) -> str:
+    """Only this digest is stored, a leaked sessions table cannot be replayed"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def create_refresh_token() -> Tuple[str, str]:
+    """Opaque refresh token and its digest"""
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
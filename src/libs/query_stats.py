@@ -0,0 +1,117 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.config.settings import DB_EXPLAIN_SLOW_QUERIES, DB_SLOW_QUERY_MS
+
+# Queries of the current request. The dict is shared, not copied, with
+# run_sync threads and the greenlets of the async engine, so their
+# queries add up here too.
+request_query_stats: ContextVar[Optional[dict]] = ContextVar("request_query_stats", default=None)
+
+_EXPLAIN_PREFIXES = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+def new_request_stats(path: str) -> dict:
+    return {"path": path, "count": 0, "time_ms": 0.0, "slow": 0}
+
+class RouteQueryStats:
+    """Query count and database time per route since start"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, dict] = {}
+
+    def record(self, route: str, stats: dict):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0, "queries": 0, "max_queries": 0, "db_time_ms": 0.0, "max_db_time_ms": 0.0, "slow_queries": 0
+                }
+            entry["requests"] += 1
+            entry["queries"] += stats["count"]
+            entry["max_queries"] = max(entry["max_queries"], stats["count"])
+            entry["db_time_ms"] += stats["time_ms"]
+            entry["max_db_time_ms"] = max(entry["max_db_time_ms"], stats["time_ms"])
+            entry["slow_queries"] += stats["slow"]
+
+    def snapshot(self) -> list:
+        """Routes by total database time, the most expensive first"""
+        with self._lock:
+            routes = [(route, dict(entry)) for route, entry in self._routes.items()]
+        return sorted(
+            (
+                {
+                    "route": route,
+                    "requests": entry["requests"],
+                    "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                    "max_queries": entry["max_queries"],
+                    "avg_db_time_ms": round(entry["db_time_ms"] / entry["requests"], 2),
+                    "max_db_time_ms": round(entry["max_db_time_ms"], 2),
+                    "total_db_time_ms": round(entry["db_time_ms"], 2),
+                    "slow_queries": entry["slow_queries"],
+                }
+                for route, entry in routes
+            ),
+            key=lambda item: item["total_db_time_ms"],
+            reverse=True
+        )
+
+route_query_stats = RouteQueryStats()
+
+def _query_plan(conn, statement: str, parameters) -> Optional[str]:
+    prefix = _EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if not prefix or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+
+    # A raw cursor, so the plan query is neither timed nor logged itself
+    cursor = conn.connection.cursor()
+    savepoint = conn.dialect.name == "postgresql"
+    try:
+        # A failed EXPLAIN must not abort the request's transaction on PostgreSQL
+        if savepoint:
+            cursor.execute("SAVEPOINT query_plan")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        except Exception as e:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_plan")
+            plan = f"plan unavailable: {str(e)}"
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT query_plan")
+        return plan
+    finally:
+        cursor.close()
+
+def _log_slow_query(conn, statement: str, parameters, executemany: bool, elapsed_ms: float, stats: Optional[dict]):
+    plan = None
+    if DB_EXPLAIN_SLOW_QUERIES and not executemany:
+        try:
+            plan = _query_plan(conn, statement, parameters)
+        except Exception as e:
+            plan = f"plan unavailable: {str(e)}"
+    path = stats["path"] if stats else "-"
+    # Parameters are left out, they may hold personal data
+    print(f"Warning: Slow query {elapsed_ms:.1f} ms on {path}: {statement}" + (f"\n{plan}" if plan else ""))
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started_at = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "query_started_at", None)
+    if started_at is None:
+        return
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats["count"] += 1
+        stats["time_ms"] += elapsed_ms
+    if elapsed_ms >= DB_SLOW_QUERY_MS:
+        if stats is not None:
+            stats["slow"] += 1
+        _log_slow_query(conn, statement, parameters, executemany, elapsed_ms, stats)
@@ -0,0 +1,128 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from typing import Optional
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+from src.config.database import AsyncSessionLocal, SessionLocal, async_replica_engines, replica_engines
+from src.config.settings import DB_REPLICA_RETRY_SECONDS
+
+# Connection trouble and replica-side cancellations, worth a retry on the primary
+REPLICA_ERRORS = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError, asyncio.TimeoutError)
+
+class ReplicaSet:
+    """Round robin over the replicas, one that failed sits out `retry_seconds`"""
+    def __init__(self, engines: list, retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._down_until = [0.0] * len(engines)
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self.metrics: Counter = Counter()
+
+    def label(self, index: int) -> str:
+        url = self.engines[index].url
+        return url.host or url.database
+
+    def pick(self) -> Optional[int]:
+        now = time.monotonic()
+        healthy = [index for index, until in enumerate(self._down_until) if until <= now]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def mark_failed(self, index: int):
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def count(self, key: str):
+        with self._lock:
+            self.metrics[key] += 1
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            counters = dict(self.metrics)
+        return {
+            "replicas": [
+                {"replica": self.label(index), "healthy": until <= now}
+                for index, until in enumerate(self._down_until)
+            ],
+            "counters": counters,
+        }
+
+replicas = ReplicaSet(replica_engines, DB_REPLICA_RETRY_SECONDS)
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement(orm_execute_state):
+    # Bulk UPDATE/DELETE and raw SQL bypass the flush
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+def _replica_for(session: Session) -> Optional[int]:
+    if not replicas.engines:
+        return None
+    if session.info.get("wrote") or session.new or session.dirty or session.deleted:
+        # The replica may not have this request's writes yet
+        replicas.count("primary_after_write")
+        return None
+    index = replicas.pick()
+    if index is None:
+        replicas.count("primary_replicas_down")
+    return index
+
+def _replica_failed(index: int, error: Exception):
+    replicas.mark_failed(index)
+    replicas.count("fallbacks")
+    print(f"Warning: Replica {replicas.label(index)} failed, reading from primary: {str(error)}")
+
+def read_only(func):
+    """
+    Run a repository read on a read replica when one is configured.
+
+    The first argument must be the request session (sync or async). The
+    read gets its own replica session, so what it returns is detached and
+    only eagerly loaded attributes can be used. Once the request session
+    has written, reads stay on it to see their own writes. A replica that
+    fails is skipped for DB_REPLICA_RETRY_SECONDS and the read is repeated
+    on the request session.
+    """
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(db, *args, **kwargs):
+            index = _replica_for(db.sync_session)
+            if index is None:
+                return await func(db, *args, **kwargs)
+            try:
+                async with AsyncSessionLocal(bind=async_replica_engines[index]) as replica_db:
+                    result = await func(replica_db, *args, **kwargs)
+            except REPLICA_ERRORS as e:
+                _replica_failed(index, e)
+                return await func(db, *args, **kwargs)
+            replicas.count("replica_reads")
+            return result
+        return async_wrapper
+
+    @wraps(func)
+    def sync_wrapper(db, *args, **kwargs):
+        index = _replica_for(db)
+        if index is None:
+            return func(db, *args, **kwargs)
+        try:
+            with SessionLocal(bind=replica_engines[index]) as replica_db:
+                result = func(replica_db, *args, **kwargs)
+        except REPLICA_ERRORS as e:
+            _replica_failed(index, e)
+            return func(db, *args, **kwargs)
+        replicas.count("replica_reads")
+        return result
+    return sync_wrapper
+
+def replica_metrics() -> dict:
+    return {"configured": len(replicas.engines), **replicas.snapshot()}
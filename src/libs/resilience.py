@@ -0,0 +1,117 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Optional, TypeVar
+import httpx
+
+T = TypeVar("T")
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency that is known to be failing"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row calls fail fast for
+    `reset_seconds`, then a single trial call decides whether to close again.
+    """
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return BREAKER_CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return BREAKER_HALF_OPEN
+        return BREAKER_OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == BREAKER_CLOSED:
+            return True
+        if state == BREAKER_HALF_OPEN and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """The trial was interrupted without an answer, the next call may try again"""
+        self.trial_running = False
+
+    def snapshot(self) -> dict:
+        return {"name": self.name, "state": self.state, "consecutive_failures": self.failures}
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Network trouble, timeouts and 5xx/429 answers are worth retrying"""
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError, OSError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return False
+
+async def call_with_retry(
+    operation: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    metrics: Counter,
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    attempt_timeout: float,
+) -> T:
+    """
+    Run `operation` through the breaker with bounded retries.
+
+    Backoff uses full jitter (a random delay up to base * 2^n) so callers
+    that failed together do not retry together. Non transient errors are
+    raised at once and do not count against the breaker.
+    """
+    for attempt in range(attempts):
+        if not breaker.allow():
+            metrics["rejected_open_circuit"] += 1
+            raise CircuitOpenError(f"{breaker.name} circuit is open")
+
+        metrics["attempts"] += 1
+        try:
+            result = await asyncio.wait_for(operation(), attempt_timeout)
+        except Exception as e:
+            if not is_transient_error(e):
+                breaker.record_success()
+                metrics["failed"] += 1
+                raise
+            breaker.record_failure()
+            if attempt == attempts - 1:
+                metrics["failed"] += 1
+                raise
+            metrics["retries"] += 1
+            await asyncio.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+        except BaseException:
+            # Cancelled mid call, a half-open breaker must not wait forever for this trial
+            breaker.release_trial()
+            raise
+        else:
+            breaker.record_success()
+            metrics["succeeded"] += 1
+            return result
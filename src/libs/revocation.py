@@ -0,0 +1,84 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Iterable
+from src.config.settings import ACCESS_TOKEN_EXPIRE_MINUTES, TOKEN_REVOCATION_BLOOM_CAPACITY, TOKEN_REVOCATION_BLOOM_ERROR_RATE
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, no false negatives"""
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        # Double hashing: k positions from one 128 bit digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+class RevocationList:
+    """
+    Revoked token ids of this process.
+
+    The Bloom filter answers the common not-revoked case without touching
+    the exact set, which only confirms filter hits. Both are swapped
+    together when the list is reloaded from the database.
+
+    A jti added here may not be committed yet when a reload reads the
+    table, so it stays pending and is carried over every reload until a
+    snapshot contains it, or until `pending_ttl_seconds` has passed and
+    the token has expired anyway (its revocation was rolled back).
+    """
+    def __init__(self, capacity: int, error_rate: float, pending_ttl_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.pending_ttl_seconds = pending_ttl_seconds
+        # Writers only, a lost bit would be a false negative. Readers need no lock.
+        self._write_lock = threading.Lock()
+        self._pending: Dict[str, float] = {}
+        self.replace([])
+
+    def replace(self, jtis: Iterable[str]):
+        jtis = set(jtis)
+        # Keep the false positive rate when the list outgrows the configured capacity,
+        # with room for the pending jtis merged in below
+        bloom = BloomFilter(max(self.capacity, 2 * (len(jtis) + len(self._pending))), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._write_lock:
+            expired_before = time.monotonic() - self.pending_ttl_seconds
+            self._pending = {
+                jti: added_at for jti, added_at in self._pending.items()
+                if jti not in jtis and added_at > expired_before
+            }
+            for jti in self._pending:
+                bloom.add(jti)
+                jtis.add(jti)
+            self._bloom, self._revoked = bloom, jtis
+
+    def add(self, jti: str):
+        with self._write_lock:
+            self._bloom.add(jti)
+            self._revoked.add(jti)
+            self._pending[jti] = time.monotonic()
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._bloom and jti in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+revocation_list = RevocationList(
+    TOKEN_REVOCATION_BLOOM_CAPACITY, TOKEN_REVOCATION_BLOOM_ERROR_RATE, int(ACCESS_TOKEN_EXPIRE_MINUTES) * 60
+)
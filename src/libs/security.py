@@ -1,9 +1,31 @@
+from typing import Optional, Tuple
 from passlib.context import CryptContext
+from src.config.settings import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+from src.libs.concurrency import InstrumentedExecutor
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with any other cost are flagged for rehashing on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+# bcrypt is deliberately slow, a small dedicated pool keeps a login burst
+# from taking over the event loop and the request threadpool
+password_executor = InstrumentedExecutor(PASSWORD_HASH_WORKERS, "password")
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await password_executor.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash), new_hash is set when the stored hash uses an outdated cost"""
+    return await password_executor.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def password_hash_metrics() -> dict:
+    """Queue wait and run time of the password pool since start"""
+    return {"rounds": BCRYPT_ROUNDS, **password_executor.metrics()}
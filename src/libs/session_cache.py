@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from src.config.settings import SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS
+
+class SessionCache:
+    """
+    Active refresh sessions by token hash, holding the user's token claims.
+
+    A refresh then needs no user lookup. The cache never authorises on its
+    own: the session row is still rotated in the database, entries only
+    save the read. The TTL bounds how stale cached claims can get when a
+    user is changed in another process.
+    """
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Refresh and logout run on the sync worker threads
+        self._lock = threading.Lock()
+
+    def put(self, token_hash: str, user_id: int, family_id: str, sub: dict):
+        with self._lock:
+            self._entries[token_hash] = {
+                "user_id": user_id, "family_id": family_id, "sub": sub,
+                "expires_at": time.monotonic() + self.ttl_seconds
+            }
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        """A refresh token is used once, so reading an entry removes it"""
+        with self._lock:
+            entry = self._entries.pop(token_hash, None)
+        if entry is None or entry["expires_at"] < time.monotonic():
+            return None
+        return entry
+
+    def forget_user(self, user_id: int):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry["user_id"] == user_id]:
+                del self._entries[key]
+
+    def forget_family(self, family_id: str):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry["family_id"] == family_id]:
+                del self._entries[key]
+
+session_cache = SessionCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS)
@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import httpx
+from src.config.settings import (
+    BUCKET_FACES, STORAGE_BACKEND, STORAGE_CONNECT_TIMEOUT_SECONDS, STORAGE_LOCAL_BASE_URL, STORAGE_LOCAL_DIR,
+    SECRET_KEY, STORAGE_MAX_CONCURRENCY, STORAGE_MAX_CONNECTIONS, STORAGE_TIMEOUT_SECONDS, SUPABASE_KEY, SUPABASE_URL,
+    UPLOAD_TICKET_TTL_SECONDS
+)
+
+# Older Pythons do not know webp, the static route and upload checks need it
+mimetypes.add_type("image/webp", ".webp")
+
+STORAGE_SUPABASE = "supabase"
+STORAGE_LOCAL = "local"
+
+# Public object urls look the same for every backend
+PUBLIC_PATH_PREFIX = "/storage/v1/object/public"
+SIGNED_UPLOAD_PATH_PREFIX = "/storage/v1/object/upload/sign"
+
+def content_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=32).hexdigest()
+
+def signature(*parts) -> str:
+    """HMAC of the given parts with the app secret"""
+    message = ":".join(str(part) for part in parts).encode()
+    return hmac.new((SECRET_KEY or "").encode(), message, hashlib.sha256).hexdigest()
+
+class StorageBackend:
+    """Object storage used for every uploaded image"""
+    bucket: str
+
+    def object_name(self, content: bytes, extension: str) -> str:
+        """Objects are named after their content, identical bytes map to one object"""
+        return f"{content_hash(content)}.{extension}"
+
+    async def upload(self, path: str, content: bytes, content_type: str):
+        raise NotImplementedError
+
+    async def remove(self, paths: List[str]):
+        raise NotImplementedError
+
+    async def list_objects(self) -> List[Tuple[str, datetime]]:
+        """(path, created_at) of every object in the bucket"""
+        raise NotImplementedError
+
+    async def exists(self, path: str) -> bool:
+        raise NotImplementedError
+
+    async def read_head(self, path: str, size: int) -> Optional[Tuple[bytes, str]]:
+        """First bytes and stored content type of an object, None when it does not exist"""
+        raise NotImplementedError
+
+    async def create_signed_upload_url(self, path: str) -> str:
+        """Url a client can PUT the object to directly, without credentials"""
+        raise NotImplementedError
+
+    def public_url(self, path: str) -> str:
+        raise NotImplementedError
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        """Object path of a public url of this bucket, None for foreign urls"""
+        marker = f"/{self.bucket}/"
+        if not url or marker not in url:
+            return None
+        return url.split(marker)[-1]
+
+    async def aclose(self):
+        pass
+
+class SupabaseStorage(StorageBackend):
+    """
+    Supabase Storage over its REST API.
+
+    One keep-alive connection pool is shared by all requests and a semaphore
+    bounds how many transfers run at once, so concurrent check-ins overlap
+    their uploads without opening unbounded connections.
+    """
+    def __init__(self, url: str, key: str, bucket: str):
+        self.url = url.rstrip("/") if url else ""
+        self.key = key
+        self.bucket = bucket
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=f"{self.url}/storage/v1",
+                headers={"Authorization": f"Bearer {self.key}", "apikey": self.key},
+                limits=httpx.Limits(max_connections=STORAGE_MAX_CONNECTIONS, max_keepalive_connections=STORAGE_MAX_CONNECTIONS),
+                timeout=httpx.Timeout(STORAGE_TIMEOUT_SECONDS, connect=STORAGE_CONNECT_TIMEOUT_SECONDS),
+            )
+            self._semaphore = asyncio.Semaphore(STORAGE_MAX_CONCURRENCY)
+        return self._client
+
+    async def upload(self, path: str, content: bytes, content_type: str):
+        client = self._get_client()
+        async with self._semaphore:
+            response = await client.post(
+                f"/object/{self.bucket}/{path}",
+                content=content,
+                headers={"Content-Type": content_type, "x-upsert": "true"},
+            )
+        response.raise_for_status()
+
+    async def remove(self, paths: List[str]):
+        if not paths:
+            return
+        client = self._get_client()
+        async with self._semaphore:
+            response = await client.request("DELETE", f"/object/{self.bucket}", json={"prefixes": paths})
+        response.raise_for_status()
+
+    async def list_objects(self) -> List[Tuple[str, datetime]]:
+        client = self._get_client()
+        objects = []
+        offset, limit = 0, 1000
+        while True:
+            async with self._semaphore:
+                response = await client.post(f"/object/list/{self.bucket}", json={
+                    "prefix": "", "limit": limit, "offset": offset,
+                    "sortBy": {"column": "name", "order": "asc"}
+                })
+            response.raise_for_status()
+            items = response.json()
+            # Folders come back without an id
+            objects.extend(
+                (item["name"], datetime.fromisoformat(item["created_at"].replace("Z", "+00:00")))
+                for item in items if item.get("id")
+            )
+            if len(items) < limit:
+                return objects
+            offset += limit
+
+    async def exists(self, path: str) -> bool:
+        client = self._get_client()
+        async with self._semaphore:
+            response = await client.head(f"/object/{self.bucket}/{path}")
+        if response.status_code in (400, 404):
+            return False
+        response.raise_for_status()
+        return True
+
+    async def read_head(self, path: str, size: int) -> Optional[Tuple[bytes, str]]:
+        client = self._get_client()
+        async with self._semaphore:
+            # Range keeps it to the first bytes, the stream is cut off in case it is ignored
+            async with client.stream("GET", f"/object/{self.bucket}/{path}", headers={"Range": f"bytes=0-{size - 1}"}) as response:
+                if response.status_code in (400, 404):
+                    return None
+                response.raise_for_status()
+                content = b""
+                async for chunk in response.aiter_bytes():
+                    content += chunk
+                    if len(content) >= size:
+                        break
+                return content[:size], response.headers.get("content-type", "")
+
+    async def create_signed_upload_url(self, path: str) -> str:
+        client = self._get_client()
+        async with self._semaphore:
+            response = await client.post(f"/object/upload/sign/{self.bucket}/{path}")
+        response.raise_for_status()
+        # Relative to the storage api, carries its own token
+        return f"{self.url}/storage/v1{response.json()['url']}"
+
+    def public_url(self, path: str) -> str:
+        return f"{self.url}{PUBLIC_PATH_PREFIX}/{self.bucket}/{path}"
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class LocalStorage(StorageBackend):
+    """
+    Filesystem stand-in for Supabase, for offline runs and load tests.
+
+    Objects are served by the static route mounted in main.py under the
+    same public url layout.
+    """
+    def __init__(self, root: str, base_url: str, bucket: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        self.bucket = bucket
+
+    @property
+    def bucket_dir(self) -> str:
+        return os.path.join(self.root, self.bucket)
+
+    def _file_path(self, path: str) -> str:
+        file_path = os.path.realpath(os.path.join(self.bucket_dir, path))
+        if not file_path.startswith(os.path.realpath(self.bucket_dir) + os.sep):
+            raise ValueError(f"Invalid object path: {path}")
+        return file_path
+
+    def _write(self, path: str, content: bytes):
+        file_path = self._file_path(path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Readers never see a partially written file
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+
+    def _remove(self, paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(self._file_path(path))
+            except FileNotFoundError:
+                continue
+
+    async def upload(self, path: str, content: bytes, content_type: str):
+        await asyncio.to_thread(self._write, path, content)
+
+    async def remove(self, paths: List[str]):
+        await asyncio.to_thread(self._remove, paths)
+
+    def _list(self) -> List[Tuple[str, datetime]]:
+        if not os.path.isdir(self.bucket_dir):
+            return []
+        return [
+            (entry.name, datetime.fromtimestamp(entry.stat().st_mtime, timezone.utc))
+            for entry in os.scandir(self.bucket_dir)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+
+    async def list_objects(self) -> List[Tuple[str, datetime]]:
+        return await asyncio.to_thread(self._list)
+
+    async def exists(self, path: str) -> bool:
+        return await asyncio.to_thread(os.path.isfile, self._file_path(path))
+
+    def _read_head(self, path: str, size: int) -> Optional[Tuple[bytes, str]]:
+        try:
+            with open(self._file_path(path), "rb") as f:
+                prefix = f.read(size)
+        except FileNotFoundError:
+            return None
+        # The static route serves files by their extension
+        return prefix, mimetypes.guess_type(path)[0] or ""
+
+    async def read_head(self, path: str, size: int) -> Optional[Tuple[bytes, str]]:
+        return await asyncio.to_thread(self._read_head, path, size)
+
+    async def create_signed_upload_url(self, path: str) -> str:
+        expires = int(time.time()) + UPLOAD_TICKET_TTL_SECONDS
+        token = f"{expires}.{signature('local-upload', self.bucket, path, expires)}"
+        return f"{self.base_url}{SIGNED_UPLOAD_PATH_PREFIX}/{self.bucket}/{path}?token={token}"
+
+    def verify_upload_token(self, path: str, token: str) -> bool:
+        expires, _, sig = token.partition(".")
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(sig, signature("local-upload", self.bucket, path, expires))
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}{PUBLIC_PATH_PREFIX}/{self.bucket}/{path}"
+
+_storage: Optional[StorageBackend] = None
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == STORAGE_LOCAL:
+            _storage = LocalStorage(STORAGE_LOCAL_DIR, STORAGE_LOCAL_BASE_URL, BUCKET_FACES)
+        else:
+            _storage = SupabaseStorage(SUPABASE_URL, SUPABASE_KEY, BUCKET_FACES)
+    return _storage
+
+async def close_storage():
+    if _storage is not None:
+        await _storage.aclose()
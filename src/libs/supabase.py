@@ -1,57 +1,284 @@
+import asyncio
 import io
-from typing import List
-import supabase
-from uuid import uuid4
-from src.config.settings import SUPABASE_URL, SUPABASE_KEY, BUCKET_FACES
+import os
+from collections import Counter, OrderedDict
+from typing import Awaitable, Callable, Iterable, List, Optional
+from src.config.settings import (
+    IMAGE_KNOWN_HASH_CACHE_SIZE, IMAGE_NORMALIZE, STORAGE_ATTEMPT_TIMEOUT_SECONDS, STORAGE_BREAKER_FAILURE_THRESHOLD,
+    STORAGE_BREAKER_RESET_SECONDS, STORAGE_RETRY_ATTEMPTS, STORAGE_RETRY_BASE_SECONDS, STORAGE_RETRY_MAX_SECONDS,
+    STORAGE_SPOOL_DIR, STORAGE_SPOOL_ENABLED, STORAGE_SPOOL_FLUSH_SECONDS
+)
+from src.config.database import session_scope
 from src.utils.error import AppError
 from PIL import Image
 from src.utils.message_code import MESSAGE_CODE
+from src.libs.image_processing import IMAGE_EXTENSIONS, PROFILE_REPORT, VARIANT_SIZES, build_variants, image_executor, normalize_image, variant_name
+from src.libs.storage import content_hash, get_storage
+from src.libs.resilience import CircuitBreaker, CircuitOpenError, call_with_retry, is_transient_error
+from src.repositories.spooled_upload_repository import SpooledUploadRepository
 
-supabase_client = supabase.create_client(SUPABASE_URL, SUPABASE_KEY)
+# Called with the paths of an object and its variants before an upload hands it out
+UploadHold = Callable[[List[str]], Awaitable[None]]
 
-async def upload_image_to_supabase(image_data: bytes):
+# Keeps running variant tasks referenced until they finish
+_variant_tasks = set()
+
+# Recently stored content, keyed by raw upload hash (per profile) and by
+# object name. Only a hint: another process may have removed the object
+# since, so a hit is confirmed against storage before its url is reused.
+_known_uploads: "OrderedDict[str, str]" = OrderedDict()
+
+def _lookup_known(key: str) -> Optional[str]:
+    url = _known_uploads.get(key)
+    if url is not None:
+        _known_uploads.move_to_end(key)
+    return url
+
+def _remember_known(url: str, *keys: str):
+    for key in keys:
+        _known_uploads[key] = url
+        _known_uploads.move_to_end(key)
+    while len(_known_uploads) > IMAGE_KNOWN_HASH_CACHE_SIZE:
+        _known_uploads.popitem(last=False)
+
+def _forget_known(urls: List[str]):
+    urls = set(urls)
+    for key in [key for key, url in _known_uploads.items() if url in urls]:
+        del _known_uploads[key]
+
+# One breaker for the storage provider, shared by uploads and removals
+storage_breaker = CircuitBreaker("storage", STORAGE_BREAKER_FAILURE_THRESHOLD, STORAGE_BREAKER_RESET_SECONDS)
+storage_metrics: Counter = Counter()
+
+async def call_storage(operation, attempts: int = STORAGE_RETRY_ATTEMPTS):
+    """Run a storage call with the shared retry policy and breaker"""
+    return await call_with_retry(
+        operation, storage_breaker, storage_metrics,
+        attempts, STORAGE_RETRY_BASE_SECONDS, STORAGE_RETRY_MAX_SECONDS, STORAGE_ATTEMPT_TIMEOUT_SECONDS
+    )
+
+async def _hold_object(hold: Optional[UploadHold], path: str):
+    # Before the object is checked or stored: a worker removing it right now finishes first
+    if hold is not None:
+        await hold([path] + [variant_name(path, variant) for variant in VARIANT_SIZES])
+
+async def _still_stored(url: str, hold: Optional[UploadHold] = None) -> bool:
+    """One HEAD for a cached url, a miss or an error drops it and the caller uploads again"""
+    storage = get_storage()
+    path = storage.path_from_url(url)
+    try:
+        if path:
+            await _hold_object(hold, path)
+        if path and await call_storage(lambda: storage.exists(path), attempts=1):
+            storage_metrics["known_hits"] += 1
+            return True
+    except Exception as e:
+        print(f"Warning: Failed to confirm cached upload {path}: {str(e)}")
+    storage_metrics["known_stale"] += 1
+    _forget_known([url])
+    return False
+
+async def _store_object(path: str, content: bytes, content_type: str):
+    storage = get_storage()
+    await call_storage(lambda: storage.upload(path, content, content_type))
+
+def _spool_write(path: str, content: bytes):
+    os.makedirs(STORAGE_SPOOL_DIR, exist_ok=True)
+    file_path = os.path.join(STORAGE_SPOOL_DIR, path)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, file_path)
+
+def _spool_upload(path: str, content: bytes):
+    """Keep the photo in the spool and record it, so a lost spool file shows up as a lost row"""
+    _spool_write(path, content)
+    try:
+        with session_scope() as db:
+            SpooledUploadRepository.add(db, path)
+    except Exception:
+        _spool_discard([path])
+        raise
+
+def _pending_spooled_paths() -> List[str]:
+    with session_scope() as db:
+        return SpooledUploadRepository.get_pending_paths(db)
+
+def _spool_flushed(path: str):
+    # Row first, another flusher that then misses the file finds nothing to mark lost
+    with session_scope() as db:
+        SpooledUploadRepository.delete_paths(db, [path])
+    _spool_discard([path])
+
+def _spool_lost(path: str):
+    with session_scope() as db:
+        SpooledUploadRepository.mark_lost(db, path)
+
+def _spool_read(path: str) -> bytes:
+    with open(os.path.join(STORAGE_SPOOL_DIR, path), "rb") as f:
+        return f.read()
+
+def _spool_discard(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(os.path.join(STORAGE_SPOOL_DIR, path))
+        except FileNotFoundError:
+            continue
+
+def _start_variant_upload(image_bytes: bytes, image_name: str):
+    # Thumbnail variants are built and uploaded in the background
+    task = asyncio.create_task(upload_image_variants(image_bytes, image_name))
+    _variant_tasks.add(task)
+    task.add_done_callback(_variant_tasks.discard)
+
+async def upload_image_to_supabase(image_data: bytes, profile: str = PROFILE_REPORT, hold: Optional[UploadHold] = None):
+    """
+    Store a photo under its content hash and return its public url.
+
+    hold is awaited with the object paths before the object is checked or
+    stored, so the caller can keep a queued deletion of reused content off
+    it in its own transaction (StorageCleanupService.image_hold).
+    """
     try:
+        # Retried frames and re-sent photos are the same bytes, reuse their url
+        upload_key = f"{profile}:{content_hash(image_data)}"
+        known_url = _lookup_known(upload_key)
+        if known_url and await _still_stored(known_url, hold):
+            return known_url
+
         image_type = Image.open(io.BytesIO(image_data)).format.lower()
 
-        if image_type not in ["jpeg", "png", "webp", "jpg"]:
+        if image_type not in IMAGE_EXTENSIONS:
             raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Format file tidak didukung!")
 
-        image_name = f"{uuid4().hex}.{image_type}"
-
         image_bytes = io.BytesIO(image_data).getvalue()
+        if IMAGE_NORMALIZE:
+            # Resize and re-encode in the image pool, the event loop keeps serving
+            image_bytes, image_type = await asyncio.get_running_loop().run_in_executor(
+                image_executor, normalize_image, image_data, profile
+            )
+
+        storage = get_storage()
+        image_name = storage.object_name(image_bytes, image_type)
+        image_url = storage.public_url(image_name)
 
+        # Different raw bytes can still normalise to an object we already stored
+        if _lookup_known(image_name) and await _still_stored(image_url, hold):
+            _remember_known(image_url, upload_key)
+            return image_url
+
+        await _hold_object(hold, image_name)
         try:
-            supabase_client.storage.from_(BUCKET_FACES).upload(
-                path=image_name,
-                file=image_bytes,
-                file_options={"content-type": f"image/{image_type}"},  # Set Content-Type
-            )
+            await _store_object(image_name, image_bytes, f"image/{image_type}")
         except Exception as e:
-            raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Upload gagal: {str(e)}")
+            if not (isinstance(e, CircuitOpenError) or is_transient_error(e)):
+                raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Upload gagal: {str(e)}")
+            if not STORAGE_SPOOL_ENABLED:
+                raise AppError(503, MESSAGE_CODE.SERVICE_UNAVAILABLE, "Storage sedang tidak tersedia, coba lagi nanti")
+            # The url is known up front, keep the photo locally and upload it once storage recovers
+            try:
+                await asyncio.to_thread(_spool_upload, image_name, image_bytes)
+            except Exception as spool_error:
+                print(f"Warning: Failed to spool upload {image_name}: {str(spool_error)}")
+                raise AppError(503, MESSAGE_CODE.SERVICE_UNAVAILABLE, "Storage sedang tidak tersedia, coba lagi nanti")
+            storage_metrics["deferred"] += 1
+            return image_url
+
+        _start_variant_upload(image_bytes, image_name)
+        _remember_known(image_url, upload_key, image_name)
 
         # 5. Kembalikan URL file
-        return f"{SUPABASE_URL}/storage/v1/object/public/{BUCKET_FACES}/{image_name}"
+        return image_url
+    except AppError:
+        raise
     except Exception as e:
         raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Upload gagal: {str(e)}")
 
-async def delete_images_from_supabase(image_urls: List[str]):
-    """
-    Delete multiple images from Supabase storage
-    """
+async def upload_image_variants(image_data: bytes, image_name: str):
+    """Build the WebP variants of an uploaded image and store them next to it"""
     try:
-        # Extract file paths from URLs
-        file_paths = []
-        for url in image_urls:
-            # Extract filename from URL
-            # URL format: {SUPABASE_URL}/storage/v1/object/public/{BUCKET_FACES}/{filename}
-            if BUCKET_FACES in url:
-                filename = url.split(f"{BUCKET_FACES}/")[-1]
-                file_paths.append(filename)
-        
-        if file_paths:
-            # Delete files from Supabase storage
-            supabase_client.storage.from_(BUCKET_FACES).remove(file_paths)
-            
+        variants = await asyncio.get_running_loop().run_in_executor(image_executor, build_variants, image_data)
+        await asyncio.gather(*[
+            _store_object(variant_name(image_name, variant), content, "image/webp")
+            for variant, content in variants.items()
+        ])
     except Exception as e:
-        # Log error but don't raise - database deletion already succeeded
-        print(f"Warning: Failed to delete some images from storage: {str(e)}")
\ No newline at end of file
+        # Clients fall back to the original when a variant is missing
+        print(f"Warning: Failed to create image variants for {image_name}: {str(e)}")
+
+def image_object_paths(image_urls: List[str]) -> List[str]:
+    """Storage paths of images and their variants, foreign urls are skipped"""
+    storage = get_storage()
+    file_paths = []
+    for url in image_urls:
+        # URL format: {SUPABASE_URL}/storage/v1/object/public/{BUCKET_FACES}/{filename}
+        filename = storage.path_from_url(url)
+        if filename:
+            file_paths.append(filename)
+            file_paths.extend(variant_name(filename, variant) for variant in VARIANT_SIZES)
+    return file_paths
+
+def image_stem(path: str) -> str:
+    """Shared stem of an object and its variants: abc.webp, abc_sm.webp -> abc"""
+    stem = os.path.splitext(path)[0]
+    for variant in VARIANT_SIZES:
+        if stem.endswith(f"_{variant}"):
+            return stem[:-len(variant) - 1]
+    return stem
+
+def image_urls_of_stems(stems: Iterable[str]) -> List[str]:
+    """Every public url an original with one of these stems can be stored under"""
+    storage = get_storage()
+    return [storage.public_url(f"{stem}.{extension}") for stem in stems for extension in IMAGE_EXTENSIONS]
+
+async def remove_image_objects(paths: List[str]):
+    """Bulk remove storage objects, raises so the caller can retry"""
+    if not paths:
+        return
+    storage = get_storage()
+    # Deleted objects must be uploaded again next time
+    _forget_known([storage.public_url(path) for path in paths])
+    if STORAGE_SPOOL_ENABLED:
+        await asyncio.to_thread(_spool_discard, paths)
+    # Single attempt, the deletion queue has its own backoff
+    await call_storage(lambda: storage.remove(paths), attempts=1)
+
+async def flush_spooled_uploads() -> int:
+    """Upload photos deferred while storage was unavailable, stops at the first transient failure"""
+    flushed = 0
+    for path in await asyncio.to_thread(_pending_spooled_paths):
+        try:
+            content = await asyncio.to_thread(_spool_read, path)
+        except FileNotFoundError:
+            # A deletion removes the row too, a row without its file means the spool was lost
+            await asyncio.to_thread(_spool_lost, path)
+            storage_metrics["spool_lost"] += 1
+            print(f"Warning: Spooled upload {path} is missing from {STORAGE_SPOOL_DIR}, its url points at no object")
+            continue
+        try:
+            await _store_object(path, content, f"image/{os.path.splitext(path)[1].lstrip('.')}")
+        except Exception as e:
+            if isinstance(e, CircuitOpenError) or is_transient_error(e):
+                break
+            print(f"Warning: Failed to flush spooled upload {path}: {str(e)}")
+            continue
+        await asyncio.to_thread(_spool_flushed, path)
+        _start_variant_upload(content, path)
+        storage_metrics["spool_flushed"] += 1
+        flushed += 1
+    return flushed
+
+def spooled_upload_counts() -> dict:
+    """Spooled photos still waiting for storage, and those whose spool file was lost"""
+    with session_scope() as db:
+        return SpooledUploadRepository.count_by_state(db)
+
+async def run_spool_flusher():
+    while True:
+        try:
+            await flush_spooled_uploads()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: Spool flush failed: {str(e)}")
+        await asyncio.sleep(STORAGE_SPOOL_FLUSH_SECONDS)
@@ -0,0 +1,88 @@
+import hmac
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from src.config.settings import UPLOAD_TICKET_TTL_SECONDS
+from src.libs.resilience import CircuitOpenError, is_transient_error
+from src.libs.storage import get_storage, signature
+from src.libs.supabase import call_storage
+from src.utils.error import AppError
+from src.utils.message_code import MESSAGE_CODE
+
+# Content types a client may upload directly, mapped to the stored extension
+UPLOAD_CONTENT_TYPES = {"image/jpeg": "jpeg", "image/png": "png", "image/webp": "webp"}
+
+def content_type_for_path(path: str) -> Optional[str]:
+    """Content type a ticket was issued for, from the extension of its path"""
+    extension = path.rsplit(".", 1)[-1]
+    return next((content_type for content_type, ext in UPLOAD_CONTENT_TYPES.items() if ext == extension), None)
+
+def _matches_extension(prefix: bytes, extension: str) -> bool:
+    """Magic bytes of the uploaded file against the format the ticket was issued for"""
+    if extension == "jpeg":
+        return prefix.startswith(b"\xff\xd8\xff")
+    if extension == "png":
+        return prefix.startswith(b"\x89PNG\r\n\x1a\n")
+    if extension == "webp":
+        return prefix[:4] == b"RIFF" and prefix[8:12] == b"WEBP"
+    return False
+
+async def _storage_call(operation):
+    try:
+        return await call_storage(operation)
+    except Exception as e:
+        if isinstance(e, CircuitOpenError) or is_transient_error(e):
+            raise AppError(503, MESSAGE_CODE.SERVICE_UNAVAILABLE, "Storage sedang tidak tersedia, coba lagi nanti")
+        raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Storage gagal: {str(e)}")
+
+async def create_upload_ticket(owner_id: int, content_type: str) -> dict:
+    """
+    Short-lived ticket for uploading one image straight to storage.
+
+    The client PUTs the file to upload_url and then sends image_key instead
+    of the file. The key is signed and bound to the owner, so it cannot be
+    forged or used by someone else.
+    """
+    extension = UPLOAD_CONTENT_TYPES.get(content_type)
+    if not extension:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Format file tidak didukung!")
+
+    storage = get_storage()
+    # Bytes are unknown up front, so the name is random instead of a content hash
+    path = f"{uuid.uuid4().hex}.{extension}"
+    upload_url = await _storage_call(lambda: storage.create_signed_upload_url(path))
+
+    expires = int(time.time()) + UPLOAD_TICKET_TTL_SECONDS
+    return {
+        "image_key": f"{path}.{expires}.{signature('upload-ticket', path, owner_id, expires)}",
+        "upload_url": upload_url,
+        "method": "PUT",
+        "headers": {"Content-Type": content_type},
+        "image_url": storage.public_url(path),
+        "expires_at": datetime.fromtimestamp(expires, timezone.utc).isoformat(),
+    }
+
+async def resolve_upload_ticket(image_key: str, owner_id: int) -> str:
+    """Public url of a ticket's uploaded image, after checking the signature and the object"""
+    try:
+        path, expires, sig = image_key.rsplit(".", 2)
+        expired = int(expires) < time.time()
+    except ValueError:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "image_key tidak valid")
+    if not hmac.compare_digest(sig, signature("upload-ticket", path, owner_id, expires)):
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "image_key tidak valid")
+    if expired:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "image_key sudah kedaluwarsa")
+
+    storage = get_storage()
+    head = await _storage_call(lambda: storage.read_head(path, 12))
+    if head is None:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Gambar belum diupload")
+
+    # The client chose the bytes and the content type, only the signed name is ours.
+    # A rejected object is never referenced and goes with the orphan sweep.
+    prefix, content_type = head
+    if content_type.split(";")[0].strip().lower() != content_type_for_path(path) or not _matches_extension(prefix, path.rsplit(".", 1)[-1]):
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Format file tidak didukung!")
+    return storage.public_url(path)
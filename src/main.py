@@ -1,27 +1,55 @@
 # main.py
+import asyncio
 import os
+from contextlib import asynccontextmanager, suppress
 from fastapi import APIRouter, FastAPI, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 import uvicorn
 
-from src.routes import attendance_routes, customer_routes, employee_routes, history_routes, transaction_routes, user_routes, report_routes
+from src.routes import attendance_routes, customer_routes, employee_routes, history_routes, metrics_routes, storage_routes, transaction_routes, user_routes, report_routes
 from src.utils.error import app_error_handler, AppError, validation_exception_handler
-from src.config.settings import PORT
+from src.config.settings import PORT, STORAGE_BACKEND, STORAGE_SPOOL_ENABLED
 from fastapi.exceptions import RequestValidationError
 from src.middlewares.jwt_auth_middleware import JWTAuthMiddleware
+from src.middlewares.query_stats_middleware import QueryStatsMiddleware
+from src.middlewares.rate_limit_middleware import RateLimitMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from src.utils.response import handle_response
+from src.libs.storage import PUBLIC_PATH_PREFIX, SIGNED_UPLOAD_PATH_PREFIX, STORAGE_LOCAL, close_storage, get_storage
+from src.libs.supabase import run_spool_flusher
+from src.services.storage_cleanup_service import StorageCleanupService
+from src.services.token_revocation_service import TokenRevocationService
 
 # Import CORSMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Employee Management System", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    StorageCleanupService.start_worker()
+    await TokenRevocationService.start_worker()
+    # Uploads deferred while storage was down are pushed once it recovers
+    spool_task = asyncio.create_task(run_spool_flusher()) if STORAGE_SPOOL_ENABLED else None
+    yield
+    if spool_task is not None:
+        spool_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await spool_task
+    await TokenRevocationService.stop_worker()
+    await StorageCleanupService.stop_worker()
+    # Release pooled storage connections on shutdown
+    await close_storage()
+
+app = FastAPI(title="Employee Management System", version="1.0.0", lifespan=lifespan)
 
 # Default route
 @app.get("/")
 def read_root():
     return {"message": "Welcome to My Api!"}
 
+# Innermost, only requests that reach the routes are counted
+app.add_middleware(QueryStatsMiddleware)
+
 # --- Konfigurasi CORS di sini ---
 # ✅ Update origins to be more permissive and include both HTTP and potential HTTPS
 # origins = [
@@ -45,6 +73,8 @@ app.add_middleware(
 
 # ✅ Pastikan JWTAuthMiddleware berada setelah CORSMiddleware
 app.add_middleware(JWTAuthMiddleware) 
+# Outermost, throttled requests are refused before any other work
+app.add_middleware(RateLimitMiddleware)
 
 # # Include routes
 # app.include_router(user_routes.router, prefix="/users", tags=["Authentication"])
@@ -62,10 +92,18 @@ api_router.include_router(report_routes.router, prefix="/reports", tags=["Report
 api_router.include_router(customer_routes.router, prefix="/customers", tags=["Customers"])
 api_router.include_router(transaction_routes.router, prefix="/transactions", tags=["Transactions"])
 api_router.include_router(history_routes.router, prefix="/histories", tags=["Histories"])
+api_router.include_router(metrics_routes.router, prefix="/metrics", tags=["Metrics"])
 
 # Masukkan api_router ke aplikasi FastAPI
 app.include_router(api_router)
 
+# Local storage backend serves uploaded images itself, under the Supabase url layout
+if STORAGE_BACKEND == STORAGE_LOCAL:
+    storage = get_storage()
+    os.makedirs(storage.bucket_dir, exist_ok=True)
+    app.mount(f"{PUBLIC_PATH_PREFIX}/{storage.bucket}", StaticFiles(directory=storage.bucket_dir), name="storage")
+    app.include_router(storage_routes.router, prefix=SIGNED_UPLOAD_PATH_PREFIX, tags=["Storage"])
+
 # Custom error handlers
 app.add_exception_handler(AppError, app_error_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
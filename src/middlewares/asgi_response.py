@@ -0,0 +1,31 @@
+import json
+from typing import Iterable, Tuple
+from starlette.types import Send
+from src.utils.response import handle_response
+
+# Answered before CORSMiddleware runs, so these responses carry their own CORS headers
+ERROR_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, PUT, DELETE, OPTIONS"),
+    (b"access-control-allow-headers", b"Authorization, Content-Type"),
+]
+
+def error_response(status: int, code: str, message: str, headers: Iterable[Tuple[bytes, bytes]] = ()) -> Tuple[dict, dict]:
+    """ASGI start and body messages of a JSON error, same body as JSONResponse"""
+    body = json.dumps(
+        handle_response(status, code, message), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    return (
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-length", str(len(body)).encode())] + ERROR_HEADERS + list(headers),
+        },
+        {"type": "http.response.body", "body": body},
+    )
+
+async def send_response(send: Send, response: Tuple[dict, dict]):
+    start, body = response
+    await send(start)
+    await send(body)
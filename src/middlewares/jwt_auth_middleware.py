@@ -1,112 +1,146 @@
-import json
-from typing import Any, Dict, Optional
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
 from fastapi import Request
-from jose import jwt, JWTError
-from datetime import datetime, timezone
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from jose import jwt, ExpiredSignatureError, JWTError
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.config.settings import ALGORITHM, JWT_CLAIMS_CACHE_SIZE, SECRET_KEY
+from src.libs.revocation import revocation_list
+from src.middlewares.asgi_response import error_response, send_response
 from src.utils.message_code import MESSAGE_CODE
-from src.utils.response import handle_response
+
+# Exact paths and path prefixes that skip authentication
+EXCLUDED_PATHS = frozenset({
+    "/api/users/auth/register",
+    "/api/users/auth/login",
+    "/api/users/auth/refresh",
+    "/api/users/auth/logout",
+    "/api/",
+    "/api/employees/verify",
+    "/api/attendances/checkin",
+    "/api/attendances/checkout",
+})
+# Public image urls are served without auth, same as Supabase public buckets.
+# Signed uploads carry their own token.
+EXCLUDED_PREFIXES = (
+    "/storage/v1/object/public/",
+    "/storage/v1/object/upload/sign/",
+)
 
 def is_excluded_path(path: str) -> bool:
-    EXCLUDED_PATHS = [
-        "/api/users/auth/register", 
-        "/api/users/auth/login", 
-        "/api/",
-        "/api/employees/verify",
-        "/api/attendances/checkin",
-        "/api/attendances/checkout",
-    ]
-    return path in EXCLUDED_PATHS
-
-class JWTAuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # ✅ Handle preflight requests (OPTIONS)
-        if request.method == "OPTIONS":
-            return await call_next(request)
-            
-        if is_excluded_path(request.url.path):
-            return await call_next(request)
-          
-        authorization: str = request.headers.get("Authorization")
-        
-        if not authorization or not authorization.startswith("Bearer "):
-            return JSONResponse(
-                status_code=401,
-                content=handle_response(401, MESSAGE_CODE.UNAUTHORIZED, "Missing or invalid JWT token"),
-                headers={
-                    "Access-Control-Allow-Origin": "*",  # ✅ Tambahkan CORS header
-                    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                    "Access-Control-Allow-Headers": "Authorization, Content-Type",
-                }
-            )
-        
-        token = authorization.split("Bearer ")[1].strip()
-        
+    return path in EXCLUDED_PATHS or path.startswith(EXCLUDED_PREFIXES)
+
+MISSING_TOKEN_RESPONSE = error_response(401, MESSAGE_CODE.UNAUTHORIZED, "Missing or invalid JWT token")
+EXPIRED_TOKEN_RESPONSE = error_response(401, MESSAGE_CODE.UNAUTHORIZED, "Token expired")
+MISSING_USER_RESPONSE = error_response(401, MESSAGE_CODE.UNAUTHORIZED, "Token missing user_id claim")
+INVALID_TOKEN_RESPONSE = error_response(401, MESSAGE_CODE.UNAUTHORIZED, "Invalid token")
+REVOKED_TOKEN_RESPONSE = error_response(401, MESSAGE_CODE.UNAUTHORIZED, "Token revoked")
+
+def _get_authorization(scope: Scope) -> Optional[bytes]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return value
+    return None
+
+def _user_from_claims(payload: dict) -> Union[Dict[str, Any], Tuple[dict, dict]]:
+    """request.state.user of a token payload, or the error response to send"""
+    sub = payload.get("sub", {})  # Ambil sub, default ke dict kosong jika tidak ada
+    exp = payload.get("exp")
+
+    # Cek apakah token sudah kedaluwarsa
+    if exp is None or exp < time.time():
+        return EXPIRED_TOKEN_RESPONSE
+
+    # Pastikan user_id ada di dalam token
+    if sub.get("id") is None:
+        return MISSING_USER_RESPONSE
+
+    return {
+        "user_id": sub.get("id"),
+        "username": sub.get("username"),
+        "is_admin": sub.get("is_admin"),
+        "karyawan_id": sub.get("karyawan_id"),
+        "jti": payload.get("jti")
+    }
+
+# Verified users by token digest, each entry valid until the token's exp
+_verified_tokens: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+def authenticate_token(token: str) -> Union[Dict[str, Any], Tuple[dict, dict]]:
+    """
+    Verify a bearer token and return its user, or the error response to send.
+
+    Signature checks and claim parsing run once per token, repeated
+    requests with the same token cost a hash, a cache lookup and a
+    revocation filter probe.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _verified_tokens.get(key)
+    if cached is not None:
+        user, exp = cached
+        if exp < time.time():
+            del _verified_tokens[key]
+            return EXPIRED_TOKEN_RESPONSE
+        if user["jti"] and revocation_list.is_revoked(user["jti"]):
+            return REVOKED_TOKEN_RESPONSE
+        _verified_tokens.move_to_end(key)
+        # Routes get their own copy, the cached one stays untouched
+        return dict(user)
+
+    try:
+        # sub holds the user dict, python-jose expects a string there by default
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_sub": False})
+    except ExpiredSignatureError:
+        return EXPIRED_TOKEN_RESPONSE
+    except JWTError:
+        return INVALID_TOKEN_RESPONSE
+
+    user = _user_from_claims(payload)
+    if isinstance(user, dict):
+        if user["jti"] and revocation_list.is_revoked(user["jti"]):
+            return REVOKED_TOKEN_RESPONSE
+        _verified_tokens[key] = (user, payload["exp"])
+        if len(_verified_tokens) > JWT_CLAIMS_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+        return dict(user)
+    return user
+
+class JWTAuthMiddleware:
+    """
+    Bearer token auth as a plain ASGI middleware.
+
+    Unlike BaseHTTPMiddleware it does not wrap the request and response
+    streams, so authenticated requests pass straight through and streaming
+    responses are not buffered.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # ✅ Preflight requests (OPTIONS) dan path publik langsung diteruskan
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or is_excluded_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = _get_authorization(scope)
+        if not authorization or not authorization.startswith(b"Bearer "):
+            await send_response(send, MISSING_TOKEN_RESPONSE)
+            return
+
+        token = authorization[7:].strip().decode("latin-1")
         try:
-            # payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
-            payload = jwt.get_unverified_claims(token)
-            sub = payload.get("sub", {})  # Ambil sub, default ke dict kosong jika tidak ada
-            user_id = sub.get("id")  # ✅ Ambil "id" dari dalam "sub"
-            username = sub.get("username") 
-            is_admin = sub.get("is_admin")
-            karyawan_id = sub.get("karyawan_id")
-            exp = payload.get("exp")
-            
-            # Cek apakah token sudah kedaluwarsa
-            if exp is None or datetime.fromtimestamp(exp, timezone.utc) < datetime.now(timezone.utc):
-                return JSONResponse(
-                    status_code=401,
-                    content=handle_response(401, MESSAGE_CODE.UNAUTHORIZED, "Token expired"),
-                    headers={
-                        "Access-Control-Allow-Origin": "*",  # ✅ Tambahkan CORS header
-                        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                        "Access-Control-Allow-Headers": "Authorization, Content-Type",
-                    }
-                )
-            
-            # Pastikan user_id ada di dalam token
-            if user_id is None:
-                return JSONResponse(
-                    status_code=401,
-                    content=handle_response(401, MESSAGE_CODE.UNAUTHORIZED, "Token missing user_id claim"),
-                    headers={
-                        "Access-Control-Allow-Origin": "*",  # ✅ Tambahkan CORS header
-                        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                        "Access-Control-Allow-Headers": "Authorization, Content-Type",
-                    }
-                )
-            
-            # Simpan user ke dalam request state agar bisa digunakan di route
-            request.state.user = {
-                "user_id": user_id,
-                "username": username,
-                "is_admin": is_admin,
-                "karyawan_id": karyawan_id
-            }
-
-        except JWTError:
-            return JSONResponse(
-                status_code=401,
-                content=handle_response(401, MESSAGE_CODE.UNAUTHORIZED, "Invalid token"),
-                headers={
-                    "Access-Control-Allow-Origin": "*",  # ✅ Tambahkan CORS header
-                    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                    "Access-Control-Allow-Headers": "Authorization, Content-Type",
-                }
-            )
+            user = authenticate_token(token)
         except Exception as e:
-            return JSONResponse(
-                status_code=500,
-                content=handle_response(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, str(e)),
-                headers={
-                    "Access-Control-Allow-Origin": "*",  # ✅ Tambahkan CORS header
-                    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                    "Access-Control-Allow-Headers": "Authorization, Content-Type",
-                }
-            )
-
-        return await call_next(request)
+            user = error_response(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, str(e))
+
+        if isinstance(user, tuple):
+            await send_response(send, user)
+            return
+
+        # Simpan user ke dalam request state agar bisa digunakan di route
+        scope.setdefault("state", {})["user"] = user
+        await self.app(scope, receive, send)
 
 async def get_current_user_or_none(request: Request) -> Optional[Dict[str, Any]]:
     """Returns current user dict if authenticated, None otherwise"""
@@ -119,20 +153,7 @@ async def get_current_user_or_none(request: Request) -> Optional[Dict[str, Any]]
         return None
     
     try:
-        payload = jwt.get_unverified_claims(token)
-        sub = payload.get("sub", {})
-        
-        # Check token expiration
-        exp = payload.get("exp")
-        if exp and datetime.fromtimestamp(exp, timezone.utc) < datetime.now(timezone.utc):
-            return None
-        
-        print(sub.get("karyawan_id"), "get_current_user_or_none")
-        return {
-            "user_id": sub.get("id"),
-            "username": sub.get("username"),
-            "is_admin": sub.get("is_admin", False),
-            "karyawan_id": sub.get("karyawan_id", None)
-        }
-    except (JWTError, AttributeError):
-        return None
\ No newline at end of file
+        user = authenticate_token(token)
+    except AttributeError:
+        return None
+    return user if isinstance(user, dict) else None
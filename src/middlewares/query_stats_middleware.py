@@ -0,0 +1,39 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config.settings import DB_QUERY_STATS_HEADERS
+from src.libs.query_stats import new_request_stats, request_query_stats, route_query_stats
+
+class QueryStatsMiddleware:
+    """
+    Counts the SQL queries and database time of each request.
+
+    Totals go out as X-DB-Query-Count and X-DB-Time-Ms headers and are
+    added to the per-route statistics under /api/metrics/queries. The
+    unit of work commits before the response starts, so the commit is
+    included.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = new_request_stats(scope["path"])
+        token = request_query_stats.set(stats)
+
+        async def send_with_stats(message: Message):
+            if message["type"] == "http.response.start" and DB_QUERY_STATS_HEADERS:
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-db-query-count", str(stats["count"]).encode()),
+                    (b"x-db-time-ms", f"{stats['time_ms']:.1f}".encode()),
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            request_query_stats.reset(token)
+            # The router leaves the matched route in the scope, its template keeps ids out of the key
+            route = scope.get("route")
+            route_query_stats.record(f"{scope['method']} {route.path}" if route else "unmatched", stats)
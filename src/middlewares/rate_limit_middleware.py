@@ -0,0 +1,170 @@
+import asyncio
+import math
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.config.settings import (
+    HEAVY_MAX_CONCURRENCY, HEAVY_MAX_QUEUE, HEAVY_QUEUE_TIMEOUT_SECONDS, RATE_LIMIT_ENABLED,
+    RATE_LIMIT_FACE_BURST, RATE_LIMIT_FACE_PER_MINUTE, RATE_LIMIT_LOGIN_BURST, RATE_LIMIT_LOGIN_PER_MINUTE,
+    RATE_LIMIT_MAX_CLIENTS, RATE_LIMIT_TRUST_FORWARDED, RATE_LIMIT_TRUSTED_PROXY_HOPS
+)
+from src.middlewares.asgi_response import error_response, send_response
+from src.utils.message_code import MESSAGE_CODE
+
+class RouteLimit(NamedTuple):
+    per_second: float
+    burst: int
+    heavy: bool  # Takes a slot of the shared concurrency gate
+
+_LOGIN_LIMIT = RouteLimit(RATE_LIMIT_LOGIN_PER_MINUTE / 60, RATE_LIMIT_LOGIN_BURST, True)
+_FACE_LIMIT = RouteLimit(RATE_LIMIT_FACE_PER_MINUTE / 60, RATE_LIMIT_FACE_BURST, True)
+
+# bcrypt and dlib routes, all reachable without a token
+LIMITED_ROUTES: Dict[str, RouteLimit] = {
+    "/api/users/auth/login": _LOGIN_LIMIT,
+    "/api/users/auth/register": _LOGIN_LIMIT,
+    "/api/employees/verify": _FACE_LIMIT,
+    "/api/attendances/checkin": _FACE_LIMIT,
+    "/api/attendances/checkout": _FACE_LIMIT,
+}
+
+admission_metrics: Counter = Counter()
+
+QUEUE_FULL_RESPONSE = error_response(
+    503, MESSAGE_CODE.SERVICE_UNAVAILABLE, "Server is busy, try again shortly", [(b"retry-after", b"1")]
+)
+
+@lru_cache(maxsize=64)
+def _rate_limited_response(retry_after: int) -> Tuple[dict, dict]:
+    return error_response(
+        429, MESSAGE_CODE.TOO_MANY_REQUESTS, "Too many requests, try again later",
+        [(b"retry-after", str(retry_after).encode())]
+    )
+
+class TokenBuckets:
+    """Token bucket per key, least recently seen keys are dropped beyond max_keys"""
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()
+
+    def take(self, key: tuple, limit: RouteLimit) -> float:
+        """0 when a token was taken, otherwise seconds until the next one"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(limit.burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(limit.burst), bucket[0] + (now - bucket[1]) * limit.per_second)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / limit.per_second
+
+class ConcurrencyGate:
+    """At most `limit` requests run, up to `max_queue` wait at most `timeout` seconds, the rest are refused"""
+    def __init__(self, limit: int, max_queue: int, timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self) -> bool:
+        # Created on first use so it binds to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                admission_metrics["queue_full"] += 1
+                return False
+            self.waiting += 1
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                admission_metrics["queue_timeout"] += 1
+                return False
+            finally:
+                self.waiting -= 1
+                admission_metrics["queued"] += 1
+                admission_metrics["queue_wait_ms_total"] += round((time.perf_counter() - started) * 1000)
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+heavy_gate = ConcurrencyGate(HEAVY_MAX_CONCURRENCY, HEAVY_MAX_QUEUE, HEAVY_QUEUE_TIMEOUT_SECONDS)
+_buckets = TokenBuckets(RATE_LIMIT_MAX_CLIENTS)
+
+def _client_ip(scope: Scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        # Proxies append, so only the last RATE_LIMIT_TRUSTED_PROXY_HOPS entries are theirs.
+        # Anything further left came from the client and could change on every request.
+        forwarded = [
+            entry.strip()
+            for name, value in scope["headers"] if name == b"x-forwarded-for"
+            for entry in value.split(b",") if entry.strip()
+        ]
+        if forwarded:
+            return forwarded[-min(RATE_LIMIT_TRUSTED_PROXY_HOPS, len(forwarded))].decode("latin-1")
+    client = scope.get("client")
+    return client[0] if client else ""
+
+class RateLimitMiddleware:
+    """
+    Admission control for expensive unauthenticated routes.
+
+    Each client ip gets a token bucket per route and is answered 429 once
+    it is empty. Admitted requests to CPU heavy routes then share one
+    concurrency gate with a short bounded queue, overflow is answered 503
+    right away instead of slowing every request down.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit: Optional[RouteLimit] = None
+        if scope["type"] == "http" and scope["method"] != "OPTIONS":
+            limit = LIMITED_ROUTES.get(scope["path"])
+        if limit is None or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = _buckets.take((scope["path"], _client_ip(scope)), limit)
+        if retry_after:
+            admission_metrics["rate_limited"] += 1
+            await send_response(send, _rate_limited_response(math.ceil(retry_after)))
+            return
+
+        if not limit.heavy:
+            await self.app(scope, receive, send)
+            return
+
+        if not await heavy_gate.acquire():
+            await send_response(send, QUEUE_FULL_RESPONSE)
+            return
+        admission_metrics["admitted"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            heavy_gate.release()
+
+def get_admission_metrics() -> dict:
+    return {
+        "enabled": RATE_LIMIT_ENABLED,
+        "heavy_in_flight": heavy_gate.in_flight,
+        "heavy_waiting": heavy_gate.waiting,
+        "counters": dict(admission_metrics),
+    }
@@ -7,6 +7,8 @@ from src.config.database import Base
 class Attendance(Base):
     __tablename__ = "attendances"
 
+    __mapper_args__ = {"eager_defaults": True}
+
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
     date = Column(Date, nullable=False)
@@ -16,8 +18,8 @@ class Attendance(Base):
     checkin_longitude = Column(Float, nullable=True)
     checkout_latitude = Column(Float, nullable=True)
     checkout_longitude = Column(Float, nullable=True)
-    checkin_image_url = Column(String(500), nullable=True)
-    checkout_image_url = Column(String(500), nullable=True)
+    checkin_image_url = Column(String(500), nullable=True, index=True)
+    checkout_image_url = Column(String(500), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.sql import func
 from src.config.database import Base
 from sqlalchemy.orm import relationship
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        # Trigram indexes for ILIKE search (see alembic pg_trgm migration)
+        Index("ix_customers_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_customers_plate_number_trgm", "plate_number", postgresql_using="gin", postgresql_ops={"plate_number": "gin_trgm_ops"}),
+        Index("ix_customers_vehicle_type_trgm", "vehicle_type", postgresql_using="gin", postgresql_ops={"vehicle_type": "gin_trgm_ops"}),
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -1,11 +1,17 @@
 # src/models/employee_model.py
-from sqlalchemy import Column, Integer, String, Date, DateTime, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from src.config.database import Base
 
 class Employee(Base):
     __tablename__ = "employees"
+    __table_args__ = (
+        # Trigram index for ILIKE search (see alembic pg_trgm migration)
+        Index("ix_employees_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -13,7 +19,7 @@ class Employee(Base):
     date_of_birth = Column(Date, nullable=False)
     divisi = Column(String(100), nullable=False)
     address = Column(Text, nullable=False)
-    image_url = Column(String(500), nullable=True)
+    image_url = Column(String(500), nullable=True, index=True)
     face_encoding = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
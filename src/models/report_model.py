@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Enum, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Enum, String, Index
 from sqlalchemy.sql import func
 from src.config.database import Base
 from sqlalchemy.orm import relationship
@@ -11,6 +11,15 @@ class ReportStatus(enum.Enum):
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        # Trigram index for ILIKE search (see alembic pg_trgm migration)
+        Index("ix_reports_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        # Pending/approved lookups per transaction
+        Index("ix_reports_transaction_id_status", "transaction_id", "status"),
+    )
+
+    # created_at/updated_at come back with the INSERT/UPDATE itself instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False)  # Using string reference
@@ -19,7 +28,7 @@ class Report(Base):
     description = Column(Text, nullable=False)
     start_time = Column(DateTime, nullable=True)
     end_time = Column(DateTime, nullable=True)
-    image_url = Column(String(500), nullable=True)
+    image_url = Column(String(500), nullable=True, index=True)
 
     status = Column(Enum(ReportStatus), default=ReportStatus.PENDING, nullable=False)
     approved_by = Column(Integer, ForeignKey("employees.id"), nullable=True)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from src.config.database import Base
+
+class SpooledUpload(Base):
+    """Photo whose url was handed out while it only sits in the local spool"""
+    __tablename__ = "spooled_uploads"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(500), unique=True, nullable=False)
+    # Set when the spool no longer has the file, the url points at nothing
+    lost_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from src.config.database import Base
+
+class StorageDeletion(Base):
+    """Storage object waiting to be removed by the cleanup worker"""
+    __tablename__ = "storage_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(500), nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Enum, Float
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Enum, Float, Index
 from sqlalchemy.sql import func
 from src.config.database import Base
 from sqlalchemy.orm import relationship
@@ -12,12 +12,20 @@ class TransactionStatus(enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Trigram index for ILIKE search (see alembic pg_trgm migration)
+        Index("ix_transactions_complaint_trgm", "complaint", postgresql_using="gin", postgresql_ops={"complaint": "gin_trgm_ops"}),
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
     complaint = Column(Text, nullable=True)
     total_cost = Column(Float, nullable=True)
     status = Column(Enum(TransactionStatus), default=TransactionStatus.PENDING, nullable=False)
+    # Denormalised count of PENDING reports, kept in step by the report services
+    pending_report_count = Column(Integer, default=0, server_default="0", nullable=False)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
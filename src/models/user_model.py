@@ -6,6 +6,8 @@ from src.config.database import Base
 class User(Base):
     __tablename__ = "users"
 
+    __mapper_args__ = {"eager_defaults": True}
+
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(100), unique=True, index=True, nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
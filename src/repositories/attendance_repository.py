@@ -1,15 +1,18 @@
 # src/repositories/attendance_repository.py
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date, datetime
 from typing import Optional, List
 from src.models.attendance_model import Attendance
 from src.models.employee_model import Employee
 from sqlalchemy.orm import joinedload
+from src.utils.pagination import COUNT_ESTIMATE, paginate_async
+from src.libs.read_replica import read_only
 
 class AttendanceRepository:
     @staticmethod
-    def create_checkin(db: Session, employee_id: int, attendance_date: date, 
+    async def create_checkin(db: AsyncSession, employee_id: int, attendance_date: date,
                       checkin_time: datetime, latitude: float, longitude: float, 
                       image_url: str) -> Attendance:
         new_attendance = Attendance(
@@ -21,34 +24,31 @@ class AttendanceRepository:
             checkin_image_url=image_url
         )
         db.add(new_attendance)
-        db.commit()
-        db.refresh(new_attendance)
+        await db.flush()
         return new_attendance
 
     @staticmethod
-    def update_checkin(db: Session, attendance_id: int, checkin_time: datetime,
+    async def update_checkin(db: AsyncSession, attendance_id: int, checkin_time: datetime,
                       latitude: float, longitude: float, image_url: str) -> Optional[Attendance]:
-        attendance = db.query(Attendance).filter(Attendance.id == attendance_id).first()
+        attendance = await db.get(Attendance, attendance_id)
         if attendance:
             attendance.checkin_time = checkin_time
             attendance.checkin_latitude = latitude
             attendance.checkin_longitude = longitude
             attendance.checkin_image_url = image_url
-            db.commit()
-            db.refresh(attendance)
+            await db.flush()
         return attendance
 
     @staticmethod
-    def update_checkout(db: Session, attendance_id: int, checkout_time: datetime,
+    async def update_checkout(db: AsyncSession, attendance_id: int, checkout_time: datetime,
                        latitude: float, longitude: float, image_url: str) -> Optional[Attendance]:
-        attendance = db.query(Attendance).filter(Attendance.id == attendance_id).first()
+        attendance = await db.get(Attendance, attendance_id)
         if attendance:
             attendance.checkout_time = checkout_time
             attendance.checkout_latitude = latitude
             attendance.checkout_longitude = longitude
             attendance.checkout_image_url = image_url
-            db.commit()
-            db.refresh(attendance)
+            await db.flush()
         return attendance
 
     # @staticmethod
@@ -56,14 +56,15 @@ class AttendanceRepository:
     #     return db.query(Attendance).filter(Attendance.id == attendance_id).first()
 
     @staticmethod
-    def get_by_employee_and_date(db: Session, employee_id: int, attendance_date: date) -> Optional[Attendance]:
-        return db.query(Attendance).filter(
+    async def get_by_employee_and_date(db: AsyncSession, employee_id: int, attendance_date: date) -> Optional[Attendance]:
+        return await db.scalar(select(Attendance).filter(
             and_(Attendance.employee_id == employee_id, Attendance.date == attendance_date)
-        ).first()
+        ).limit(1))
         
     @staticmethod
-    def get_all(db: Session, page: int = 1, perPage: int = 10, search: str = None, employee_id: int = None):
-        query = db.query(Attendance).options(joinedload(Attendance.employee)).join(Employee)
+    @read_only
+    async def get_all(db: AsyncSession, page: int = 1, perPage: int = 10, search: str = None, employee_id: int = None, count_strategy: Optional[str] = None):
+        query = select(Attendance).options(joinedload(Attendance.employee)).join(Employee)
         
         # Apply employee filter if provided (for non-admin users)
         if employee_id:
@@ -80,24 +81,16 @@ class AttendanceRepository:
                 )
             )
         
-        # Get total count
-        total_data = query.count()
-        
-        # Calculate pagination
-        total_pages = (total_data + perPage - 1) // perPage
-        offset = (page - 1) * perPage
-        
-        # Get paginated data
-        attendances = query.offset(offset).limit(perPage).all()
+        # Get paginated data and total in one round trip
+        attendances, meta = await paginate_async(
+            db, query, page, perPage,
+            count_strategy=count_strategy or COUNT_ESTIMATE, table_name=Attendance.__tablename__,
+            filtered=any([employee_id, search])
+        )
         
         return {
             "attendances": attendances,
-            "meta": {
-                "page": page,
-                "perPage": perPage,
-                "totalPages": total_pages,
-                "totalData": total_data
-            }
+            "meta": meta
         }
 
     @staticmethod
@@ -117,7 +110,7 @@ class AttendanceRepository:
     @staticmethod
     def delete_multiple(db: Session, attendance_ids: List[int]) -> int:
         deleted_count = db.query(Attendance).filter(Attendance.id.in_(attendance_ids)).delete(synchronize_session=False)
-        db.commit()
+        db.flush()
         return deleted_count
 
     # @staticmethod
@@ -4,7 +4,9 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from src.models.customer_model import Customer
 from src.models.transaction_model import Transaction
+from src.utils.pagination import COUNT_CACHED, invalidate_count_cache_on_commit, paginate
 from src.schemas.customer_schema import CustomerCreateSchema, CustomerUpdateSchema
+from src.libs.read_replica import read_only
 
 class CustomerRepository:
     @staticmethod
@@ -20,8 +22,8 @@ class CustomerRepository:
             vehicle_year=customer_data.vehicle_year
         )
         db.add(new_customer)
-        db.commit()
-        db.refresh(new_customer)
+        db.flush()
+        invalidate_count_cache_on_commit(db)
         return new_customer
 
     @staticmethod
@@ -33,7 +35,8 @@ class CustomerRepository:
         return db.query(Customer).filter(Customer.plate_number == plate_number.upper()).first()
 
     @staticmethod
-    def get_all(db: Session, page: int = 1, perPage: int = 10, search: str = None):
+    @read_only
+    def get_all(db: Session, page: int = 1, perPage: int = 10, search: str = None, count_strategy: Optional[str] = None):
         query = db.query(Customer)
         
         if search:
@@ -49,24 +52,15 @@ class CustomerRepository:
                 )
             )
         
-        # Get total count
-        total_data = query.count()
-        
-        # Calculate pagination
-        total_pages = (total_data + perPage - 1) // perPage
-        offset = (page - 1) * perPage
-        
-        # Get paginated data
-        customers = query.order_by(Customer.created_at.desc()).offset(offset).limit(perPage).all()
+        # Get paginated data and total in one round trip
+        customers, meta = paginate(
+            db, query, page, perPage, order_by=(Customer.created_at.desc(),),
+            count_strategy=count_strategy or COUNT_CACHED, table_name=Customer.__tablename__, filtered=bool(search)
+        )
         
         return {
             "customers": customers,
-            "meta": {
-                "page": page,
-                "perPage": perPage,
-                "totalPages": total_pages,
-                "totalData": total_data
-            }
+            "meta": meta
         }
 
     @staticmethod
@@ -76,8 +70,7 @@ class CustomerRepository:
             update_data = customer_data.dict(exclude_unset=True)
             for key, value in update_data.items():
                 setattr(customer, key, value)
-            db.commit()
-            db.refresh(customer)
+            db.flush()
         return customer
 
     @staticmethod
@@ -85,7 +78,8 @@ class CustomerRepository:
         customer = db.query(Customer).filter(Customer.id == customer_id).first()
         if customer:
             db.delete(customer)
-            db.commit()
+            db.flush()
+            invalidate_count_cache_on_commit(db)
             return True
         return False
 
@@ -1,9 +1,12 @@
 from datetime import date
-from sqlalchemy import or_
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from src.models.attendance_model import Attendance
 from src.models.employee_model import Employee
 from typing import Optional, List
+from src.utils.pagination import COUNT_WINDOW, paginate
+from src.libs.read_replica import read_only
 
 class EmployeeRepository:
     # @staticmethod
@@ -11,7 +14,8 @@ class EmployeeRepository:
     #     return db.query(Employee).offset(skip).limit(limit).all()
     
     @staticmethod  
-    def get_all(db: Session, page: int = 1, perPage: int = 10, search: str = None):
+    @read_only
+    def get_all(db: Session, page: int = 1, perPage: int = 10, search: str = None, count_strategy: Optional[str] = None):
         query = db.query(Employee)
         
         # Apply search filter
@@ -25,47 +29,40 @@ class EmployeeRepository:
                 )
             )
         
-        # Get total count
-        total_data = query.count()
-        
-        # Calculate pagination
-        total_pages = (total_data + perPage - 1) // perPage
-        offset = (page - 1) * perPage
-        
-        # Get paginated data
-        employees = query.offset(offset).limit(perPage).all()
+        # Get paginated data and total in one round trip
+        employees, meta = paginate(
+            db, query, page, perPage,
+            count_strategy=count_strategy or COUNT_WINDOW, table_name=Employee.__tablename__, filtered=bool(search)
+        )
         
         return {
             "employees": employees,
-            "meta": {
-                "page": page,
-                "perPage": perPage,
-                "totalPages": total_pages,
-                "totalData": total_data
-            }
+            "meta": meta
         }
         
     @staticmethod
-    def get_all_with_face_data(db: Session) -> List[Employee]:
-        """Get all employees that have face encoding data, with today's attendance"""
-        employees = db.query(Employee).filter(Employee.face_encoding.isnot(None)).all()
-        today = date.today()
+    async def get_all_with_face_data(db: AsyncSession, employee_id: Optional[int] = None) -> List[Employee]:
+        """Employees that have face encoding data, or just employee_id, with today's attendance"""
+        query = select(Employee).filter(Employee.face_encoding.isnot(None))
+        if employee_id:
+            query = query.filter(Employee.id == employee_id)
+        employees = (await db.scalars(query)).all()
+        if not employees:
+            return []
 
-        # Inject attendance_today untuk masing-masing employee
-        for emp in employees:
-            attendance = (
-                db.query(Attendance)
-                .filter(
-                    Attendance.employee_id == emp.id,
-                    Attendance.date == today
-                )
-                .first()
+        # Inject attendance_today untuk masing-masing employee, satu query untuk semua
+        attendances = await db.scalars(
+            select(Attendance).filter(
+                Attendance.employee_id.in_([emp.id for emp in employees]),
+                Attendance.date == date.today()
             )
-            emp.attendance_today = attendance
+        )
+        attendance_by_employee = {attendance.employee_id: attendance for attendance in attendances}
+        for emp in employees:
+            emp.attendance_today = attendance_by_employee.get(emp.id)
 
         return employees
 
-
     @staticmethod
     def get_by_id(db: Session, employee_id: int) -> Optional[Employee]:
         employee = db.query(Employee).filter(Employee.id == employee_id).first()
@@ -101,8 +98,7 @@ class EmployeeRepository:
             face_encoding=face_encoding
         )
         db.add(new_employee)
-        db.commit()
-        db.refresh(new_employee)
+        db.flush()
         return new_employee
 
     @staticmethod
@@ -112,8 +108,7 @@ class EmployeeRepository:
             for key, value in kwargs.items():
                 if value is not None:
                     setattr(employee, key, value)
-            db.commit()
-            db.refresh(employee)
+            db.flush()
         return employee
 
     @staticmethod
@@ -121,6 +116,6 @@ class EmployeeRepository:
         employee = db.query(Employee).filter(Employee.id == employee_id).first()
         if employee:
             db.delete(employee)
-            db.commit()
+            db.flush()
             return True
         return False
\ No newline at end of file
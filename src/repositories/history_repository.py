@@ -1,8 +1,13 @@
 # src/repositories/history_repository.py
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from src.models.history_model import History
 from src.models.transaction_model import Transaction, TransactionStatus
 from src.models.employee_model import Employee
+from src.utils.pagination import COUNT_ESTIMATE, paginate_async
+from src.libs.read_replica import read_only
 
 class HistoryRepository:
     @staticmethod
@@ -20,10 +25,25 @@ class HistoryRepository:
             created_by=created_by
         )
         db.add(new_history)
-        db.commit()
-        db.refresh(new_history)
+        db.flush()
         return new_history
 
+    @staticmethod
+    def create_many(
+        db: Session,
+        transaction_ids: List[int],
+        status: TransactionStatus,
+        note: str = None,
+        created_by: int = None
+    ) -> List[History]:
+        """Add one history row per transaction."""
+        histories = [
+            History(transaction_id=transaction_id, status=status, note=note, created_by=created_by)
+            for transaction_id in transaction_ids
+        ]
+        db.add_all(histories)
+        return histories
+
     @staticmethod
     def get_by_transaction_id(db: Session, transaction_id: int):
         return db.query(History).options(
@@ -40,11 +60,10 @@ class HistoryRepository:
         ).filter(History.id == history_id).first()
 
     @staticmethod
-    def get_all(db: Session, page: int = 1, perPage: int = 10, transaction_id: int = None, employee_id: int = None):
+    @read_only
+    async def get_all(db: AsyncSession, page: int = 1, perPage: int = 10, transaction_id: int = None, employee_id: int = None, count_strategy: Optional[str] = None):
         """Get all histories with pagination and filtering"""
-        from sqlalchemy.orm import joinedload
-        
-        query = db.query(History).options(
+        query = select(History).options(
             joinedload(History.transaction).joinedload(Transaction.customer)
         )
         
@@ -55,24 +74,16 @@ class HistoryRepository:
         if employee_id:
             query = query.filter(History.created_by == employee_id)
         
-        # Get total count
-        total_data = query.count()
-        
-        # Calculate pagination
-        total_pages = (total_data + perPage - 1) // perPage
-        offset = (page - 1) * perPage
-        
-        # Get paginated data
-        histories = query.order_by(History.created_at.desc()).offset(offset).limit(perPage).all()
+        # Get paginated data and total in one round trip
+        histories, meta = await paginate_async(
+            db, query, page, perPage, order_by=(History.created_at.desc(),),
+            count_strategy=count_strategy or COUNT_ESTIMATE, table_name=History.__tablename__,
+            filtered=any([transaction_id, employee_id])
+        )
         
         return {
             "histories": histories,
-            "meta": {
-                "page": page,
-                "perPage": perPage,
-                "totalPages": total_pages,
-                "totalData": total_data
-            }
+            "meta": meta
         }
 
     @staticmethod
@@ -105,6 +116,7 @@ class HistoryRepository:
         }
 
     @staticmethod
+    @read_only
     def get_recent_activities(db: Session, limit: int = 10):
         """Get recent activities"""
         from sqlalchemy.orm import joinedload
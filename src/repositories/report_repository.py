@@ -1,12 +1,16 @@
 # src/repositories/report_repository.py
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, delete, exists, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from src.models.report_model import Report, ReportStatus
 from src.models.employee_model import Employee
 from src.models.transaction_model import Transaction
 from src.models.customer_model import Customer
+from src.utils.search import build_search, order_by_search
+from src.utils.pagination import COUNT_WINDOW, paginate, paginate_async
+from src.libs.read_replica import read_only
 
 class ReportRepository:
     @staticmethod
@@ -29,8 +33,7 @@ class ReportRepository:
             status=ReportStatus.PENDING
         )
         db.add(new_report)
-        db.commit()
-        db.refresh(new_report)
+        db.flush()
         return new_report
 
     @staticmethod
@@ -43,8 +46,9 @@ class ReportRepository:
         ).filter(Report.id == report_id).first()
 
     @staticmethod
-    def get_all(db: Session, page: int = 1, perPage: int = 10, search: str = None, status: str = None, transaction_id: int = None, karyawan_id: Optional[int] = None):
-        query = db.query(Report).options(
+    @read_only
+    async def get_all(db: AsyncSession, page: int = 1, perPage: int = 10, search: str = None, status: str = None, transaction_id: int = None, karyawan_id: Optional[int] = None, sort: Optional[str] = None, count_strategy: Optional[str] = None):
+        query = select(Report).options(
             joinedload(Report.employee),
             joinedload(Report.transaction).joinedload(Transaction.customer)
         )
@@ -65,69 +69,48 @@ class ReportRepository:
             except ValueError:
                 pass  # Invalid status, ignore filter
         
-        # Apply search filter
+        # Apply search filter (served by trigram indexes on PostgreSQL)
+        rank = None
         if search:
-            search_filter = f"%{search}%"
+            search_filter, rank = build_search(db, [
+                Employee.name,
+                Report.description,
+                Customer.name,
+                Customer.plate_number
+            ], search)
             query = query.join(
                 Report.employee  # Gunakan relationship yang sudah didefinisikan
             ).join(
                 Report.transaction  # Gunakan relationship ke transaction
             ).join(
                 Transaction.customer  # Gunakan relationship dari transaction ke customer
-            ).filter(
-                or_(
-                    Employee.name.ilike(search_filter),
-                    Report.description.ilike(search_filter),
-                    Customer.name.ilike(search_filter),
-                    Customer.plate_number.ilike(search_filter)
-                )
-            )
-        
-        # Get total count
-        total_data = query.count()
-        
-        # Calculate pagination
-        total_pages = (total_data + perPage - 1) // perPage
-        offset = (page - 1) * perPage
+            ).filter(search_filter)
         
-        # Get paginated data
-        reports = query.order_by(Report.created_at.desc()).offset(offset).limit(perPage).all()
+        # Get paginated data and total in one round trip
+        reports, meta = await paginate_async(
+            db, order_by_search(query, rank, sort, Report.created_at.desc()), page, perPage,
+            count_strategy=count_strategy or COUNT_WINDOW, table_name=Report.__tablename__,
+            filtered=any([karyawan_id, transaction_id, status, search])
+        )
         
         return {
             "reports": reports,
-            "meta": {
-                "page": page,
-                "perPage": perPage,
-                "totalPages": total_pages,
-                "totalData": total_data
-            }
+            "meta": meta
         }
 
     @staticmethod
-    def get_pending_approval(db: Session, page: int = 1, perPage: int = 10):
+    def get_pending_approval(db: Session, page: int = 1, perPage: int = 10, count_strategy: Optional[str] = None):
         query = db.query(Report).options(
             joinedload(Report.employee),
             joinedload(Report.transaction).joinedload(Transaction.customer)
         ).filter(Report.status == ReportStatus.PENDING)
         
-        # Get total count
-        total_data = query.count()
-        
-        # Calculate pagination
-        total_pages = (total_data + perPage - 1) // perPage
-        offset = (page - 1) * perPage
-        
-        # Get paginated data
-        reports = query.order_by(Report.created_at.asc()).offset(offset).limit(perPage).all()
+        # Get paginated data and total in one round trip
+        reports, meta = paginate(db, query, page, perPage, order_by=(Report.created_at.asc(),), count_strategy=count_strategy or COUNT_WINDOW)
         
         return {
             "reports": reports,
-            "meta": {
-                "page": page,
-                "perPage": perPage,
-                "totalPages": total_pages,
-                "totalData": total_data
-            }
+            "meta": meta
         }
 
     @staticmethod
@@ -148,13 +131,13 @@ class ReportRepository:
         ).all()
 
     @staticmethod
-    def get_pending_reports_by_transaction(db: Session, transaction_id: int):
-        return db.query(Report).filter(
-            and_(
+    def has_pending_reports(db: Session, transaction_id: int) -> bool:
+        return db.query(
+            exists().where(
                 Report.transaction_id == transaction_id,
-                Report.status.in_([ReportStatus.PENDING])
+                Report.status == ReportStatus.PENDING
             )
-        ).all()
+        ).scalar()
 
     @staticmethod
     def update(db: Session, report_id: int, **kwargs) -> Optional[Report]:
@@ -163,63 +146,118 @@ class ReportRepository:
             for key, value in kwargs.items():
                 if value is not None:
                     setattr(report, key, value)
-            db.commit()
-            db.refresh(report)
+            db.flush()
         return report
 
+    @staticmethod
+    def lock_editable(db: Session, report_id: int) -> Optional[Report]:
+        """Lock a report that can still be edited, reloading the status it has now"""
+        return db.query(Report).filter(
+            Report.id == report_id,
+            Report.status.in_([ReportStatus.PENDING, ReportStatus.REJECTED])
+        ).with_for_update().populate_existing().first()
+
     @staticmethod
     def update_status(db: Session, report_id: int, status: ReportStatus) -> Optional[Report]:
         report = db.query(Report).filter(Report.id == report_id).first()
         if report:
             report.status = status
-            db.commit()
-            db.refresh(report)
+            db.flush()
         return report
 
     @staticmethod
     def approve(db: Session, report_id: int, approver_id: int, approver_user_id: int) -> Optional[Report]:
-        report = db.query(Report).filter(Report.id == report_id).first()
+        # Row lock plus status guard, so a report is only ever reviewed once
+        report = db.query(Report).filter(
+            Report.id == report_id,
+            Report.status == ReportStatus.PENDING
+        ).with_for_update().first()
         if report:
             report.status = ReportStatus.APPROVED.value
             report.approved_by = approver_id
             report.approved_user_by = approver_user_id
             report.approved_at = datetime.utcnow()
             report.rejection_reason = None
-            db.commit()
-            db.refresh(report)
+            db.flush()
         return report
 
     @staticmethod
     def reject(db: Session, report_id: int, approver_id: int, approver_user_id: int, reason: str) -> Optional[Report]:
-        report = db.query(Report).filter(Report.id == report_id).first()
+        # Row lock plus status guard, so a report is only ever reviewed once
+        report = db.query(Report).filter(
+            Report.id == report_id,
+            Report.status == ReportStatus.PENDING
+        ).with_for_update().first()
         if report:
             report.status = ReportStatus.REJECTED.value
             report.approved_by = approver_id
             report.approved_user_by = approver_user_id
             report.approved_at = datetime.utcnow()
             report.rejection_reason = reason
-            db.commit()
-            db.refresh(report)
+            db.flush()
         return report
 
+    @staticmethod
+    def get_review_states(db: Session, report_ids: List[int]):
+        """Status and transaction of each report, without loading relationships"""
+        return db.query(Report.id, Report.status, Report.transaction_id).filter(Report.id.in_(report_ids)).all()
+
+    @staticmethod
+    def approve_many(db: Session, report_ids: List[int], approver_id: int, approver_user_id: int) -> List[int]:
+        """Approve the still pending reports in one statement, returns the approved ids."""
+        result = db.execute(
+            update(Report)
+            .where(Report.id.in_(report_ids), Report.status == ReportStatus.PENDING)
+            .values(
+                status=ReportStatus.APPROVED,
+                approved_by=approver_id,
+                approved_user_by=approver_user_id,
+                approved_at=datetime.utcnow(),
+                rejection_reason=None
+            )
+            .returning(Report.id)
+            .execution_options(synchronize_session=False)
+        )
+        return [row[0] for row in result]
+
+    @staticmethod
+    def reject_many(db: Session, report_ids: List[int], approver_id: int, approver_user_id: int, reason: str) -> List[int]:
+        """Reject the still pending reports in one statement, returns the rejected ids."""
+        result = db.execute(
+            update(Report)
+            .where(Report.id.in_(report_ids), Report.status == ReportStatus.PENDING)
+            .values(
+                status=ReportStatus.REJECTED,
+                approved_by=approver_id,
+                approved_user_by=approver_user_id,
+                approved_at=datetime.utcnow(),
+                rejection_reason=reason
+            )
+            .returning(Report.id)
+            .execution_options(synchronize_session=False)
+        )
+        return [row[0] for row in result]
+
     @staticmethod
     def delete(db: Session, report_id: int) -> bool:
         report = db.query(Report).filter(Report.id == report_id).first()
         if report:
             db.delete(report)
-            db.commit()
+            db.flush()
             return True
         return False
 
     @staticmethod
-    def get_all_for_export(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None):
-        query = db.query(Report).options(
-            joinedload(Report.employee),
-            joinedload(Report.approver),
-            joinedload(Report.user),
-            joinedload(Report.transaction).joinedload(Transaction.customer)
-        )
-        
+    def delete_pending(db: Session, report_id: int):
+        """Delete the report only while it is still pending, returns its transaction_id and image_url"""
+        return db.execute(
+            delete(Report)
+            .where(Report.id == report_id, Report.status == ReportStatus.PENDING)
+            .returning(Report.transaction_id, Report.image_url)
+        ).first()
+
+    @staticmethod
+    def _filter_for_export(query, start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None):
         # Apply date filters if provided
         if start_date:
             query = query.filter(Report.created_at >= start_date)
@@ -234,4 +272,39 @@ class ReportRepository:
             except ValueError:
                 pass  # Invalid status, ignore filter
         
-        return query.order_by(Report.created_at.desc()).all()
\ No newline at end of file
+        return query
+
+    @staticmethod
+    @read_only
+    def get_all_for_export(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None):
+        query = db.query(Report).options(
+            joinedload(Report.employee),
+            joinedload(Report.approver),
+            joinedload(Report.user),
+            joinedload(Report.transaction).joinedload(Transaction.customer)
+        )
+        query = ReportRepository._filter_for_export(query, start_date, end_date, status)
+        
+        return query.order_by(Report.created_at.desc()).all()
+
+    @staticmethod
+    @read_only
+    def get_export_version(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None):
+        """Row count and latest change of the rows an export would contain"""
+        query = db.query(
+            func.count(Report.id),
+            func.max(func.coalesce(Report.updated_at, Report.created_at))
+        )
+        query = ReportRepository._filter_for_export(query, start_date, end_date, status)
+        total, last_report_change = query.one()
+
+        # Employee names are part of the export as well
+        last_employee_change = db.query(
+            func.max(func.coalesce(Employee.updated_at, Employee.created_at))
+        ).scalar()
+
+        return {
+            "total": total,
+            "last_report_change": last_report_change,
+            "last_employee_change": last_employee_change
+        }
\ No newline at end of file
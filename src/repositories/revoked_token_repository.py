@@ -0,0 +1,27 @@
+# src/repositories/revoked_token_repository.py
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import List, Optional
+from src.models.revoked_token_model import RevokedToken
+
+class RevokedTokenRepository:
+    @staticmethod
+    def add(db: Session, jti: str, expires_at: datetime, user_id: Optional[int] = None) -> RevokedToken:
+        revoked = db.query(RevokedToken).filter(RevokedToken.jti == jti).first()
+        if revoked is None:
+            revoked = RevokedToken(jti=jti, expires_at=expires_at, user_id=user_id)
+            db.add(revoked)
+            db.flush()
+        return revoked
+
+    @staticmethod
+    def get_active_jtis(db: Session) -> List[str]:
+        return [jti for (jti,) in db.query(RevokedToken.jti).filter(
+            RevokedToken.expires_at > datetime.now(timezone.utc)
+        ).all()]
+
+    @staticmethod
+    def delete_expired(db: Session) -> int:
+        return db.query(RevokedToken).filter(
+            RevokedToken.expires_at <= datetime.now(timezone.utc)
+        ).delete(synchronize_session=False)
@@ -0,0 +1,47 @@
+# src/repositories/spooled_upload_repository.py
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Iterable, List
+from src.models.spooled_upload_model import SpooledUpload
+
+class SpooledUploadRepository:
+    @staticmethod
+    def add(db: Session, path: str) -> SpooledUpload:
+        spooled = db.query(SpooledUpload).filter(SpooledUpload.path == path).first()
+        if spooled is None:
+            spooled = SpooledUpload(path=path)
+            db.add(spooled)
+        else:
+            # Spooled again after it was lost, the file is back
+            spooled.lost_at = None
+        db.flush()
+        return spooled
+
+    @staticmethod
+    def get_pending_paths(db: Session) -> List[str]:
+        return [path for (path,) in db.query(SpooledUpload.path).filter(
+            SpooledUpload.lost_at.is_(None)
+        ).order_by(SpooledUpload.id).all()]
+
+    @staticmethod
+    def mark_lost(db: Session, path: str):
+        db.query(SpooledUpload).filter(SpooledUpload.path == path).update(
+            {SpooledUpload.lost_at: datetime.now(timezone.utc)}, synchronize_session=False
+        )
+        db.flush()
+
+    @staticmethod
+    def delete_paths(db: Session, paths: Iterable[str]) -> int:
+        paths = list(paths)
+        if not paths:
+            return 0
+        deleted_count = db.query(SpooledUpload).filter(SpooledUpload.path.in_(paths)).delete(synchronize_session=False)
+        db.flush()
+        return deleted_count
+
+    @staticmethod
+    def count_by_state(db: Session) -> dict:
+        rows = db.query(SpooledUpload.lost_at.is_(None), func.count(SpooledUpload.id)).group_by(SpooledUpload.lost_at.is_(None)).all()
+        counts = {bool(pending): count for pending, count in rows}
+        return {"pending": counts.get(True, 0), "lost": counts.get(False, 0)}
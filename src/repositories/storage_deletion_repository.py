@@ -0,0 +1,87 @@
+# src/repositories/storage_deletion_repository.py
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Set
+from src.models.storage_deletion_model import StorageDeletion
+from src.models.attendance_model import Attendance
+from src.models.employee_model import Employee
+from src.models.report_model import Report
+
+# Every column that stores a public image url
+IMAGE_URL_COLUMNS = (
+    Employee.image_url,
+    Report.image_url,
+    Attendance.checkin_image_url,
+    Attendance.checkout_image_url,
+)
+
+class StorageDeletionRepository:
+    @staticmethod
+    def enqueue(db: Session, paths: Iterable[str], delay_seconds: int = 0) -> int:
+        next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        deletions = [StorageDeletion(path=path, next_attempt_at=next_attempt_at) for path in dict.fromkeys(paths)]
+        db.add_all(deletions)
+        db.flush()
+        return len(deletions)
+
+    @staticmethod
+    def get_due(db: Session, limit: int, max_attempts: int) -> List[StorageDeletion]:
+        """Due deletions, rows claimed by another worker are skipped"""
+        return db.query(StorageDeletion).filter(
+            StorageDeletion.next_attempt_at <= datetime.now(timezone.utc),
+            StorageDeletion.attempts < max_attempts
+        ).order_by(StorageDeletion.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    @staticmethod
+    def postpone(db: Session, paths: List[str], delay_seconds: int) -> int:
+        """Push queued deletions of these paths back, waits for a worker that is removing them right now"""
+        next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        postponed_count = db.query(StorageDeletion).filter(
+            StorageDeletion.path.in_(paths),
+            StorageDeletion.next_attempt_at < next_attempt_at
+        ).update({StorageDeletion.next_attempt_at: next_attempt_at}, synchronize_session=False)
+        db.flush()
+        return postponed_count
+
+    @staticmethod
+    async def postpone_async(db: AsyncSession, paths: List[str], delay_seconds: int) -> int:
+        next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        result = await db.execute(
+            update(StorageDeletion)
+            .where(StorageDeletion.path.in_(paths), StorageDeletion.next_attempt_at < next_attempt_at)
+            .values(next_attempt_at=next_attempt_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def get_pending_paths(db: Session) -> Set[str]:
+        return {path for (path,) in db.query(StorageDeletion.path).all()}
+
+    @staticmethod
+    def delete_many(db: Session, deletion_ids: List[int]) -> int:
+        if not deletion_ids:
+            return 0
+        deleted_count = db.query(StorageDeletion).filter(StorageDeletion.id.in_(deletion_ids)).delete(synchronize_session=False)
+        db.flush()
+        return deleted_count
+
+    @staticmethod
+    def get_referenced_urls(db: Session, urls: Iterable[str]) -> List[str]:
+        """Which of these image urls are still stored in the database"""
+        urls = list(urls)
+        if not urls:
+            return []
+        referenced = []
+        for column in IMAGE_URL_COLUMNS:
+            referenced.extend(url for (url,) in db.query(column).filter(column.in_(urls)).all())
+        return referenced
+
+    @staticmethod
+    def get_all_referenced_urls(db: Session) -> Set[str]:
+        urls = set()
+        for column in IMAGE_URL_COLUMNS:
+            urls.update(url for (url,) in db.query(column).filter(column.isnot(None)).distinct().all())
+        return urls
@@ -1,11 +1,15 @@
 # src/repositories/transaction_repository.py
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from typing import Optional
+from typing import List, Optional
 from src.models.transaction_model import Transaction, TransactionStatus
 from src.models.customer_model import Customer
 from src.models.report_model import Report
+from src.utils.search import build_search, order_by_search
+from src.utils.pagination import COUNT_WINDOW, paginate_async
 from src.schemas.transaction_schema import TransactionCreateSchema, TransactionUpdateSchema
+from src.libs.read_replica import read_only
 
 class TransactionRepository:
     @staticmethod
@@ -17,8 +21,7 @@ class TransactionRepository:
             total_cost=transaction_data.total_cost
         )
         db.add(new_transaction)
-        db.commit()
-        db.refresh(new_transaction)
+        db.flush()
         return new_transaction
 
     @staticmethod
@@ -30,15 +33,17 @@ class TransactionRepository:
         ).filter(Transaction.id == transaction_id).first()
 
     @staticmethod
-    def get_all(db: Session, page: int = 1, perPage: int = 10, search: str = None, status: str = None, karyawan_id: Optional[int] = None):
-        query = db.query(Transaction).options(
+    @read_only
+    async def get_all(db: AsyncSession, page: int = 1, perPage: int = 10, search: str = None, status: str = None, karyawan_id: Optional[int] = None, sort: Optional[str] = None, count_strategy: Optional[str] = None):
+        query = select(Transaction).options(
             joinedload(Transaction.customer),
             joinedload(Transaction.reports)
         )
         
         # Filter by employee if not admin
+        # EXISTS instead of a join so each transaction is one row, keeping the totals exact
         if karyawan_id:
-            query = query.join(Report).filter(Report.employee_id == karyawan_id)
+            query = query.filter(Transaction.reports.any(Report.employee_id == karyawan_id))
         print(search)
         
         # Apply status filter for multiple values
@@ -56,36 +61,27 @@ class TransactionRepository:
             if valid_statuses:
                 query = query.filter(Transaction.status.in_(valid_statuses))
         
-        # Apply search filter
+        # Apply search filter (served by trigram indexes on PostgreSQL)
+        rank = None
         if search and search != "selected":
-            search_filter = f"%{search}%"
-            query = query.join(Customer).filter(
-                or_(
-                    Customer.name.ilike(search_filter),
-                    Customer.plate_number.ilike(search_filter),
-                    Transaction.complaint.ilike(search_filter),
-                    Customer.vehicle_type.ilike(search_filter)
-                )
-            )
+            search_filter, rank = build_search(db, [
+                Customer.name,
+                Customer.plate_number,
+                Transaction.complaint,
+                Customer.vehicle_type
+            ], search)
+            query = query.join(Customer).filter(search_filter)
         
-        # Get total count
-        total_data = query.count()
-        
-        # Calculate pagination
-        total_pages = (total_data + perPage - 1) // perPage
-        offset = (page - 1) * perPage
-        
-        # Get paginated data
-        transactions = query.order_by(Transaction.created_at.desc()).offset(offset).limit(perPage).all()
+        # Get paginated data and total in one round trip
+        transactions, meta = await paginate_async(
+            db, order_by_search(query, rank, sort, Transaction.created_at.desc()), page, perPage,
+            count_strategy=count_strategy or COUNT_WINDOW, table_name=Transaction.__tablename__,
+            filtered=any([karyawan_id, status, search and search != "selected"])
+        )
         
         return {
             "transactions": transactions,
-            "meta": {
-                "page": page,
-                "perPage": perPage,
-                "totalPages": total_pages,
-                "totalData": total_data
-            }
+            "meta": meta
         }
 
     @staticmethod
@@ -95,8 +91,7 @@ class TransactionRepository:
             update_data = transaction_data.dict(exclude_unset=True)
             for key, value in update_data.items():
                 setattr(transaction, key, value)
-            db.commit()
-            db.refresh(transaction)
+            db.flush()
         return transaction
 
     @staticmethod
@@ -104,17 +99,42 @@ class TransactionRepository:
         transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
         if transaction:
             transaction.status = status
-            db.commit()
-            db.refresh(transaction)
+            db.flush()
         return transaction
 
+    @staticmethod
+    def get_by_ids(db: Session, transaction_ids: List[int]) -> List[Transaction]:
+        return db.query(Transaction).filter(Transaction.id.in_(transaction_ids)).all()
+
+    @staticmethod
+    def update_status_many(db: Session, transaction_ids: List[int], status: TransactionStatus) -> int:
+        """Set the status of several transactions in one statement."""
+        if not transaction_ids:
+            return 0
+        result = db.execute(
+            update(Transaction)
+            .where(Transaction.id.in_(transaction_ids))
+            .values(status=status)
+            .execution_options(synchronize_session="fetch")
+        )
+        return result.rowcount
+
+    @staticmethod
+    def adjust_pending_report_count(db: Session, transaction_id: int, delta: int) -> Optional[int]:
+        """Atomically add delta to the pending report counter, returns the new value"""
+        return db.execute(
+            update(Transaction)
+            .where(Transaction.id == transaction_id)
+            .values(pending_report_count=Transaction.pending_report_count + delta)
+            .returning(Transaction.pending_report_count)
+        ).scalar()
+
     @staticmethod
     def update_cost(db: Session, transaction_id: int, total_cost: float) -> Optional[Transaction]:
         transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
         if transaction:
             transaction.total_cost = total_cost
-            db.commit()
-            db.refresh(transaction)
+            db.flush()
         return transaction
 
     @staticmethod
@@ -122,6 +142,6 @@ class TransactionRepository:
         transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
         if transaction:
             db.delete(transaction)
-            db.commit()
+            db.flush()
             return True
         return False
\ No newline at end of file
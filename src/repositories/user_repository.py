@@ -38,8 +38,7 @@ class UserRepository:
             is_admin=is_admin
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        db.flush()
         return new_user
     
     @staticmethod
@@ -124,8 +123,7 @@ class UserRepository:
             for key, value in kwargs.items():
                 if value is not None:
                     setattr(user, key, value)
-            db.commit()
-            db.refresh(user)
+            db.flush()
         return user
     
     @staticmethod
@@ -133,6 +131,6 @@ class UserRepository:
         user = db.query(User).filter(User.id == user_id).first()
         if user:
             db.delete(user)
-            db.commit()
+            db.flush()
             return True
         return False
\ No newline at end of file
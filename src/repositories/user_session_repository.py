@@ -0,0 +1,63 @@
+# src/repositories/user_session_repository.py
+from sqlalchemy import update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Optional
+from src.models.user_session_model import UserSession
+
+class UserSessionRepository:
+    @staticmethod
+    def create(db: Session, user_id: int, family_id: str, token_hash: str, expires_at: datetime) -> UserSession:
+        session = UserSession(user_id=user_id, family_id=family_id, token_hash=token_hash, expires_at=expires_at)
+        db.add(session)
+        db.flush()
+        return session
+
+    @staticmethod
+    def rotate(db: Session, token_hash: str) -> Optional[Row]:
+        """
+        Mark an active session as used and return (id, user_id, family_id), None when the token is
+        unknown, expired, revoked or already rotated. A single conditional
+        UPDATE, so two concurrent refreshes cannot both succeed.
+        """
+        now = datetime.now(timezone.utc)
+        return db.execute(
+            update(UserSession)
+            .where(
+                UserSession.token_hash == token_hash,
+                UserSession.rotated_at.is_(None),
+                UserSession.revoked_at.is_(None),
+                UserSession.expires_at > now
+            )
+            .values(rotated_at=now)
+            .returning(UserSession.id, UserSession.user_id, UserSession.family_id)
+        ).first()
+
+    @staticmethod
+    def get_by_token_hash(db: Session, token_hash: str) -> Optional[UserSession]:
+        return db.query(UserSession).filter(UserSession.token_hash == token_hash).first()
+
+    @staticmethod
+    def revoke_family(db: Session, family_id: str) -> int:
+        return db.execute(
+            update(UserSession)
+            .where(UserSession.family_id == family_id, UserSession.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        ).rowcount
+
+    @staticmethod
+    def revoke_user(db: Session, user_id: int) -> int:
+        return db.execute(
+            update(UserSession)
+            .where(UserSession.user_id == user_id, UserSession.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        ).rowcount
+
+    @staticmethod
+    def delete_expired(db: Session, user_id: int) -> int:
+        """Expired rows are no longer needed for reuse detection"""
+        return db.query(UserSession).filter(
+            UserSession.user_id == user_id,
+            UserSession.expires_at <= datetime.now(timezone.utc)
+        ).delete(synchronize_session=False)
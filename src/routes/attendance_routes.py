@@ -1,12 +1,14 @@
 # src/routers/attendance_router.py
 from fastapi import APIRouter, Depends, File, Form, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import List, Optional
 from src.controllers.attendance_controller import AttendanceController
 from src.middlewares.catch_wrapper import catch_exceptions
 from src.middlewares.admin_middleware import get_current_user, require_admin
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
+from src.utils.pagination import COUNT_STRATEGY_PATTERN
 from src.schemas.attendance_schema import AttendanceDeleteRequest
 
 router = APIRouter()
@@ -18,7 +20,7 @@ async def checkin(
     latitude: float = Form(...),
     longitude: float = Form(...),
     employee_id: Optional[int] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await AttendanceController.checkin(image, latitude, longitude, employee_id, db)
 
@@ -29,7 +31,7 @@ async def checkout(
     latitude: float = Form(...),
     longitude: float = Form(...),
     employee_id: Optional[int] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await AttendanceController.checkout(image, latitude, longitude, employee_id, db)
 
@@ -39,10 +41,11 @@ async def get_all_attendance(
     page: int = Query(1, ge=1),
     perPage: int = Query(10, ge=1, le=100),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    count: Optional[str] = Query(None, pattern=COUNT_STRATEGY_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    return await AttendanceController.get_all_attendance(page, perPage, search, db, current_user)
+    return await AttendanceController.get_all_attendance(page, perPage, search, db, current_user, count)
 
 @router.get("/{attendance_id}")
 @catch_exceptions
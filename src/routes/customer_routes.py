@@ -6,6 +6,7 @@ from src.controllers.customer_controller import CustomerController
 from src.middlewares.catch_wrapper import catch_exceptions
 from src.middlewares.admin_middleware import get_current_user, require_admin
 from src.config.database import get_db
+from src.utils.pagination import COUNT_STRATEGY_PATTERN
 from src.schemas.customer_schema import CustomerCreateSchema, CustomerUpdateSchema
 
 router = APIRouter()
@@ -36,11 +37,12 @@ async def get_all_customers(
     page: int = Query(1, ge=1),
     perPage: int = Query(10, ge=1),
     search: Optional[str] = Query(None),
+    count: Optional[str] = Query(None, pattern=COUNT_STRATEGY_PATTERN),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all customers with pagination and search"""
-    return await CustomerController.get_all_customers(page, perPage, search, db)
+    return await CustomerController.get_all_customers(page, perPage, search, count, db)
 
 @router.get("/{customer_id}")
 @catch_exceptions
@@ -1,11 +1,13 @@
 from datetime import date
 from typing import Optional
 from fastapi import APIRouter, Depends, File, Form, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from src.controllers.employee_controller import EmployeeController
 from src.middlewares.catch_wrapper import catch_exceptions
 from src.middlewares.admin_middleware import require_admin
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
+from src.utils.pagination import COUNT_STRATEGY_PATTERN
 
 router = APIRouter()
 
@@ -25,10 +27,11 @@ async def get_all_employees(
     page: int = Query(1, ge=1),
     perPage: int = Query(10, ge=1, le=100),
     search: str = Query(None),
+    count: Optional[str] = Query(None, pattern=COUNT_STRATEGY_PATTERN),
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
-    return await EmployeeController.get_all_employees(page, perPage, search, db)
+    return await EmployeeController.get_all_employees(page, perPage, search, count, db)
 
 @router.get("/{employee_id}")
 @catch_exceptions
@@ -81,6 +84,6 @@ async def delete_employee(
 @catch_exceptions
 async def verify_face_route(
     image: UploadFile = File(...), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await EmployeeController.verify_face(image, db)
\ No newline at end of file
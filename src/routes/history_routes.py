@@ -1,11 +1,13 @@
 # src/routers/history_router.py
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.controllers.history_controller import HistoryController
 from src.middlewares.catch_wrapper import catch_exceptions
 from src.middlewares.admin_middleware import get_current_user, require_admin
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
+from src.utils.pagination import COUNT_STRATEGY_PATTERN
 from src.schemas.history_schema import HistoryCreateSchema
 
 router = APIRouter()
@@ -17,12 +19,13 @@ async def get_all_histories(
     perPage: int = Query(10, ge=1, le=100),
     transaction_id: Optional[int] = Query(None),
     employee_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    count: Optional[str] = Query(None, pattern=COUNT_STRATEGY_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all history records with filtering"""
     return await HistoryController.get_all_histories(
-        page, perPage, transaction_id, employee_id, current_user, db
+        page, perPage, transaction_id, employee_id, current_user, count, db
     )
 
 @router.get("/recent")
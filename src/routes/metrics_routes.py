@@ -0,0 +1,43 @@
+# src/routes/metrics_routes.py
+from fastapi import APIRouter, Depends
+from src.controllers.metrics_controller import MetricsController
+from src.middlewares.catch_wrapper import catch_exceptions
+from src.middlewares.admin_middleware import require_admin
+
+router = APIRouter()
+
+@router.get("/storage")
+@catch_exceptions
+async def get_storage_metrics(current_user: dict = Depends(require_admin)):
+    """Storage retries, circuit breaker state and deferred uploads (per process)"""
+    return await MetricsController.get_storage_metrics()
+
+@router.get("/password-hashing")
+@catch_exceptions
+async def get_password_hash_metrics(current_user: dict = Depends(require_admin)):
+    """bcrypt pool queue wait and run time (per process)"""
+    return await MetricsController.get_password_hash_metrics()
+
+@router.get("/sync-pool")
+@catch_exceptions
+async def get_sync_pool_metrics(current_user: dict = Depends(require_admin)):
+    """Queue wait and run time of sync service calls from async handlers (per process)"""
+    return await MetricsController.get_sync_pool_metrics()
+
+@router.get("/admission")
+@catch_exceptions
+async def get_admission_metrics(current_user: dict = Depends(require_admin)):
+    """Rate limited and shed requests, heavy route concurrency (per process)"""
+    return await MetricsController.get_admission_metrics()
+
+@router.get("/database-pool")
+@catch_exceptions
+async def get_database_pool_metrics(current_user: dict = Depends(require_admin)):
+    """Checked out and overflow connections, checkout wait time (per process)"""
+    return await MetricsController.get_database_pool_metrics()
+
+@router.get("/queries")
+@catch_exceptions
+async def get_query_metrics(current_user: dict = Depends(require_admin)):
+    """SQL query count and database time per route, most expensive first (per process)"""
+    return await MetricsController.get_query_metrics()
@@ -1,12 +1,17 @@
 # src/routers/report_router.py
 from fastapi import APIRouter, Depends, File, Form, Query, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional
 from src.controllers.report_controller import ReportController
 from src.middlewares.catch_wrapper import catch_exceptions
 from src.middlewares.admin_middleware import get_current_user, mush_not_admin_have_employee, require_admin
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
+from src.schemas.report_schema import ReportBatchReviewSchema, ReportUploadTicketSchema
+from src.utils.error import AppError
+from src.utils.message_code import MESSAGE_CODE
+from src.utils.pagination import COUNT_STRATEGY_PATTERN
 
 router = APIRouter()
 
@@ -18,15 +23,27 @@ async def create_pending_report(
     start_time: Optional[datetime] = Form(None),
     end_time: Optional[datetime] = Form(None),
     image: Optional[UploadFile] = File(None),
+    image_key: Optional[str] = Form(None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(mush_not_admin_have_employee)
 ):
-    """Karyawan buat pending laporan per pekerjaan"""
+    """Karyawan buat pending laporan per pekerjaan, foto dikirim sebagai file atau image_key dari upload ticket"""
+    if image and image_key:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Send either image or image_key, not both")
     return await ReportController.create_pending_report(
         transaction_id, current_user, 
-        description, start_time, end_time, image, db
+        description, start_time, end_time, image, db, image_key
     )
 
+@router.post("/upload-ticket")
+@catch_exceptions
+async def create_upload_ticket(
+    body: ReportUploadTicketSchema,
+    current_user: dict = Depends(mush_not_admin_have_employee)
+):
+    """Karyawan minta upload url untuk upload foto laporan langsung ke storage"""
+    return await ReportController.create_upload_ticket(current_user, body.content_type)
+
 @router.get("/")
 @catch_exceptions
 async def get_all_reports(
@@ -35,18 +52,42 @@ async def get_all_reports(
     search: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     transaction_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    sort: Optional[str] = Query(None, pattern="^(latest|relevance)$"),
+    count: Optional[str] = Query(None, pattern=COUNT_STRATEGY_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all reports with filtering"""
+    """Get all reports with filtering, sort=relevance mengurutkan hasil search berdasarkan kemiripan"""
     karyawan_id = None
     if not current_user.get("is_admin", False):
         karyawan_id = current_user.get("karyawan_id")
 
     return await ReportController.get_all_reports(
-        page, perPage, search, status, transaction_id, karyawan_id, db
+        page, perPage, search, status, transaction_id, karyawan_id, sort, count, db
     )
 
+@router.post("/batch/approve")
+@catch_exceptions
+async def approve_reports_batch(
+    body: ReportBatchReviewSchema,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Admin approve banyak report sekaligus, hasil per report dikembalikan"""
+    return await ReportController.approve_reports_batch(body.report_ids, current_user, db)
+
+@router.post("/batch/reject")
+@catch_exceptions
+async def reject_reports_batch(
+    body: ReportBatchReviewSchema,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Admin reject banyak report sekaligus dengan alasan yang sama"""
+    if not body.reason or not body.reason.strip():
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Rejection reason is required when rejecting report")
+    return await ReportController.reject_reports_batch(body.report_ids, current_user, body.reason.strip(), db)
+
 # @router.get("/pending-approval")
 # @catch_exceptions
 # async def get_pending_reports(
@@ -76,13 +117,16 @@ async def update_report(
     start_time: Optional[datetime] = Form(None),
     end_time: Optional[datetime] = Form(None),
     image: Optional[UploadFile] = File(None),
+    image_key: Optional[str] = Form(None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(mush_not_admin_have_employee)
 ):
     """Karyawan update pending report (hanya bisa edit pending/rejected)"""
+    if image and image_key:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Send either image or image_key, not both")
     return await ReportController.update_report(
         report_id, current_user.get("karyawan_id"),
-        description, start_time, end_time, image, db
+        description, start_time, end_time, image, db, image_key
     )
 
 @router.post("/{report_id}/submit")
@@ -154,4 +198,34 @@ async def export_reports_excel(
     current_user: dict = Depends(require_admin)
 ):
     """Export reports to Excel"""
-    return await ReportController.export_reports_excel(start_date, end_date, status, db)
\ No newline at end of file
+    return await ReportController.export_reports_excel(start_date, end_date, status, db)
+
+@router.post("/export/jobs")
+@catch_exceptions
+async def submit_export_job(
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Queue Excel export di background, hasil identik dipakai ulang dari cache"""
+    return await ReportController.submit_export_job(start_date, end_date, status, db)
+
+@router.get("/export/jobs/{job_id}")
+@catch_exceptions
+async def get_export_job(
+    job_id: str,
+    current_user: dict = Depends(require_admin)
+):
+    """Poll status dan progress export job"""
+    return await ReportController.get_export_job(job_id)
+
+@router.get("/export/jobs/{job_id}/download")
+@catch_exceptions
+async def download_export_job(
+    job_id: str,
+    current_user: dict = Depends(require_admin)
+):
+    """Download hasil export job"""
+    return await ReportController.download_export_job(job_id)
@@ -0,0 +1,40 @@
+# src/routes/storage_routes.py
+from fastapi import APIRouter, Query, Request
+from src.config.settings import UPLOAD_MAX_BYTES
+from src.libs.storage import get_storage
+from src.libs.upload_ticket import content_type_for_path
+from src.middlewares.catch_wrapper import catch_exceptions
+from src.utils.error import AppError
+from src.utils.message_code import MESSAGE_CODE
+from src.utils.response import handle_response
+
+# Signed upload endpoint of the local storage backend, same layout as Supabase
+router = APIRouter()
+
+@router.put("/{bucket}/{path:path}")
+@catch_exceptions
+async def upload_signed_object(bucket: str, path: str, request: Request, token: str = Query(...)):
+    """Terima upload langsung dari client dengan token dari upload ticket"""
+    storage = get_storage()
+    if bucket != storage.bucket or not storage.verify_upload_token(path, token):
+        raise AppError(403, MESSAGE_CODE.FORBIDDEN, "Invalid or expired upload token")
+    # Stored as the type the ticket was issued for, whatever the client sends
+    content_type = content_type_for_path(path)
+    if not content_type:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Format file tidak didukung!")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > UPLOAD_MAX_BYTES:
+        raise AppError(413, MESSAGE_CODE.BAD_REQUEST, "File terlalu besar")
+
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > UPLOAD_MAX_BYTES:
+            raise AppError(413, MESSAGE_CODE.BAD_REQUEST, "File terlalu besar")
+        chunks.append(chunk)
+    if not size:
+        raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "File kosong")
+
+    await storage.upload(path, b"".join(chunks), content_type)
+    return handle_response(200, MESSAGE_CODE.SUCCESS, "Object uploaded successfully", {"Key": f"{bucket}/{path}"})
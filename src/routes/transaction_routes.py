@@ -1,11 +1,13 @@
 # src/routers/transaction_router.py
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.controllers.transaction_controller import TransactionController
 from src.middlewares.catch_wrapper import catch_exceptions
 from src.middlewares.admin_middleware import get_current_user, require_admin
-from src.config.database import get_db
+from src.config.database import get_async_db, get_db
+from src.utils.pagination import COUNT_STRATEGY_PATTERN
 from src.schemas.transaction_schema import (
     TransactionCalculateCostSchema,
     TransactionCreateSchema, 
@@ -32,12 +34,14 @@ async def get_all_transactions(
     perPage: int = Query(10, ge=1, le=9999999999),
     search: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    sort: Optional[str] = Query(None, pattern="^(latest|relevance)$"),
+    count: Optional[str] = Query(None, pattern=COUNT_STRATEGY_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all transactions with filtering"""
+    """Get all transactions with filtering, sort=relevance mengurutkan hasil search berdasarkan kemiripan"""
     return await TransactionController.get_all_transactions(
-        page, perPage, search, status, current_user, db
+        page, perPage, search, status, current_user, sort, count, db
     )
 
 @router.get("/{transaction_id}")
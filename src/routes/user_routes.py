@@ -6,20 +6,32 @@ from src.middlewares.admin_middleware import get_current_user, require_admin
 from src.middlewares.catch_wrapper import catch_exceptions
 from src.config.database import get_db
 from src.middlewares.jwt_auth_middleware import get_current_user_or_none
-from src.schemas.user_schema import UserRegisterSchema, UserLoginSchema, UserResetPasswordSchema, UserUpdateSchema
+from src.schemas.user_schema import UserRegisterSchema, UserLoginSchema, UserRefreshTokenSchema, UserResetPasswordSchema, UserUpdateSchema
 
 router = APIRouter()
 
 @router.post("/auth/register")
 @catch_exceptions
-def register_route(user_data: UserRegisterSchema, current_user: Optional[dict] = Depends(get_current_user_or_none), db: Session = Depends(get_db)):
+async def register_route(user_data: UserRegisterSchema, current_user: Optional[dict] = Depends(get_current_user_or_none), db: Session = Depends(get_db)):
     is_admin = current_user["is_admin"] if current_user else False
-    return UserController.register(user_data, is_admin, db)
+    return await UserController.register(user_data, is_admin, db)
 
 @router.post("/auth/login")
 @catch_exceptions
-def login_route(user_data: UserLoginSchema, db: Session = Depends(get_db)):
-    return UserController.login(user_data, db)
+async def login_route(user_data: UserLoginSchema, db: Session = Depends(get_db)):
+    return await UserController.login(user_data, db)
+
+@router.post("/auth/refresh")
+@catch_exceptions
+async def refresh_route(refresh_data: UserRefreshTokenSchema, db: Session = Depends(get_db)):
+    """Access token baru dari refresh token, tanpa login ulang"""
+    return await UserController.refresh(refresh_data, db)
+
+@router.post("/auth/logout")
+@catch_exceptions
+async def logout_route(refresh_data: UserRefreshTokenSchema, current_user: Optional[dict] = Depends(get_current_user_or_none), db: Session = Depends(get_db)):
+    """Akhiri sesi, access token yang dikirim ikut dicabut"""
+    return await UserController.logout(refresh_data, current_user, db)
 
 @router.get("/")
 @catch_exceptions
@@ -1,6 +1,6 @@
 # src/schemas/report_schema.py
 from pydantic import BaseModel, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -36,6 +36,30 @@ class ReportStatusUpdateSchema(BaseModel):
             raise ValueError('Rejection reason is required when rejecting report')
         return v
 
+class ReportBatchReviewSchema(BaseModel):
+    report_ids: List[int]
+    reason: Optional[str] = None
+
+    @validator('report_ids')
+    def validate_report_ids(cls, v):
+        if not v:
+            raise ValueError('At least one report id is required')
+        if len(v) > 500:
+            raise ValueError('At most 500 reports can be reviewed at once')
+        return list(dict.fromkeys(v))  # Drop duplicates, keep order
+
+class ReportUploadTicketSchema(BaseModel):
+    content_type: str
+
+    @validator('content_type')
+    def validate_content_type(cls, v):
+        v = v.strip().lower()
+        if v == "image/jpg":
+            v = "image/jpeg"
+        if v not in ("image/jpeg", "image/png", "image/webp"):
+            raise ValueError('content_type must be image/jpeg, image/png or image/webp')
+        return v
+
 class ReportResponseSchema(BaseModel):
     id: int
     transaction_id: int
@@ -14,6 +14,9 @@ class UserLoginSchema(BaseModel):
     login: str  # bisa email atau username
     password: str
     
+class UserRefreshTokenSchema(BaseModel):
+    refresh_token: str = Field(..., min_length=1)
+
 class UserUpdateSchema(BaseModel):
     username: Optional[str] = Field(None, min_length=3, max_length=100)
     email: Optional[EmailStr] = None
@@ -1,23 +1,26 @@
 # src/services/attendance_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 from src.services.employee_service import EmployeeService
 from src.services.location_service import LocationService
 from src.repositories.attendance_repository import AttendanceRepository
 from src.libs.supabase import upload_image_to_supabase
+from src.libs.image_processing import PROFILE_ATTENDANCE, attach_variant_urls
+from src.services.storage_cleanup_service import StorageCleanupService
 from src.utils.error import AppError
 from src.utils.message_code import MESSAGE_CODE
 
 class AttendanceService:
     @staticmethod
-    async def checkin(db: Session, image_data: bytes, latitude: float, longitude: float, employee_id: Optional[int]):
+    async def checkin(db: AsyncSession, image_data: bytes, latitude: float, longitude: float, employee_id: Optional[int]):
         """
         Process check-in with face verification and location validation
         """
         try:
             # 1. Verify face
-            face_result = EmployeeService.verify_face(db, image_data, employee_id)
+            face_result = await EmployeeService.verify_face(db, image_data, employee_id)
             employee_id = face_result["id"]
             
             # 2. Validate location
@@ -25,26 +28,26 @@ class AttendanceService:
             
             # 3. Check if already checked in today
             today = date.today()
-            existing_attendance = AttendanceRepository.get_by_employee_and_date(db, employee_id, today)
+            existing_attendance = await AttendanceRepository.get_by_employee_and_date(db, employee_id, today)
             
             if existing_attendance and existing_attendance.checkin_time:
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Already checked in today")
             
             # 4. Upload image to storage
-            image_url = await upload_image_to_supabase(image_data)
+            image_url = await upload_image_to_supabase(image_data, PROFILE_ATTENDANCE, StorageCleanupService.image_hold(db))
             if isinstance(image_url, AppError):
                 raise image_url
             
             # 5. Create or update attendance record
             if existing_attendance:
                 # Update existing record
-                attendance = AttendanceRepository.update_checkin(
+                attendance = await AttendanceRepository.update_checkin(
                     db, existing_attendance.id, datetime.now(), 
                     latitude, longitude, image_url
                 )
             else:
                 # Create new record
-                attendance = AttendanceRepository.create_checkin(
+                attendance = await AttendanceRepository.create_checkin(
                     db, employee_id, today, datetime.now(),
                     latitude, longitude, image_url
                 )
@@ -66,13 +69,13 @@ class AttendanceService:
             raise
 
     @staticmethod
-    async def checkout(db: Session, image_data: bytes, latitude: float, longitude: float, employee_id: Optional[int]):
+    async def checkout(db: AsyncSession, image_data: bytes, latitude: float, longitude: float, employee_id: Optional[int]):
         """
         Process check-out with face verification and location validation
         """
         try:
             # 1. Verify face
-            face_result = EmployeeService.verify_face(db, image_data, employee_id)
+            face_result = await EmployeeService.verify_face(db, image_data, employee_id)
             employee_id = face_result["id"]
             
             # 2. Validate location
@@ -80,7 +83,7 @@ class AttendanceService:
             
             # 3. Check if already checked in today
             today = date.today()
-            attendance = AttendanceRepository.get_by_employee_and_date(db, employee_id, today)
+            attendance = await AttendanceRepository.get_by_employee_and_date(db, employee_id, today)
             
             if not attendance or not attendance.checkin_time:
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Must check-in first before check-out")
@@ -89,12 +92,12 @@ class AttendanceService:
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Already checked out today")
             
             # 4. Upload image to storage
-            image_url = await upload_image_to_supabase(image_data)
+            image_url = await upload_image_to_supabase(image_data, PROFILE_ATTENDANCE, StorageCleanupService.image_hold(db))
             if isinstance(image_url, AppError):
                 raise image_url
             
             # 5. Update attendance record with checkout
-            updated_attendance = AttendanceRepository.update_checkout(
+            updated_attendance = await AttendanceRepository.update_checkout(
                 db, attendance.id, datetime.now(),
                 latitude, longitude, image_url
             )
@@ -131,8 +134,11 @@ class AttendanceService:
     #     return AttendanceRepository.get_all(db, page, perPage, employee_id, start_date, end_date)
     
     @staticmethod
-    def get_all_attendance(db: Session, page: int = 1, perPage: int = 10, search: str = None, employee_id: Optional[int] = None):
-        return AttendanceRepository.get_all(db, page, perPage, search, employee_id)
+    async def get_all_attendance(db: AsyncSession, page: int = 1, perPage: int = 10, search: str = None, employee_id: Optional[int] = None, count_strategy: Optional[str] = None):
+        result = await AttendanceRepository.get_all(db, page, perPage, search, employee_id, count_strategy)
+        attach_variant_urls(result["attendances"], "checkin_image_url", "checkin_")
+        attach_variant_urls(result["attendances"], "checkout_image_url", "checkout_")
+        return result
 
     @staticmethod
     def get_attendance_by_id(db: Session, attendance_id: int, employee_id: int = None):
@@ -142,4 +148,29 @@ class AttendanceService:
         attendance = AttendanceRepository.get_by_id(db, attendance_id, employee_id)
         if not attendance:
             raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Attendance record not found")
-        return attendance
\ No newline at end of file
+        return attendance
+
+    @staticmethod
+    def delete_multiple_attendances(db: Session, attendance_ids: List[int]):
+        """
+        Delete attendance records, their photos are removed by the storage cleanup worker
+        """
+        if not attendance_ids:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "No attendance ids provided")
+
+        attendances = AttendanceRepository.get_by_ids(db, attendance_ids)
+        if not attendances:
+            raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Attendance records not found")
+
+        image_urls = []
+        for attendance in attendances:
+            image_urls.extend([attendance.checkin_image_url, attendance.checkout_image_url])
+
+        deleted_count = AttendanceRepository.delete_multiple(db, [attendance.id for attendance in attendances])
+        StorageCleanupService.enqueue_image_deletions(db, image_urls)
+
+        return {
+            "deleted_count": deleted_count,
+            "deleted_ids": [attendance.id for attendance in attendances],
+            "not_found_ids": sorted(set(attendance_ids) - {attendance.id for attendance in attendances})
+        }
\ No newline at end of file
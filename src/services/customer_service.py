@@ -8,7 +8,7 @@ from src.utils.message_code import MESSAGE_CODE
 
 class CustomerService:
     @staticmethod
-    async def create_customer(db: Session, customer_data: CustomerCreateSchema):
+    def create_customer(db: Session, customer_data: CustomerCreateSchema):
         """Create new customer"""
         try:
             # Check if plate number already exists
@@ -29,8 +29,8 @@ class CustomerService:
         return CustomerRepository.get_by_plate_number(db, plate_number.upper())
 
     @staticmethod
-    def get_all_customers(db: Session, page: int = 1, perPage: int = 10, search: str = None):
-        return CustomerRepository.get_all(db, page, perPage, search)
+    def get_all_customers(db: Session, page: int = 1, perPage: int = 10, search: str = None, count_strategy: Optional[str] = None):
+        return CustomerRepository.get_all(db, page, perPage, search, count_strategy)
 
     @staticmethod
     def get_customer_by_id(db: Session, customer_id: int):
@@ -40,7 +40,7 @@ class CustomerService:
         return customer
 
     @staticmethod
-    async def update_customer(db: Session, customer_id: int, customer_data: CustomerUpdateSchema):
+    def update_customer(db: Session, customer_id: int, customer_data: CustomerUpdateSchema):
         try:
             existing_customer = CustomerRepository.get_by_id(db, customer_id)
             if not existing_customer:
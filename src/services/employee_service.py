@@ -1,11 +1,17 @@
+import asyncio
 from io import BytesIO
 import os
+import threading
 import dlib
 import numpy as np
 from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from src.repositories.employee_repository import EmployeeRepository
-from src.libs.supabase import delete_images_from_supabase, upload_image_to_supabase
+from src.libs.concurrency import run_sync
+from src.libs.supabase import upload_image_to_supabase
+from src.services.storage_cleanup_service import StorageCleanupService
+from src.libs.image_processing import PROFILE_EMPLOYEE, image_executor
 from src.utils.error import AppError
 from src.utils.message_code import MESSAGE_CODE
 from typing import Optional, List
@@ -20,6 +26,8 @@ FACE_REC_MODEL_PATH = os.path.join(MODEL_DIR, "dlib_face_recognition_resnet_mode
 detector = dlib.get_frontal_face_detector()
 sp = dlib.shape_predictor(SP_MODEL_PATH)
 face_rec_model = dlib.face_recognition_model_v1(FACE_REC_MODEL_PATH)
+# The recognition network keeps per-call buffers, one descriptor at a time
+_face_rec_lock = threading.Lock()
 
 class EmployeeService:
     # @staticmethod
@@ -27,8 +35,8 @@ class EmployeeService:
     #     return EmployeeRepository.get_all(db, skip, limit)
     
     @staticmethod
-    def get_all_employees(db: Session, page: int = 1, perPage: int = 10, search: str = None):
-        return EmployeeRepository.get_all(db, page, perPage, search)
+    def get_all_employees(db: Session, page: int = 1, perPage: int = 10, search: str = None, count_strategy: Optional[str] = None):
+        return EmployeeRepository.get_all(db, page, perPage, search, count_strategy)
 
     @staticmethod
     def get_employee_by_id(db: Session, employee_id: int):
@@ -40,100 +48,92 @@ class EmployeeService:
     @staticmethod
     async def create_employee(db: Session, name: str, email: str, date_of_birth, divisi: str, address: str, image_data: bytes = None):
         # Check if email already exists
-        if EmployeeRepository.get_by_email(db, email):
+        if await run_sync(EmployeeRepository.get_by_email, db, email):
             raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Email already exists")
 
-        face_encoding = EmployeeService.extract_face_encoding(image_data)
+        face_encoding = await EmployeeService.extract_face_encoding(image_data)
         if isinstance(face_encoding, AppError):
             raise face_encoding
-        image_url = await upload_image_to_supabase(image_data)
+        image_url = await upload_image_to_supabase(image_data, PROFILE_EMPLOYEE, StorageCleanupService.image_hold(db))
         if isinstance(image_url, AppError):
             raise image_url
         
 
-        employee = EmployeeRepository.create(db, name, email, date_of_birth, divisi, address, image_url, face_encoding)
+        employee = await run_sync(EmployeeRepository.create, db, name, email, date_of_birth, divisi, address, image_url, face_encoding)
         return employee
 
     @staticmethod
     async def update_employee(db: Session, employee_id: int, name: str = None, email: str = None, 
                             date_of_birth=None, divisi: str = None, address: str = None, image_data: bytes = None):
-        employee = EmployeeRepository.get_by_id(db, employee_id)
-        if not employee:
-            raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Employee not found")
-
-        # Check if email already exists (but not for current employee)
-        if email and email != employee.email:
-            existing_employee = EmployeeRepository.get_by_email(db, email)
-            if existing_employee:
-                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Email already exists")
+        employee = await run_sync(EmployeeService._check_employee_update, db, employee_id, email)
 
         image_url = employee.image_url
         face_encoding = employee.face_encoding
         if image_data:
-            await delete_images_from_supabase([image_url])
-            face_encoding = EmployeeService.extract_face_encoding(image_data)
+            face_encoding = await EmployeeService.extract_face_encoding(image_data)
             if isinstance(face_encoding, AppError):
                 raise face_encoding
-            image_url = await upload_image_to_supabase(image_data)
+            image_url = await upload_image_to_supabase(image_data, PROFILE_EMPLOYEE, StorageCleanupService.image_hold(db))
             if isinstance(image_url, AppError):
                 raise image_url
+            # Old photo is removed by the cleanup worker once this update commits
+            if employee.image_url and employee.image_url != image_url:
+                await run_sync(StorageCleanupService.enqueue_image_deletions, db, [employee.image_url])
 
-        updated_employee = EmployeeRepository.update(
-            db, employee_id,
+        updated_employee = await run_sync(
+            EmployeeRepository.update, db, employee_id,
             name=name, email=email, date_of_birth=date_of_birth,
             divisi=divisi, address=address, image_url=image_url, face_encoding=face_encoding
         )
         return updated_employee
 
+    @staticmethod
+    def _check_employee_update(db: Session, employee_id: int, email: Optional[str]):
+        employee = EmployeeRepository.get_by_id(db, employee_id)
+        if not employee:
+            raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Employee not found")
+
+        # Check if email already exists (but not for current employee)
+        if email and email != employee.email:
+            existing_employee = EmployeeRepository.get_by_email(db, email)
+            if existing_employee:
+                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Email already exists")
+        return employee
+
     @staticmethod
     def delete_employee(db: Session, employee_id: int):
         employee = EmployeeRepository.get_by_id(db, employee_id)
         if not employee:
             raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Employee not found")
-        
-        #  delete image from supabase
-        if employee.image_url:
-            delete_images_from_supabase([employee.image_url])
 
         # Check if employee has associated user
         if hasattr(employee, 'user') and employee.user:
             raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Cannot delete employee with associated user account")
 
+        image_url = employee.image_url
         success = EmployeeRepository.delete(db, employee_id)
         if not success:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, "Failed to delete employee")
+
+        #  delete image from storage in the background, only once the employee is gone
+        StorageCleanupService.enqueue_image_deletions(db, [image_url])
         return {"message": "Employee deleted successfully"}
     
     @staticmethod
-    def verify_face(db: Session, image_data: bytes, employee_id: Optional[int] = None):
+    async def verify_face(db: AsyncSession, image_data: bytes, employee_id: Optional[int] = None):
         """
         Verify face and return employee data if match found
         """
         try:
-            # Convert image data to numpy array
-            image = Image.open(BytesIO(image_data)).convert("RGB")
-            img = np.array(image)
-
-            # Detect faces
-            faces = detector(img)
-            if len(faces) == 0:
-                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "No face detected in the image")
-
-            # Get face encoding
-            shape = sp(img, faces[0])
-            face_encoding = np.array(face_rec_model.compute_face_descriptor(img, shape))
+            # Decode, detect and encode in the image pool, the event loop keeps serving
+            face_encoding = await asyncio.get_running_loop().run_in_executor(
+                image_executor, EmployeeService.compute_face_descriptor, image_data
+            )
 
             # Get all employees with face data
-            # employees = EmployeeRepository.get_all_with_face_data(db)
-            if employee_id:
-                employee = EmployeeRepository.get_by_id(db, employee_id)
-                if not employee or not employee.face_encoding:
-                    raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Employee not found or no face data available")
-                employees = [employee]
-            else:
-                employees = EmployeeRepository.get_all_with_face_data(db)
-                if not employees:
-                    raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "No registered faces found")
+            employees = await EmployeeRepository.get_all_with_face_data(db, employee_id)
+            if employee_id and not employees:
+                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Employee not found or no face data available")
                 
             if not employees:
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "No registered faces found")
@@ -179,21 +179,33 @@ class EmployeeService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Face verification failed: {str(e)}")
 
     @staticmethod
-    def extract_face_encoding(image_data: bytes):
+    def compute_face_descriptor(image_data: bytes) -> np.ndarray:
+        """
+        Descriptor of the first face in the photo, CPU bound (run it in image_executor)
+        """
+        # Convert image data to numpy array
+        image = Image.open(BytesIO(image_data)).convert("RGB")
+        img = np.array(image)
+
+        # Detect faces
+        faces = detector(img)
+        if len(faces) == 0:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "No face detected in the image")
+
+        shape = sp(img, faces[0])
+        with _face_rec_lock:
+            return np.array(face_rec_model.compute_face_descriptor(img, shape))
+
+    @staticmethod
+    async def extract_face_encoding(image_data: bytes):
         """
         Extract face encoding from image data for storage
         """
         try:
-            image = Image.open(BytesIO(image_data)).convert("RGB")
-            img = np.array(image)
+            face_encoding = await asyncio.get_running_loop().run_in_executor(
+                image_executor, EmployeeService.compute_face_descriptor, image_data
+            )
 
-            faces = detector(img)
-            if len(faces) == 0:
-                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "No face detected in the image")
-
-            shape = sp(img, faces[0])
-            face_encoding = np.array(face_rec_model.compute_face_descriptor(img, shape))
-            
             # Convert to comma-separated string for storage
             return ','.join(map(str, face_encoding))
 
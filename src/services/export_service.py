@@ -0,0 +1,282 @@
+# src/services/export_service.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional
+import pandas as pd
+from sqlalchemy.orm import Session
+from src.config.database import session_scope
+from src.config.settings import EXPORT_DIR, EXPORT_JOB_TTL_SECONDS, EXPORT_WORKERS
+from src.repositories.report_repository import ReportRepository
+from src.utils.error import AppError
+from src.utils.message_code import MESSAGE_CODE
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+JOB_QUEUED = "QUEUED"
+JOB_RUNNING = "RUNNING"
+JOB_DONE = "DONE"
+JOB_FAILED = "FAILED"
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Jobs are keyed by their cache key, so identical submissions share one job
+_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+class ExportService:
+    @staticmethod
+    def build_filename(start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None) -> str:
+        filename = "reports_export"
+        if start_date:
+            filename += f"_from_{start_date}"
+        if end_date:
+            filename += f"_to_{end_date}"
+        if status:
+            filename += f"_status_{status}"
+        return filename + ".xlsx"
+
+    @staticmethod
+    def build_cache_key(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None) -> str:
+        """Cache key from the filters plus the latest change of the exported rows"""
+        version = ReportRepository.get_export_version(db, start_date, end_date, status)
+        payload = {
+            "type": "reports",
+            "start_date": start_date,
+            "end_date": end_date,
+            "status": status,
+            "total": version["total"],
+            "last_report_change": str(version["last_report_change"]),
+            "last_employee_change": str(version["last_employee_change"]),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def build_reports_workbook(reports, on_progress=None) -> bytes:
+        data = []
+        total = len(reports)
+        for index, report in enumerate(reports, start=1):
+            data.append({
+                'ID': report.id,
+                'Transaction ID': report.transaction_id,
+                'Employee ID': report.employee_id,
+                'Employee Name': report.employee.name if report.employee else '',
+                'Description': report.description,
+                'Start Time': report.start_time.strftime('%Y-%m-%d %H:%M:%S') if report.start_time else '',
+                'End Time': report.end_time.strftime('%Y-%m-%d %H:%M:%S') if report.end_time else '',
+                'Status': report.status.value,
+                'Approved By': report.approver.name if report.approver else '',
+                'Approved At': report.approved_at.strftime('%Y-%m-%d %H:%M:%S') if report.approved_at else '',
+                'Rejection Reason': report.rejection_reason or '',
+                'Image URL': report.image_url or '',
+                'Created At': report.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'Updated At': report.updated_at.strftime('%Y-%m-%d %H:%M:%S') if report.updated_at else ''
+            })
+            if on_progress and index % 500 == 0:
+                on_progress(index / total)
+
+        df = pd.DataFrame(data)
+
+        excel_buffer = BytesIO()
+        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name='Reports', index=False)
+        return excel_buffer.getvalue()
+
+    @staticmethod
+    def artifact_path(cache_key: str) -> str:
+        return os.path.join(EXPORT_DIR, f"{cache_key}.xlsx")
+
+    @staticmethod
+    def read_artifact(cache_key: str) -> Optional[bytes]:
+        try:
+            with open(ExportService.artifact_path(cache_key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def write_artifact(cache_key: str, content: bytes, meta: dict):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = ExportService.artifact_path(cache_key)
+
+        # Write to a temporary file first so readers never see a partial workbook
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        with open(f"{path}.json", "w") as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def touch_artifact(cache_key: str):
+        """Mark a cached artifact as used, pruning goes by last use"""
+        path = ExportService.artifact_path(cache_key)
+        for artifact_path in (path, f"{path}.json"):
+            try:
+                os.utime(artifact_path)
+            except OSError:
+                continue
+
+    @staticmethod
+    def read_artifact_meta(cache_key: str) -> Optional[dict]:
+        try:
+            with open(f"{ExportService.artifact_path(cache_key)}.json") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def export_reports_excel(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None):
+        """Build the export synchronously, reusing a cached artifact when the data is unchanged"""
+        cache_key = ExportService.build_cache_key(db, start_date, end_date, status)
+        content = ExportService.read_artifact(cache_key)
+        if content is None:
+            reports = ReportRepository.get_all_for_export(db, start_date, end_date, status)
+            content = ExportService.build_reports_workbook(reports)
+            ExportService.write_artifact(cache_key, content, {
+                "filename": ExportService.build_filename(start_date, end_date, status),
+                "row_count": len(reports),
+                "created_at": time.time()
+            })
+        else:
+            ExportService.touch_artifact(cache_key)
+        return content, ExportService.build_filename(start_date, end_date, status)
+
+    @staticmethod
+    def submit_report_export(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None, status: Optional[str] = None):
+        """Queue a report export and return its job"""
+        cache_key = ExportService.build_cache_key(db, start_date, end_date, status)
+        filename = ExportService.build_filename(start_date, end_date, status)
+        ExportService._prune_jobs()
+
+        with _jobs_lock:
+            job = _jobs.get(cache_key)
+            if job and job["status"] != JOB_FAILED:
+                if job["status"] == JOB_DONE:
+                    ExportService.touch_artifact(cache_key)
+                return ExportService._serialize(job)
+
+            job = {
+                "job_id": cache_key,
+                "status": JOB_QUEUED,
+                "progress": 0.0,
+                "cached": False,
+                "filename": filename,
+                "row_count": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+
+            meta = ExportService.read_artifact_meta(cache_key)
+            if meta and os.path.exists(ExportService.artifact_path(cache_key)):
+                job.update(status=JOB_DONE, progress=1.0, cached=True, row_count=meta.get("row_count"), finished_at=time.time())
+                ExportService.touch_artifact(cache_key)
+                _jobs[cache_key] = job
+                return ExportService._serialize(job)
+
+            _jobs[cache_key] = job
+
+        _executor.submit(ExportService._run_report_export, cache_key, start_date, end_date, status)
+        return ExportService._serialize(job)
+
+    @staticmethod
+    def get_job(job_id: str):
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Export job not found")
+
+        with _jobs_lock:
+            job = _jobs.get(job_id)
+            if job:
+                return ExportService._serialize(job)
+
+        # Another worker process may have produced the artifact
+        meta = ExportService.read_artifact_meta(job_id)
+        if meta and os.path.exists(ExportService.artifact_path(job_id)):
+            return ExportService._serialize({
+                "job_id": job_id,
+                "status": JOB_DONE,
+                "progress": 1.0,
+                "cached": True,
+                "filename": meta.get("filename"),
+                "row_count": meta.get("row_count"),
+                "error": None,
+                "created_at": meta.get("created_at"),
+                "finished_at": meta.get("created_at"),
+            })
+
+        raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Export job not found")
+
+    @staticmethod
+    def get_job_artifact(job_id: str):
+        job = ExportService.get_job(job_id)
+        if job["status"] != JOB_DONE:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Export job is not finished yet")
+
+        path = ExportService.artifact_path(job_id)
+        if not os.path.exists(path):
+            raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Export file no longer available")
+        ExportService.touch_artifact(job_id)
+        return path, job["filename"]
+
+    @staticmethod
+    def _run_report_export(cache_key: str, start_date: Optional[str], end_date: Optional[str], status: Optional[str]):
+        ExportService._update_job(cache_key, status=JOB_RUNNING, progress=0.05)
+        try:
+            with session_scope() as db:
+                reports = ReportRepository.get_all_for_export(db, start_date, end_date, status)
+                ExportService._update_job(cache_key, progress=0.3, row_count=len(reports))
+
+                # Row building takes the progress from 30% to 80%, writing the workbook the rest
+                content = ExportService.build_reports_workbook(
+                    reports,
+                    on_progress=lambda ratio: ExportService._update_job(cache_key, progress=round(0.3 + ratio * 0.5, 2))
+                )
+            ExportService._update_job(cache_key, progress=0.9)
+
+            ExportService.write_artifact(cache_key, content, {
+                "filename": ExportService.build_filename(start_date, end_date, status),
+                "row_count": len(reports),
+                "created_at": time.time()
+            })
+            ExportService._update_job(cache_key, status=JOB_DONE, progress=1.0, finished_at=time.time())
+        except Exception as e:
+            ExportService._update_job(cache_key, status=JOB_FAILED, error=str(e), finished_at=time.time())
+
+    @staticmethod
+    def _update_job(cache_key: str, **changes):
+        with _jobs_lock:
+            job = _jobs.get(cache_key)
+            if job:
+                job.update(changes)
+
+    @staticmethod
+    def _prune_jobs():
+        deadline = time.time() - EXPORT_JOB_TTL_SECONDS
+        with _jobs_lock:
+            for job_id in [job_id for job_id, job in _jobs.items() if job["finished_at"] and job["finished_at"] < deadline]:
+                del _jobs[job_id]
+
+        # Artifacts of superseded data versions are never requested again, reuse renews the mtime
+        if not os.path.isdir(EXPORT_DIR):
+            return
+        for name in os.listdir(EXPORT_DIR):
+            path = os.path.join(EXPORT_DIR, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _serialize(job: dict) -> dict:
+        result = dict(job)
+        result["download_url"] = f"/api/reports/export/jobs/{job['job_id']}/download" if job["status"] == JOB_DONE else None
+        return result
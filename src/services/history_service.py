@@ -1,4 +1,5 @@
 # src/services/history_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.repositories.history_repository import HistoryRepository
@@ -12,7 +13,7 @@ from src.utils.message_code import MESSAGE_CODE
 
 class HistoryService:
     @staticmethod
-    async def create_history(
+    def create_history(
         db: Session, 
         history_data: HistoryCreateSchema, 
         created_by: Optional[int] = None
@@ -55,15 +56,16 @@ class HistoryService:
         return HistoryRepository.get_by_transaction_id(db, transaction_id)
 
     @staticmethod
-    def get_all_histories(
-        db: Session, 
+    async def get_all_histories(
+        db: AsyncSession,
         page: int = 1, 
         perPage: int = 10, 
         transaction_id: Optional[int] = None,
-        employee_id: Optional[int] = None
+        employee_id: Optional[int] = None,
+        count_strategy: Optional[str] = None
     ):
         """Get all history records with pagination and filtering"""
-        return HistoryRepository.get_all(db, page, perPage, transaction_id, employee_id)
+        return await HistoryRepository.get_all(db, page, perPage, transaction_id, employee_id, count_strategy)
 
     @staticmethod
     def get_history_by_id(db: Session, history_id: int):
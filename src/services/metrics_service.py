@@ -0,0 +1,45 @@
+# src/services/metrics_service.py
+import asyncio
+from src.config.database import async_engine, engine, pool_metrics
+from src.libs.concurrency import sync_executor
+from src.config.settings import DB_SLOW_QUERY_MS
+from src.libs.query_stats import route_query_stats
+from src.libs.read_replica import replica_metrics
+from src.libs.security import password_hash_metrics
+from src.middlewares.rate_limit_middleware import get_admission_metrics
+from src.libs.supabase import spooled_upload_counts, storage_breaker, storage_metrics
+
+class MetricsService:
+    @staticmethod
+    async def get_storage_metrics():
+        """Breaker state and retry counters of this process"""
+        return {
+            "breaker": storage_breaker.snapshot(),
+            "counters": dict(storage_metrics),
+            "spooled_uploads": await asyncio.to_thread(spooled_upload_counts),
+        }
+
+    @staticmethod
+    def get_password_hash_metrics():
+        """bcrypt pool size, queue wait and run time of this process"""
+        return password_hash_metrics()
+
+    @staticmethod
+    def get_sync_pool_metrics():
+        """Queue wait and run time of the threads running sync service code"""
+        return sync_executor.metrics()
+
+    @staticmethod
+    def get_admission_metrics():
+        """Rate limit rejections and the heavy route gate of this process"""
+        return get_admission_metrics()
+
+    @staticmethod
+    def get_database_pool_metrics():
+        """Connection pool usage and checkout wait of this process, the async engine pool and replicas included"""
+        return {**pool_metrics(engine), "async": pool_metrics(async_engine.sync_engine), "replicas": replica_metrics()}
+
+    @staticmethod
+    def get_query_metrics():
+        """Query count and database time per route of this process"""
+        return {"slow_query_ms": DB_SLOW_QUERY_MS, "routes": route_query_stats.snapshot()}
@@ -1,14 +1,20 @@
 # src/services/report_service.py
+from collections import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from src.repositories.report_repository import ReportRepository
 from src.repositories.transaction_repository import TransactionRepository
 from src.repositories.employee_repository import EmployeeRepository
 from src.repositories.history_repository import HistoryRepository
 from src.models.report_model import ReportStatus
 from src.models.transaction_model import TransactionStatus
+from src.libs.concurrency import run_sync
 from src.libs.supabase import upload_image_to_supabase
+from src.libs.upload_ticket import create_upload_ticket, resolve_upload_ticket
+from src.libs.image_processing import PROFILE_REPORT, attach_variant_urls
+from src.services.storage_cleanup_service import StorageCleanupService
 from src.repositories.user_repository import UserRepository
 from src.utils.error import AppError
 from src.utils.message_code import MESSAGE_CODE
@@ -22,57 +28,82 @@ class ReportService:
         description: str,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        image_data: bytes = None
+        image_data: bytes = None,
+        image_key: Optional[str] = None
     ):
         """Karyawan buat pending laporan"""
         try:
-            # Verify transaction exists and is in progress
-            transaction = TransactionRepository.get_by_id(db, transaction_id)
-            if not transaction:
-                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Transaction not found")
-            
-            if transaction.status not in [TransactionStatus.PENDING, TransactionStatus.PROSES]:
-                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Cannot create report for this transaction status")
-
-            # If transaction is pending, automatically start work
-            if transaction.status == TransactionStatus.PENDING:
-                TransactionRepository.update_status(db, transaction_id, TransactionStatus.PROSES.value)
-                HistoryRepository.create(
-                    db, transaction_id, TransactionStatus.PROSES.value, 
-                    f"Work started automatically when creating first report", current_user.get("user_id")
-                )
-
-            # Verify employee exists
-            employee = EmployeeRepository.get_by_id(db, current_user.get("karyawan_id"))
-            if not employee:
-                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "User not found")
+            await run_sync(ReportService._start_transaction_work, db, transaction_id, current_user)
 
             image_url = None
-            if image_data:
-                image_url = await upload_image_to_supabase(image_data)
+            if image_key:
+                image_url = await resolve_upload_ticket(image_key, current_user.get("karyawan_id"))
+            elif image_data:
+                image_url = await upload_image_to_supabase(image_data, PROFILE_REPORT, StorageCleanupService.image_hold(db))
                 if isinstance(image_url, AppError):
                     raise image_url
 
-            report = ReportRepository.create_pending(
-                db, transaction_id, current_user.get("karyawan_id"), description, 
-                start_time, end_time, image_url
+            return await run_sync(
+                ReportService._save_pending_report, db, transaction_id, current_user.get("karyawan_id"),
+                description, start_time, end_time, image_url
             )
-            
-            return report
         except AppError:
             raise
         except Exception as e:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to create pending report: {str(e)}")
 
     @staticmethod
-    def get_all_reports(db: Session, page: int = 1, perPage: int = 10, search: str = None, status: str = None, transaction_id: int = None, karyawan_id: Optional[int] = None):
+    def _start_transaction_work(db: Session, transaction_id: int, current_user: dict):
+        """Check the transaction and the employee before the photo upload"""
+        # Verify transaction exists and is in progress
+        transaction = TransactionRepository.get_by_id(db, transaction_id)
+        if not transaction:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Transaction not found")
+        
+        if transaction.status not in [TransactionStatus.PENDING, TransactionStatus.PROSES]:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Cannot create report for this transaction status")
+
+        # If transaction is pending, automatically start work
+        if transaction.status == TransactionStatus.PENDING:
+            TransactionRepository.update_status(db, transaction_id, TransactionStatus.PROSES.value)
+            HistoryRepository.create(
+                db, transaction_id, TransactionStatus.PROSES.value, 
+                f"Work started automatically when creating first report", current_user.get("user_id")
+            )
+
+        # Verify employee exists
+        employee = EmployeeRepository.get_by_id(db, current_user.get("karyawan_id"))
+        if not employee:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "User not found")
+
+    @staticmethod
+    def _save_pending_report(db: Session, transaction_id: int, employee_id: int, description: str,
+                             start_time: Optional[datetime], end_time: Optional[datetime], image_url: Optional[str]):
+        report = ReportRepository.create_pending(
+            db, transaction_id, employee_id, description, 
+            start_time, end_time, image_url
+        )
+        TransactionRepository.adjust_pending_report_count(db, transaction_id, 1)
+        return report
+
+    @staticmethod
+    async def create_upload_ticket(current_user: dict, content_type: str):
+        """Upload ticket, foto laporan diupload client langsung ke storage"""
+        return await create_upload_ticket(current_user.get("karyawan_id"), content_type)
+
+    @staticmethod
+    async def get_all_reports(db: AsyncSession, page: int = 1, perPage: int = 10, search: str = None, status: str = None, transaction_id: int = None, karyawan_id: Optional[int] = None, sort: Optional[str] = None, count_strategy: Optional[str] = None):
         """Get all reports with filtering"""
-        return ReportRepository.get_all(db, page, perPage, search, status, transaction_id, karyawan_id)
+        result = await ReportRepository.get_all(db, page, perPage, search, status, transaction_id, karyawan_id, sort, count_strategy)
+        attach_variant_urls(result["reports"])
+        return result
 
     @staticmethod
     def get_pending_reports(db: Session, page: int = 1, perPage: int = 10):
         """Get reports yang butuh approval"""
-        return ReportRepository.get_pending_approval(db, page, perPage)
+        result = ReportRepository.get_pending_approval(db, page, perPage)
+        attach_variant_urls(result["reports"])
+        return result
 
     @staticmethod
     def get_report_by_id(db: Session, report_id: int):
@@ -90,47 +121,74 @@ class ReportService:
         description: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        image_data: bytes = None
+        image_data: bytes = None,
+        image_key: Optional[str] = None
     ):
         """Update pending report (hanya bisa edit pending/rejected)"""
         try:
-            existing_report = ReportRepository.get_by_id(db, report_id)
-            if not existing_report:
-                raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Report not found")
+            await run_sync(ReportService._check_editable, db, report_id, employee_id)
 
-            # Check ownership
-            if existing_report.employee_id != employee_id:
-                raise AppError(403, MESSAGE_CODE.FORBIDDEN, "You can only edit your own reports")
-
-            # Only allow editing PENDING or rejected reports
-            if existing_report.status not in [ReportStatus.PENDING, ReportStatus.REJECTED]:
-                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Can only edit PENDING or rejected reports")
-
-            image_url = existing_report.image_url
-            if image_data:
-                image_url = await upload_image_to_supabase(image_data)
-                if isinstance(image_url, AppError):
-                    raise image_url
+            new_image_url = None
+            if image_key or image_data:
+                if image_key:
+                    new_image_url = await resolve_upload_ticket(image_key, employee_id)
+                else:
+                    new_image_url = await upload_image_to_supabase(image_data, PROFILE_REPORT, StorageCleanupService.image_hold(db))
+                if isinstance(new_image_url, AppError):
+                    raise new_image_url
 
-            # Reset status to PENDING if it was rejected
-            new_status = ReportStatus.PENDING
-
-            updated_report = ReportRepository.update(
-                db, report_id,
-                description=description,
-                start_time=start_time,
-                end_time=end_time,
-                image_url=image_url,
-                status=new_status,
-                rejection_reason=None  # Clear rejection reason
+            return await run_sync(
+                ReportService._apply_report_update, db, report_id,
+                description, start_time, end_time, new_image_url
             )
-            
-            return updated_report
         except AppError:
             raise
         except Exception as e:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to update report: {str(e)}")
 
+    @staticmethod
+    def _check_editable(db: Session, report_id: int, employee_id: int):
+        existing_report = ReportRepository.get_by_id(db, report_id)
+        if not existing_report:
+            raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Report not found")
+
+        # Check ownership
+        if existing_report.employee_id != employee_id:
+            raise AppError(403, MESSAGE_CODE.FORBIDDEN, "You can only edit your own reports")
+
+        # Only allow editing PENDING or rejected reports
+        if existing_report.status not in [ReportStatus.PENDING, ReportStatus.REJECTED]:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Can only edit PENDING or rejected reports")
+
+    @staticmethod
+    def _apply_report_update(db: Session, report_id: int, description: Optional[str], start_time: Optional[datetime],
+                             end_time: Optional[datetime], new_image_url: Optional[str]):
+        # The report may have been approved or edited during the upload, decide on the locked row
+        locked_report = ReportRepository.lock_editable(db, report_id)
+        if not locked_report:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Can only edit PENDING or rejected reports")
+
+        image_url = locked_report.image_url
+        if new_image_url:
+            if image_url and image_url != new_image_url:
+                StorageCleanupService.enqueue_image_deletions(db, [image_url])
+            image_url = new_image_url
+
+        # Reset status to PENDING if it was rejected
+        new_status = ReportStatus.PENDING
+        if locked_report.status == ReportStatus.REJECTED:
+            TransactionRepository.adjust_pending_report_count(db, locked_report.transaction_id, 1)
+
+        return ReportRepository.update(
+            db, report_id,
+            description=description,
+            start_time=start_time,
+            end_time=end_time,
+            image_url=image_url,
+            status=new_status,
+            rejection_reason=None  # Clear rejection reason
+        )
+
     # @staticmethod
     # async def submit_report(db: Session, report_id: int, employee_id: int):
     #     """Submit pending report untuk approval"""
@@ -167,7 +225,7 @@ class ReportService:
     #         raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to submit report: {str(e)}")
 
     @staticmethod
-    async def approve_report(db: Session, report_id: int, current_user: dict):
+    def approve_report(db: Session, report_id: int, current_user: dict):
         """Admin approve report"""
         try:
             report = ReportRepository.get_by_id(db, report_id)
@@ -177,17 +235,19 @@ class ReportService:
             if report.status != ReportStatus.PENDING:
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Only pending reports can be approved")
 
-            # Get transaction info before approving
+            # Transaction is already loaded with the report
             transaction_id = report.transaction_id
-            transaction = TransactionRepository.get_by_id(db, transaction_id)
+            transaction = report.transaction
             if not transaction:
                 raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Transaction not found")
 
             # Approve the report
             updated_report = ReportRepository.approve(db, report_id, current_user.get("karyawan_id"), current_user.get("user_id"))
+            if not updated_report:
+                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Only pending reports can be approved")
             
-            # Check if there are still any pending reports for this transaction
-            remaining_pending_reports = ReportRepository.get_pending_reports_by_transaction(db, transaction_id)
+            # The counter tells how many reports of this transaction are still pending
+            remaining_pending_reports = TransactionRepository.adjust_pending_report_count(db, transaction_id, -1)
             
             # If no more pending reports, auto-finalize the transaction
             if not remaining_pending_reports:
@@ -214,7 +274,7 @@ class ReportService:
             return {
                 "report": updated_report,
                 "transaction_finalized": False,
-                "remaining_pending_reports": len(remaining_pending_reports) if remaining_pending_reports else 0
+                "remaining_pending_reports": remaining_pending_reports
             }
             
         except AppError:
@@ -223,7 +283,7 @@ class ReportService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to approve report: {str(e)}")
 
     @staticmethod
-    async def reject_report(db: Session, report_id: int, current_user: dict, reason: str):
+    def reject_report(db: Session, report_id: int, current_user: dict, reason: str):
         """Admin reject report dengan alasan"""
         try:
             report = ReportRepository.get_by_id(db, report_id)
@@ -234,6 +294,9 @@ class ReportService:
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Only pending reports can be rejected")
 
             updated_report = ReportRepository.reject(db, report_id, current_user.get("karyawan_id"), current_user.get("user_id"), reason)
+            if not updated_report:
+                raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Only pending reports can be rejected")
+            TransactionRepository.adjust_pending_report_count(db, report.transaction_id, -1)
             
             return updated_report
         except AppError:
@@ -241,6 +304,86 @@ class ReportService:
         except Exception as e:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to reject report: {str(e)}")
 
+    @staticmethod
+    def review_reports_batch(db: Session, report_ids: List[int], current_user: dict, approve: bool, reason: Optional[str] = None):
+        """Admin approve/reject banyak report sekaligus, di-commit sekali oleh request"""
+        action = "approved" if approve else "rejected"
+        try:
+            states = {state.id: state for state in ReportRepository.get_review_states(db, report_ids)}
+
+            results = {}
+            candidate_ids = []
+            for report_id in report_ids:
+                state = states.get(report_id)
+                if not state:
+                    results[report_id] = {"report_id": report_id, "success": False, "error": "Report not found"}
+                elif state.status != ReportStatus.PENDING:
+                    results[report_id] = {"report_id": report_id, "success": False, "error": f"Only pending reports can be {action}"}
+                else:
+                    candidate_ids.append(report_id)
+
+            # Set-based update; a report changed by a concurrent request drops out here
+            if approve:
+                reviewed_ids = ReportRepository.approve_many(db, candidate_ids, current_user.get("karyawan_id"), current_user.get("user_id")) if candidate_ids else []
+            else:
+                reviewed_ids = ReportRepository.reject_many(db, candidate_ids, current_user.get("karyawan_id"), current_user.get("user_id"), reason) if candidate_ids else []
+            reviewed = set(reviewed_ids)
+
+            for report_id in candidate_ids:
+                if report_id in reviewed:
+                    results[report_id] = {
+                        "report_id": report_id,
+                        "success": True,
+                        "status": (ReportStatus.APPROVED if approve else ReportStatus.REJECTED).value,
+                        "transaction_id": states[report_id].transaction_id
+                    }
+                else:
+                    results[report_id] = {"report_id": report_id, "success": False, "error": f"Only pending reports can be {action}"}
+
+            # One counter update per affected transaction
+            reviewed_per_transaction = Counter(states[report_id].transaction_id for report_id in reviewed)
+            pending_counts = {
+                transaction_id: TransactionRepository.adjust_pending_report_count(db, transaction_id, -count)
+                for transaction_id, count in sorted(reviewed_per_transaction.items())
+            }
+
+            # Auto-finalize once per affected transaction
+            transactions = []
+            if approve and reviewed:
+                finalize_ids = []
+                for transaction in TransactionRepository.get_by_ids(db, list(pending_counts)):
+                    remaining = pending_counts[transaction.id]
+                    summary = {"transaction_id": transaction.id, "transaction_finalized": False, "remaining_pending_reports": remaining}
+                    if remaining == 0 and transaction.status in [TransactionStatus.PENDING, TransactionStatus.PROSES]:
+                        if transaction.total_cost:
+                            finalize_ids.append(transaction.id)
+                            summary["transaction_finalized"] = True
+                        else:
+                            summary["error"] = "Total cost must be calculated before auto-finalizing transaction"
+                    transactions.append(summary)
+
+                TransactionRepository.update_status_many(db, finalize_ids, TransactionStatus.SELESAI.value)
+                HistoryRepository.create_many(
+                    db, finalize_ids, TransactionStatus.SELESAI.value,
+                    "Transaction auto-finalized after all reports approved", current_user.get("user_id")
+                )
+
+                finalized = {summary["transaction_id"] for summary in transactions if summary["transaction_finalized"]}
+                for result in results.values():
+                    if result["success"]:
+                        result["transaction_finalized"] = result["transaction_id"] in finalized
+
+            return {
+                "results": [results[report_id] for report_id in report_ids],
+                "transactions": transactions,
+                "processed": len(reviewed),
+                "failed": len(report_ids) - len(reviewed)
+            }
+        except AppError:
+            raise
+        except Exception as e:
+            raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to review reports: {str(e)}")
+
     @staticmethod
     def delete_report(db: Session, report_id: int, employee_id: int):
         """Delete pending report"""
@@ -253,12 +396,15 @@ class ReportService:
             raise AppError(403, MESSAGE_CODE.FORBIDDEN, "You can only delete your own reports")
 
         # Only allow deleting pending reports
-        if existing_report.status != ReportStatus.DRAFT:
+        if existing_report.status != ReportStatus.PENDING:
             raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Only pending reports can be deleted")
 
-        success = ReportRepository.delete(db, report_id)
-        if not success:
-            raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, "Failed to delete report")
+        # Conditional delete, a report approved in the meantime is left alone and not counted
+        deleted = ReportRepository.delete_pending(db, report_id)
+        if not deleted:
+            raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Only pending reports can be deleted")
+        TransactionRepository.adjust_pending_report_count(db, deleted.transaction_id, -1)
+        StorageCleanupService.enqueue_image_deletions(db, [deleted.image_url])
         
         return {"message": "Report deleted successfully"}
 
@@ -0,0 +1,157 @@
+# src/services/storage_cleanup_service.py
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.config.database import SessionLocal, session_scope
+from src.config.settings import (
+    STORAGE_CLEANUP_BATCH_SIZE, STORAGE_CLEANUP_ENABLED, STORAGE_CLEANUP_INTERVAL_SECONDS,
+    STORAGE_CLEANUP_MAX_ATTEMPTS, STORAGE_CLEANUP_RETRY_MAX_SECONDS, STORAGE_CLEANUP_RETRY_SECONDS, STORAGE_DELETION_GRACE_SECONDS,
+    STORAGE_ORPHAN_GRACE_SECONDS, STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS
+)
+from src.libs.concurrency import run_sync
+from src.libs.storage import get_storage
+from src.libs.supabase import UploadHold, image_object_paths, image_stem, image_urls_of_stems, remove_image_objects
+from src.repositories.spooled_upload_repository import SpooledUploadRepository
+from src.repositories.storage_deletion_repository import StorageDeletionRepository
+
+_worker_task: Optional[asyncio.Task] = None
+
+class StorageCleanupService:
+    @staticmethod
+    def enqueue_image_deletions(db: Session, image_urls: List[Optional[str]]) -> int:
+        """Queue images and their variants for removal, committed together with the caller's changes"""
+        return StorageDeletionRepository.enqueue(
+            db, image_object_paths([url for url in image_urls if url]), STORAGE_DELETION_GRACE_SECONDS
+        )
+
+    @staticmethod
+    def image_hold(db: Union[Session, AsyncSession]) -> UploadHold:
+        """
+        Hold for upload_image_to_supabase, in the caller's own transaction.
+
+        The url is not committed yet, so the worker's reference check cannot
+        see it. Pushing a queued deletion back locks its row until the caller
+        commits, and a worker already removing the object finishes first so
+        the upload puts it back. New content has no queued row and the update
+        matches nothing.
+        """
+        async def hold(paths: List[str]):
+            if isinstance(db, AsyncSession):
+                await StorageDeletionRepository.postpone_async(db, paths, STORAGE_DELETION_GRACE_SECONDS)
+            else:
+                await run_sync(StorageDeletionRepository.postpone, db, paths, STORAGE_DELETION_GRACE_SECONDS)
+        return hold
+
+    @staticmethod
+    async def process_due_deletions() -> int:
+        """Remove one batch of due objects with a single bulk call, returns the batch size"""
+        db = SessionLocal()
+        try:
+            # Rows stay locked until the commit, other workers skip them
+            deletions = await asyncio.to_thread(
+                StorageDeletionRepository.get_due, db, STORAGE_CLEANUP_BATCH_SIZE, STORAGE_CLEANUP_MAX_ATTEMPTS
+            )
+            if not deletions:
+                await asyncio.to_thread(db.rollback)
+                return 0
+
+            # Objects are content addressed, another row may have started using one again.
+            # Uncommitted ones are covered by the hold uploads put on the row (image_hold).
+            referenced_urls = await asyncio.to_thread(
+                StorageDeletionRepository.get_referenced_urls, db,
+                image_urls_of_stems({image_stem(deletion.path) for deletion in deletions})
+            )
+            storage = get_storage()
+            referenced = {image_stem(storage.path_from_url(url) or "") for url in referenced_urls}
+            removable = [deletion for deletion in deletions if image_stem(deletion.path) not in referenced]
+
+            try:
+                await remove_image_objects([deletion.path for deletion in removable])
+            except Exception as e:
+                StorageCleanupService._schedule_retry(removable, str(e))
+                await asyncio.to_thread(db.commit)
+                print(f"Warning: Failed to remove {len(removable)} storage objects: {str(e)}")
+                return len(deletions)
+
+            await asyncio.to_thread(StorageDeletionRepository.delete_many, db, [deletion.id for deletion in deletions])
+            # Their spool files went with them, they are removed rather than lost
+            await asyncio.to_thread(SpooledUploadRepository.delete_paths, db, [deletion.path for deletion in removable])
+            await asyncio.to_thread(db.commit)
+            return len(deletions)
+        except Exception:
+            await asyncio.to_thread(db.rollback)
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    async def sweep_orphans() -> int:
+        """Queue stored objects that no image url column points at anymore"""
+        objects = await get_storage().list_objects()
+        # Fresh uploads may belong to a request that has not committed yet
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=STORAGE_ORPHAN_GRACE_SECONDS)
+        candidates = [path for path, created_at in objects if created_at < cutoff]
+        if not candidates:
+            return 0
+        return await asyncio.to_thread(StorageCleanupService._enqueue_orphans, candidates)
+
+    @staticmethod
+    async def run_worker():
+        last_sweep = time.monotonic()
+        while True:
+            try:
+                # Keep draining while batches come back full
+                while await StorageCleanupService.process_due_deletions() >= STORAGE_CLEANUP_BATCH_SIZE:
+                    pass
+
+                if STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS and time.monotonic() - last_sweep >= STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS:
+                    last_sweep = time.monotonic()
+                    orphan_count = await StorageCleanupService.sweep_orphans()
+                    if orphan_count:
+                        print(f"Storage sweep queued {orphan_count} orphaned objects")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: Storage cleanup failed: {str(e)}")
+            await asyncio.sleep(STORAGE_CLEANUP_INTERVAL_SECONDS)
+
+    @staticmethod
+    def start_worker():
+        global _worker_task
+        if STORAGE_CLEANUP_ENABLED and _worker_task is None:
+            _worker_task = asyncio.create_task(StorageCleanupService.run_worker())
+
+    @staticmethod
+    async def stop_worker():
+        global _worker_task
+        if _worker_task is not None:
+            _worker_task.cancel()
+            try:
+                await _worker_task
+            except asyncio.CancelledError:
+                pass
+            _worker_task = None
+
+    @staticmethod
+    def _enqueue_orphans(candidates: List[str]) -> int:
+        storage = get_storage()
+        with session_scope() as db:
+            referenced = {
+                image_stem(storage.path_from_url(url) or "")
+                for url in StorageDeletionRepository.get_all_referenced_urls(db)
+            }
+            queued = StorageDeletionRepository.get_pending_paths(db)
+            orphans = [path for path in candidates if image_stem(path) not in referenced and path not in queued]
+            return StorageDeletionRepository.enqueue(db, orphans, STORAGE_DELETION_GRACE_SECONDS)
+
+    @staticmethod
+    def _schedule_retry(deletions: list, error: str):
+        now = datetime.now(timezone.utc)
+        for deletion in deletions:
+            deletion.attempts += 1
+            deletion.last_error = error[:1000]
+            delay = min(STORAGE_CLEANUP_RETRY_SECONDS * 2 ** (deletion.attempts - 1), STORAGE_CLEANUP_RETRY_MAX_SECONDS)
+            deletion.next_attempt_at = now + timedelta(seconds=delay)
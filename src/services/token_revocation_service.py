@@ -0,0 +1,65 @@
+# src/services/token_revocation_service.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from src.config.database import session_scope
+from src.config.settings import ACCESS_TOKEN_EXPIRE_MINUTES, TOKEN_REVOCATION_REFRESH_SECONDS
+from src.libs.revocation import revocation_list
+from src.repositories.revoked_token_repository import RevokedTokenRepository
+
+_worker_task: Optional[asyncio.Task] = None
+
+class TokenRevocationService:
+    @staticmethod
+    def revoke(db: Session, jti: str, user_id: Optional[int] = None):
+        """Revoke an access token, effective here at once and in other processes after their next reload"""
+        # No access token outlives this, the row can be purged afterwards
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
+        RevokedTokenRepository.add(db, jti, expires_at, user_id)
+        revocation_list.add(jti)
+
+    @staticmethod
+    def _load() -> list:
+        with session_scope() as db:
+            RevokedTokenRepository.delete_expired(db)
+            return RevokedTokenRepository.get_active_jtis(db)
+
+    @staticmethod
+    async def reload() -> int:
+        """Rebuild the in-memory list from the table, returns its size"""
+        revocation_list.replace(await asyncio.to_thread(TokenRevocationService._load))
+        return len(revocation_list)
+
+    @staticmethod
+    async def run_worker():
+        while True:
+            await asyncio.sleep(TOKEN_REVOCATION_REFRESH_SECONDS)
+            try:
+                await TokenRevocationService.reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the previous list until the database answers again
+                print(f"Warning: Token revocation reload failed: {str(e)}")
+
+    @staticmethod
+    async def start_worker():
+        global _worker_task
+        if _worker_task is None:
+            try:
+                await TokenRevocationService.reload()
+            except Exception as e:
+                print(f"Warning: Token revocation list not loaded: {str(e)}")
+            _worker_task = asyncio.create_task(TokenRevocationService.run_worker())
+
+    @staticmethod
+    async def stop_worker():
+        global _worker_task
+        if _worker_task is not None:
+            _worker_task.cancel()
+            try:
+                await _worker_task
+            except asyncio.CancelledError:
+                pass
+            _worker_task = None
@@ -1,4 +1,5 @@
 # src/services/transaction_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.repositories.transaction_repository import TransactionRepository
@@ -14,7 +15,7 @@ from src.utils.message_code import MESSAGE_CODE
 
 class TransactionService:
     @staticmethod
-    async def create_transaction(db: Session, transaction_data: TransactionCreateSchema, created_by: int):
+    def create_transaction(db: Session, transaction_data: TransactionCreateSchema, created_by: int):
         """Admin buat transaksi perbaikan baru"""
         try:
             # Verify customer exists
@@ -41,8 +42,8 @@ class TransactionService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to create transaction: {str(e)}")
 
     @staticmethod
-    def get_all_transactions(db: Session, page: int = 1, perPage: int = 10, search: str = None, status: str = None, karyawan_id: Optional[int] = None):
-        return TransactionRepository.get_all(db, page, perPage, search, status, karyawan_id)
+    async def get_all_transactions(db: AsyncSession, page: int = 1, perPage: int = 10, search: str = None, status: str = None, karyawan_id: Optional[int] = None, sort: Optional[str] = None, count_strategy: Optional[str] = None):
+        return await TransactionRepository.get_all(db, page, perPage, search, status, karyawan_id, sort, count_strategy)
 
     @staticmethod
     def get_transaction_by_id(db: Session, transaction_id: int):
@@ -52,7 +53,7 @@ class TransactionService:
         return transaction
 
     @staticmethod
-    async def update_transaction(db: Session, transaction_id: int, transaction_data: TransactionUpdateSchema, updated_by: int):
+    def update_transaction(db: Session, transaction_id: int, transaction_data: TransactionUpdateSchema, updated_by: int):
         try:
             existing_transaction = TransactionRepository.get_by_id(db, transaction_id)
             if not existing_transaction:
@@ -73,7 +74,7 @@ class TransactionService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to update transaction: {str(e)}")
 
     @staticmethod
-    async def update_transaction_status(db: Session, transaction_id: int, status_data: TransactionStatusUpdateSchema, updated_by: int):
+    def update_transaction_status(db: Session, transaction_id: int, status_data: TransactionStatusUpdateSchema, updated_by: int):
         try:
             transaction = TransactionRepository.get_by_id(db, transaction_id)
             if not transaction:
@@ -94,7 +95,7 @@ class TransactionService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to update transaction status: {str(e)}")
 
     @staticmethod
-    async def start_work(db: Session, transaction_id: int, employee_id: int):
+    def start_work(db: Session, transaction_id: int, employee_id: int):
         """Karyawan mulai pengerjaan - status menjadi proses"""
         try:
             transaction = TransactionRepository.get_by_id(db, transaction_id)
@@ -119,7 +120,7 @@ class TransactionService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to start work: {str(e)}")
 
     @staticmethod
-    async def calculate_total_cost(db: Session, transaction_id: int, total_cost: float, current_user: dict):
+    def calculate_total_cost(db: Session, transaction_id: int, total_cost: float, current_user: dict):
         """Admin input total cost untuk transaksi"""
         try:
             transaction = TransactionRepository.get_by_id(db, transaction_id)
@@ -147,7 +148,7 @@ class TransactionService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to calculate total cost: {str(e)}")
 
     @staticmethod
-    async def finalize_transaction(db: Session, transaction_id: int, current_user: dict):
+    def finalize_transaction(db: Session, transaction_id: int, current_user: dict):
         """Admin finalize transaction ke status selesai"""
         try:
             transaction = TransactionRepository.get_by_id(db, transaction_id)
@@ -155,8 +156,7 @@ class TransactionService:
                 raise AppError(404, MESSAGE_CODE.NOT_FOUND, "Transaction not found")
 
             # Check if all reports are approved
-            pending_reports = ReportRepository.get_pending_reports_by_transaction(db, transaction_id)
-            if pending_reports:
+            if ReportRepository.has_pending_reports(db, transaction_id):
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Cannot finalize transaction with pending reports")
 
             if not transaction.total_cost:
@@ -177,7 +177,7 @@ class TransactionService:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, f"Failed to finalize transaction: {str(e)}")
 
     @staticmethod
-    async def mark_as_paid(db: Session, transaction_id: int, marked_by: int):
+    def mark_as_paid(db: Session, transaction_id: int, marked_by: int):
         """Mark transaction as paid"""
         try:
             transaction = TransactionRepository.get_by_id(db, transaction_id)
@@ -1,16 +1,31 @@
+import uuid
+from typing import Optional
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from src.config.settings import ADMIN_KEY
+from src.config.settings import ADMIN_KEY, REFRESH_TOKEN_EXPIRE_DAYS
 from src.models.user_model import User
 from src.repositories.user_repository import UserRepository
 from src.repositories.employee_repository import EmployeeRepository
-from src.libs.security import hash_password, verify_password
-from src.libs.jwt import create_access_token
+from src.libs.concurrency import run_sync
+from src.libs.security import hash_password_async, verify_and_update_password
+from src.libs.jwt import create_access_token, create_refresh_token, hash_refresh_token
+from src.libs.session_cache import session_cache
+from src.repositories.user_session_repository import UserSessionRepository
+from src.services.token_revocation_service import TokenRevocationService
 from src.utils.error import AppError
 from src.utils.message_code import MESSAGE_CODE
 
 class UserService:
     @staticmethod
-    def register_user(db: Session, username: str, email: str, password: str, is_admin: bool = False, key_admin: str = None, user_is_admin: bool = False):
+    async def register_user(db: Session, username: str, email: str, password: str, is_admin: bool = False, key_admin: str = None, user_is_admin: bool = False):
+        # Lookups and the insert run in the sync pool, only bcrypt waits on the password pool
+        employee_id = await run_sync(UserService._check_registration, db, username, email, is_admin, key_admin, user_is_admin)
+        hashed_password = await hash_password_async(password)
+        return await run_sync(UserRepository.create, db, username, email, hashed_password, employee_id, is_admin)
+
+    @staticmethod
+    def _check_registration(db: Session, username: str, email: str, is_admin: bool, key_admin: Optional[str], user_is_admin: bool) -> Optional[int]:
+        """Validate a registration, returns the employee id the account belongs to"""
         # Check if username already exists
         if UserRepository.get_by_username(db, username):
             raise AppError(400, MESSAGE_CODE.BAD_REQUEST, "Username already exists")
@@ -40,29 +55,92 @@ class UserService:
             if existing_user:
                 raise AppError(400, MESSAGE_CODE.BAD_REQUEST, 
                             "Employee already has a user account")
-
-        hashed_password = hash_password(password)
-        # return
-        user = UserRepository.create(db, username, email, hashed_password, employee_id, is_admin)
-        return user
+        return employee_id
 
     @staticmethod
-    def authenticate_user(db: Session, login: str, password: str):
-        user = UserRepository.get_by_login(db, login)
-        if not user or not verify_password(password, user.password_hash):
+    async def authenticate_user(db: Session, login: str, password: str):
+        user = await run_sync(UserRepository.get_by_login, db, login)
+        if not user:
+            raise AppError(401, MESSAGE_CODE.UNAUTHORIZED, "Invalid credentials")
+
+        valid, new_hash = await verify_and_update_password(password, user.password_hash)
+        if not valid:
             raise AppError(401, MESSAGE_CODE.UNAUTHORIZED, "Invalid credentials")
+        return await run_sync(UserService._start_session, db, user, new_hash)
 
-        token_data = {
-            "sub": {
-                "id": user.id,
-                "username": user.username,
-                # "email": user.email,
-                "is_admin": user.is_admin,
-                "karyawan_id": user.karyawan_id
-            }
+    @staticmethod
+    def _start_session(db: Session, user: User, new_hash: Optional[str]) -> dict:
+        if new_hash:
+            # BCRYPT_ROUNDS changed since this password was stored
+            UserRepository.update(db, user.id, password_hash=new_hash)
+
+        UserSessionRepository.delete_expired(db, user.id)
+        result = UserService._issue_session(db, user.id, UserService._token_claims(user))
+        result["user"] = user
+        return result
+
+    @staticmethod
+    def refresh_session(db: Session, refresh_token: str):
+        """Tukar refresh token dengan access token baru, refresh token lama tidak berlaku lagi"""
+        token_hash = hash_refresh_token(refresh_token)
+        cached = session_cache.pop(token_hash)
+
+        session = UserSessionRepository.rotate(db, token_hash)
+        if not session:
+            existing = UserSessionRepository.get_by_token_hash(db, token_hash)
+            if existing and existing.rotated_at and not existing.revoked_at:
+                # A rotated token came back, it was copied: end every session of that login
+                UserSessionRepository.revoke_family(db, existing.family_id)
+                session_cache.forget_family(existing.family_id)
+                # The revocation has to survive the 401 below
+                db.commit()
+                raise AppError(401, MESSAGE_CODE.UNAUTHORIZED, "Refresh token reuse detected, please login again")
+            raise AppError(401, MESSAGE_CODE.UNAUTHORIZED, "Invalid or expired refresh token")
+
+        if cached and cached["user_id"] == session.user_id:
+            sub = cached["sub"]
+        else:
+            user = UserRepository.get_by_id(db, session.user_id)
+            if not user:
+                raise AppError(401, MESSAGE_CODE.UNAUTHORIZED, "Invalid or expired refresh token")
+            sub = UserService._token_claims(user)
+
+        return UserService._issue_session(db, session.user_id, sub, session.family_id)
+
+    @staticmethod
+    def logout(db: Session, refresh_token: str, current_user: Optional[dict] = None):
+        """Akhiri sesi login dari refresh token ini (termasuk hasil rotasinya) dan cabut access token-nya"""
+        session = UserSessionRepository.get_by_token_hash(db, hash_refresh_token(refresh_token))
+        if session:
+            UserSessionRepository.revoke_family(db, session.family_id)
+            session_cache.forget_family(session.family_id)
+        if current_user and current_user.get("jti"):
+            TokenRevocationService.revoke(db, current_user["jti"], current_user.get("user_id"))
+        return {"message": "Logged out successfully"}
+
+    @staticmethod
+    def _token_claims(user: User) -> dict:
+        return {
+            "id": user.id,
+            "username": user.username,
+            # "email": user.email,
+            "is_admin": user.is_admin,
+            "karyawan_id": user.karyawan_id
+        }
+
+    @staticmethod
+    def _issue_session(db: Session, user_id: int, sub: dict, family_id: str = None) -> dict:
+        """Access token plus a new refresh token, in the given session family or a new one"""
+        refresh_token, token_hash = create_refresh_token()
+        family_id = family_id or uuid.uuid4().hex
+        expires_at = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        UserSessionRepository.create(db, user_id, family_id, token_hash, expires_at)
+        session_cache.put(token_hash, user_id, family_id, sub)
+        return {
+            "access_token": create_access_token({"sub": sub}),
+            "refresh_token": refresh_token,
+            "refresh_expires_at": expires_at.isoformat(),
         }
-        token = create_access_token(token_data)
-        return {"access_token": token, "user": user}
     
     @staticmethod
     def get_all_users(db: Session, page: int = 1, perPage: int = 10, search: str = None):
@@ -111,18 +189,27 @@ class UserService:
                 user = UserRepository.update(db, user_id, username=username, email=email, is_admin=is_admin)
         else:
             user = UserRepository.update(db, user_id, username=username, email=email, is_admin=is_admin)
-        
+
+        # Refreshed access tokens must carry the new claims
+        session_cache.forget_user(user_id)
         return user
     
     @staticmethod
-    def reset_password(db: Session, user_id: int, new_password: str):
-        user = UserRepository.get_by_id(db, user_id)
+    async def reset_password(db: Session, user_id: int, new_password: str):
+        user = await run_sync(UserRepository.get_by_id, db, user_id)
         if not user:
             raise AppError(404, MESSAGE_CODE.NOT_FOUND, "User not found")
         
-        hashed_password = hash_password(new_password)
-        user = UserRepository.update(db, user_id, password_hash=hashed_password)
+        hashed_password = await hash_password_async(new_password)
+        await run_sync(UserService._replace_password, db, user_id, hashed_password)
         return {"message": "Password reset successfully"}
+
+    @staticmethod
+    def _replace_password(db: Session, user_id: int, password_hash: str):
+        UserRepository.update(db, user_id, password_hash=password_hash)
+        # A new password ends every existing login
+        UserSessionRepository.revoke_user(db, user_id)
+        session_cache.forget_user(user_id)
     
     @staticmethod
     def delete_user(db: Session, user_id: int):
@@ -133,4 +220,6 @@ class UserService:
         success = UserRepository.delete(db, user_id)
         if not success:
             raise AppError(500, MESSAGE_CODE.INTERNAL_SERVER_ERROR, "Failed to delete user")
+        # Sessions go with the user through ON DELETE CASCADE
+        session_cache.forget_user(user_id)
         return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -4,5 +4,8 @@ class MESSAGE_CODE:
     FORBIDDEN: str = "FORBIDDEN"
     BAD_REQUEST: str = "BAD_REQUEST"
     CREATED: str = "CREATED"
+    ACCEPTED: str = "ACCEPTED"
     SUCCESS: str = "SUCCESS"
     INTERNAL_SERVER_ERROR: str = "ERROR"
+    SERVICE_UNAVAILABLE: str = "SERVICE_UNAVAILABLE"
+    TOO_MANY_REQUESTS: str = "TOO_MANY_REQUESTS"
@@ -1,9 +1,205 @@
-from typing import Dict
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.config.settings import PAGINATION_COUNT_CACHE_SIZE, PAGINATION_COUNT_CACHE_TTL, PAGINATION_ESTIMATE_MIN_ROWS
 
-def get_pagination_meta(page: int, perPage: int, total_data: int) -> Dict[str, int]:
-    return {
+# Count strategies
+COUNT_WINDOW = "window"      # exact, count(*) OVER () in the page query itself
+COUNT_CACHED = "cached"      # exact, cached per filter for a short TTL
+COUNT_ESTIMATE = "estimate"  # pg_class estimate for unfiltered lists, window otherwise
+COUNT_NONE = "none"          # no total, only hasNext
+COUNT_STRATEGIES = (COUNT_WINDOW, COUNT_CACHED, COUNT_ESTIMATE, COUNT_NONE)
+COUNT_STRATEGY_PATTERN = "^(window|cached|estimate|none)$"
+
+# Per process: other workers keep their cached totals, so a cached count
+# can lag behind another worker's write for up to PAGINATION_COUNT_CACHE_TTL
+_count_cache: Dict[Any, tuple] = {}
+_count_cache_lock = threading.Lock()
+# Bumped on every invalidation, a count that started before it is not stored
+_count_cache_generation = 0
+
+def get_pagination_meta(page: int, perPage: int, total_data: Optional[int], **extra) -> Dict[str, Any]:
+    meta = {
         "page": page,
         "perPage": perPage,
         "totalData": total_data,
-        "totalPages": (total_data + perPage - 1) // perPage,  # Math.ceil
+        "totalPages": (total_data + perPage - 1) // perPage if total_data is not None else None,  # Math.ceil
     }
+    meta.update(extra)
+    return meta
+
+def paginate(
+    db: Session,
+    query,
+    page: int = 1,
+    perPage: int = 10,
+    order_by: tuple = (),
+    count_strategy: Optional[str] = None,
+    table_name: Optional[str] = None,
+    filtered: bool = True
+):
+    """
+    Fetch one page of `query` and its pagination meta in as few round trips as possible.
+
+    `table_name` and `filtered` are only used by the estimate strategy, which
+    can only answer for an unfiltered listing of a single table.
+    Returns (items, meta).
+    """
+    count_strategy = count_strategy or COUNT_WINDOW
+    offset = (page - 1) * perPage
+    query = query.order_by(*order_by) if order_by else query
+
+    if count_strategy == COUNT_NONE:
+        # One extra row tells whether a next page exists
+        items = query.offset(offset).limit(perPage + 1).all()
+        has_next = len(items) > perPage
+        return items[:perPage], get_pagination_meta(page, perPage, None, hasNext=has_next, countStrategy=count_strategy)
+
+    if count_strategy == COUNT_ESTIMATE:
+        estimate = _estimate_count(db, table_name) if not filtered and table_name else None
+        if estimate is not None:
+            items = query.offset(offset).limit(perPage).all()
+            return items, get_pagination_meta(page, perPage, estimate, hasNext=offset + len(items) < estimate, countStrategy=count_strategy, estimated=True)
+        count_strategy = COUNT_WINDOW
+
+    if count_strategy == COUNT_CACHED:
+        total_data = _cached_count(query)
+        items = query.offset(offset).limit(perPage).all()
+        return items, get_pagination_meta(page, perPage, total_data, hasNext=offset + len(items) < total_data, countStrategy=count_strategy)
+
+    rows = query.add_columns(func.count().over().label("total_count")).offset(offset).limit(perPage).all()
+    items = [row[0] for row in rows]
+    if rows:
+        total_data = rows[0][-1]
+    elif page > 1:
+        # Past the last page the window has nothing to report on
+        total_data = query.order_by(None).count()
+    else:
+        total_data = 0
+    return items, get_pagination_meta(page, perPage, total_data, hasNext=offset + len(items) < total_data, countStrategy=count_strategy)
+
+async def paginate_async(
+    db: AsyncSession,
+    statement,
+    page: int = 1,
+    perPage: int = 10,
+    order_by: tuple = (),
+    count_strategy: Optional[str] = None,
+    table_name: Optional[str] = None,
+    filtered: bool = True
+):
+    """paginate for a select() statement on an AsyncSession, same strategies and meta"""
+    count_strategy = count_strategy or COUNT_WINDOW
+    offset = (page - 1) * perPage
+    statement = statement.order_by(*order_by) if order_by else statement
+
+    async def fetch(limit: int) -> list:
+        # unique() folds the rows joined eager loading adds for collections
+        return (await db.execute(statement.offset(offset).limit(limit))).unique().scalars().all()
+
+    if count_strategy == COUNT_NONE:
+        items = await fetch(perPage + 1)
+        has_next = len(items) > perPage
+        return items[:perPage], get_pagination_meta(page, perPage, None, hasNext=has_next, countStrategy=count_strategy)
+
+    if count_strategy == COUNT_ESTIMATE:
+        estimate = await _estimate_count_async(db, table_name) if not filtered and table_name else None
+        if estimate is not None:
+            items = await fetch(perPage)
+            return items, get_pagination_meta(page, perPage, estimate, hasNext=offset + len(items) < estimate, countStrategy=count_strategy, estimated=True)
+        count_strategy = COUNT_WINDOW
+
+    if count_strategy == COUNT_CACHED:
+        key = _count_cache_key(statement)
+        total_data = _get_cached_count(key)
+        if total_data is None:
+            generation = _count_cache_generation
+            total_data = await _count_async(db, statement)
+            _store_cached_count(key, total_data, generation)
+        items = await fetch(perPage)
+        return items, get_pagination_meta(page, perPage, total_data, hasNext=offset + len(items) < total_data, countStrategy=count_strategy)
+
+    result = await db.execute(statement.add_columns(func.count().over().label("total_count")).offset(offset).limit(perPage))
+    rows = result.unique().all()
+    items = [row[0] for row in rows]
+    if rows:
+        total_data = rows[0][-1]
+    elif page > 1:
+        total_data = await _count_async(db, statement)
+    else:
+        total_data = 0
+    return items, get_pagination_meta(page, perPage, total_data, hasNext=offset + len(items) < total_data, countStrategy=count_strategy)
+
+def invalidate_count_cache():
+    global _count_cache_generation
+    with _count_cache_lock:
+        _count_cache_generation += 1
+        _count_cache.clear()
+
+def invalidate_count_cache_on_commit(db: Session):
+    """Drop cached counts once this session commits, before that other requests would cache the old total again"""
+    db.info["invalidate_count_cache"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("invalidate_count_cache", False):
+        invalidate_count_cache()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidation(session):
+    session.info.pop("invalidate_count_cache", None)
+
+def _count_cache_key(statement) -> tuple:
+    compiled = statement.compile()
+    return (str(compiled), tuple(sorted((k, repr(v)) for k, v in compiled.params.items())))
+
+def _get_cached_count(key) -> Optional[int]:
+    with _count_cache_lock:
+        entry = _count_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+    return None
+
+def _store_cached_count(key, total_data: int, generation: int):
+    now = time.monotonic()
+    with _count_cache_lock:
+        if generation != _count_cache_generation:
+            # Counted before a commit that changed the total
+            return
+        if len(_count_cache) >= PAGINATION_COUNT_CACHE_SIZE:
+            for stale_key in [k for k, v in _count_cache.items() if v[0] <= now] or list(_count_cache)[:1]:
+                del _count_cache[stale_key]
+        _count_cache[key] = (now + PAGINATION_COUNT_CACHE_TTL, total_data)
+
+def _cached_count(query) -> int:
+    key = _count_cache_key(query.statement)
+    total_data = _get_cached_count(key)
+    if total_data is None:
+        generation = _count_cache_generation
+        total_data = query.order_by(None).count()
+        _store_cached_count(key, total_data, generation)
+    return total_data
+
+_ESTIMATE_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)")
+
+def _usable_estimate(estimate) -> Optional[int]:
+    # Never analysed (-1) or small enough that an exact count is cheap
+    if estimate is None or estimate < PAGINATION_ESTIMATE_MIN_ROWS:
+        return None
+    return int(estimate)
+
+def _estimate_count(db: Session, table_name: str) -> Optional[int]:
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return _usable_estimate(db.execute(_ESTIMATE_SQL, {"table_name": table_name}).scalar())
+
+async def _estimate_count_async(db: AsyncSession, table_name: str) -> Optional[int]:
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return _usable_estimate(await db.scalar(_ESTIMATE_SQL, {"table_name": table_name}))
+
+async def _count_async(db: AsyncSession, statement) -> int:
+    return await db.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
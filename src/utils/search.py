@@ -0,0 +1,37 @@
+from typing import List, Optional
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.orm import Session
+
+SEARCH_SORT_LATEST = "latest"
+SEARCH_SORT_RELEVANCE = "relevance"
+
+LIKE_ESCAPE = "!"
+
+def escape_like(term: str) -> str:
+    return term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", f"{LIKE_ESCAPE}%").replace("_", f"{LIKE_ESCAPE}_")
+
+def build_search(db: Session, columns: List, term: str):
+    """
+    Build (filter, rank) for a substring search over the given columns.
+
+    On PostgreSQL the ILIKE predicates are served by the pg_trgm GIN indexes
+    and rank uses trigram similarity. Other dialects (SQLite for local
+    testing) get a plain LIKE scan and a prefix-match rank.
+    """
+    pattern = f"%{escape_like(term)}%"
+    search_filter = or_(*[column.ilike(pattern, escape=LIKE_ESCAPE) for column in columns])
+
+    if db.get_bind().dialect.name == "postgresql":
+        rank = func.greatest(*[func.similarity(column, term) for column in columns])
+    else:
+        prefix = f"{escape_like(term)}%"
+        rank = sum(
+            (case((column.ilike(prefix, escape=LIKE_ESCAPE), 1.0), else_=0.0) for column in columns),
+            literal(0.0)
+        )
+    return search_filter, rank
+
+def order_by_search(query, rank, sort: Optional[str], *default_order):
+    if rank is not None and sort == SEARCH_SORT_RELEVANCE:
+        return query.order_by(rank.desc(), *default_order)
+    return query.order_by(*default_order)